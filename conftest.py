@@ -0,0 +1,88 @@
+"""Shared pytest fixtures: scratch trees for the tick runner and the viewer."""
+from pathlib import Path
+import os
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent
+_UNWATCHED = {".git", "__pycache__", ".pytest_cache", "node_modules"}
+
+
+def _repo_files() -> dict[str, int]:
+    """{path relative to the repo: mtime_ns} of every file under the repo root."""
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(REPO_ROOT):
+        dirnames[:] = [d for d in dirnames if d not in _UNWATCHED]
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            try:
+                files[os.path.relpath(path, REPO_ROOT)] = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                continue
+    return files
+
+
+@pytest.fixture(autouse=True)
+def repo_untouched():
+    """Fail a test that creates or modifies files under the repo root."""
+    before = _repo_files()
+    yield
+    after = _repo_files()
+    touched = sorted(p for p, mtime in after.items() if before.get(p) != mtime)
+    assert not touched, f"test wrote into the repository: {touched}"
+
+
+@pytest.fixture(autouse=True)
+def llm_backends(monkeypatch):
+    """Keep the backends a test registers (or selects) out of the next test."""
+    import windsurf_llm
+
+    monkeypatch.setattr(windsurf_llm, "_FACTORIES", dict(windsurf_llm._FACTORIES))
+    monkeypatch.setattr(windsurf_llm, "DEFAULT_BACKEND", windsurf_llm.DEFAULT_BACKEND)
+    yield
+    windsurf_llm.close_backends()
+
+
+@pytest.fixture
+def write():
+    """write(path, text) -> path, creating the parent directories."""
+    def _write(path: Path, text: str) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+        return path
+    return _write
+
+
+@pytest.fixture
+def runner_env(tmp_path: Path, monkeypatch) -> Path:
+    """Point every directory the tick runner writes to into *tmp_path*.
+
+    Returns the agents directory (tmp_path/agents, not created).
+    """
+    import windsurf_tick_runner as runner
+
+    agents = tmp_path / "agents"
+    monkeypatch.setattr(runner, "AGENTS_DIR", agents)
+    monkeypatch.setattr(runner, "GLOBAL_STATE", tmp_path / "global_state.json")
+    monkeypatch.setattr(runner, "JOURNAL_DIR", tmp_path / "journal")
+    monkeypatch.setattr(runner, "METRICS_DIR", tmp_path / "metrics")
+    monkeypatch.setattr(runner, "RESPONSE_CACHE", runner.windsurf_cache.ResponseCache(tmp_path / "cache"))
+    monkeypatch.setattr(runner, "MEMORY_CACHE_DIR", tmp_path / "memory-cache")
+    monkeypatch.setattr(runner, "VECTOR_DIR", tmp_path / "vectors")
+    monkeypatch.setattr(runner, "BATCH_DIR", tmp_path / "batches")
+    monkeypatch.setattr(runner, "TRACE_DIR", tmp_path / "traces")
+    monkeypatch.setattr(runner, "ASSIGNMENTS_FILE", tmp_path / "next_assignments.json")
+    return agents
+
+
+@pytest.fixture
+def viewer_env(tmp_path: Path, monkeypatch) -> Path:
+    """Point the tick viewer at tmp_path/agents with a fresh index; return that directory."""
+    import windsurf_tick_viewer as viewer
+
+    agents = tmp_path / "agents"
+    monkeypatch.setattr(viewer, "AGENTS_DIR", agents)
+    monkeypatch.setattr(viewer, "GLOBAL_STATE", tmp_path / "state.json")
+    monkeypatch.setattr(viewer, "_index", None)
+    monkeypatch.setattr(viewer, "_refreshed", set())
+    return agents
@@ -0,0 +1,61 @@
+"""Pytest covering windsurf_batch with the local file-based backend."""
+from pathlib import Path
+import json
+
+import windsurf_batch
+import windsurf_llm
+import windsurf_tick_runner as runner
+
+
+class _UpperBackend(windsurf_llm.LLMBackend):
+    def complete(self, model, messages, temperature):
+        if "fail" in messages[-1]["content"]:
+            raise RuntimeError("boom")
+        return messages[-1]["content"].upper()
+
+
+def test_local_batch_roundtrip_and_resume(tmp_path: Path):
+    windsurf_llm.register_backend("upper", _UpperBackend)
+    backend = windsurf_batch.LocalBatchBackend(tmp_path / "svc", chat_backend="upper")
+    requests = [
+        windsurf_batch.request_line(agent, "gpt-4o-mini", [{"role": "user", "content": text}], 0.7)
+        for agent, text in (("meta_a", "hello"), ("meta_b", "please fail"))
+    ]
+    job_dir = tmp_path / "tik2"
+
+    results = windsurf_batch.run_batch(job_dir, requests, backend, poll_interval=0, log=lambda m: None)
+    assert results["meta_a"] == "HELLO"
+    assert isinstance(results["meta_b"], windsurf_batch.BatchError)
+    job = json.loads((job_dir / "job.json").read_text())
+    assert job["status"] == "completed"
+
+    # Same requests again: the finished job is reused, nothing is resubmitted.
+    logs = []
+    again = windsurf_batch.run_batch(job_dir, requests, backend, poll_interval=0, log=logs.append)
+    assert again["meta_a"] == "HELLO"
+    assert len(list((tmp_path / "svc" / "local").iterdir())) == 1
+    assert logs[0].startswith("[BATCH] Resuming job")
+
+
+class _ExpiringBackend(windsurf_batch.LocalBatchBackend):
+    name = "expiring"
+
+    def status(self, job_id):
+        return "expired"
+
+
+def test_expired_job_fails_each_agent_and_levels_keep_own_jobs(runner_env: Path, write, monkeypatch):
+    names = ["meta_planner", "meta_topology", "meta_supervisor"]
+    for name in names:
+        write(runner_env / name / "system_prompt.md", f"# {name}\n")
+    monkeypatch.setattr(runner, "CACHE_MODE", "off")
+    monkeypatch.setitem(windsurf_batch.BATCH_BACKENDS, "expiring", _ExpiringBackend)
+
+    counts = runner.run_agents(2, names, "input", batch="expiring")
+
+    assert counts["failed"] == 3
+    record = json.loads((runner_env / "meta_supervisor" / "cycles" / "2.json").read_text())
+    assert record["status"] == "failed" and "expired" in record["error"]["message"]
+    jobs = sorted(p.parent.name for p in (runner.BATCH_DIR / "tik2").glob("*/job.json"))
+    assert jobs == ["level1", "level2"]  # one job per dependency level, none overwritten
+    assert (runner.BATCH_DIR / "local").is_dir()  # the service lives under BATCH_DIR
@@ -0,0 +1,63 @@
+"""Pytest covering the intra-stage dependency scheduler (windsurf_dag)."""
+from pathlib import Path
+import argparse
+import time
+
+import pytest
+
+import windsurf_dag
+import windsurf_tick_runner as runner
+
+
+def test_levels_and_cycles():
+    deps = {"sup": ["plan", "topo"], "doc": ["sup"], "plan": ["outside"]}
+    assert windsurf_dag.levels(["plan", "topo", "sup", "doc"], deps) == [["plan", "topo"], ["sup"], ["doc"]]
+    with pytest.raises(windsurf_dag.CycleError):
+        windsurf_dag.levels(["a", "b"], {"a": ["b"], "b": ["a"]})
+
+
+def test_run_dag_overlaps_independent_agents_and_reports_critical_path():
+    durations = {"plan": 0.05, "topo": 0.15, "sup": 0.05, "solo": 0.02}
+    deps = {"sup": ["plan", "topo"]}
+    finished = []
+
+    def start(agent):
+        return lambda: time.sleep(durations[agent]) or agent
+
+    timings = windsurf_dag.run_dag(list(durations), deps, start,
+                                   lambda agent, result: finished.append(result), workers=3)
+
+    assert set(finished) == set(durations) and finished[-1] == "sup"
+    assert timings["sup"].start >= timings["topo"].end
+    assert timings["solo"].end < timings["topo"].end  # ran alongside, did not wait
+    assert windsurf_dag.critical_path(deps, timings) == ["topo", "sup"]
+    assert max(t.end for t in timings.values()) < sum(durations.values())
+
+
+def test_supervisor_sees_same_tick_analyses(runner_env: Path, write, monkeypatch, capsys):
+    agents = runner_env
+    names = ["meta_planner", "meta_supervisor", "meta_topology", "meta_security"]
+    for name in names:
+        write(agents / name / "system_prompt.md", f"# {name}\n")
+    monkeypatch.setattr(runner, "STAGE_AGENTS", {2: names})
+    monkeypatch.setattr(runner, "CACHE_MODE", "off")
+    inputs = {}
+
+    def fake_llm_call(model, messages, stream_to=None, prompt_tokens=0):
+        agent = next(m["content"] for m in messages if m["role"] == "system").strip("# \n")
+        inputs[agent] = next(m["content"] for m in messages if m["content"].startswith("STAGE INPUT"))
+        return f"analysis by {agent}"
+
+    monkeypatch.setattr(runner, "llm_call", fake_llm_call)
+    args = argparse.Namespace(concurrency=3, batch=None)
+    counts = runner.run_tick(2, args)
+
+    assert counts == {"processed": 4, "resumed": 0, "failed": 0}
+    assert "analysis by meta_planner" in inputs["meta_supervisor"]
+    assert "analysis by meta_topology" in inputs["meta_supervisor"]
+    assert "analysis by" not in inputs["meta_planner"]
+    assert "[DAG] Tick 2: critical path" in capsys.readouterr().out
+
+    inputs.clear()
+    assert runner.run_tick(2, args) == {"processed": 0, "resumed": 4, "failed": 0}
+    assert inputs == {}
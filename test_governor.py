@@ -0,0 +1,93 @@
+"""Pytest covering the windsurf_governor retry policy and circuit breaker."""
+import pytest
+
+import windsurf_governor as gov
+
+
+class _Status(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _governor(**kw):
+    return gov.Governor({}, gov.RateLimit(rpm=6000, tpm=10_000_000), base_delay=0, **kw)
+
+
+def test_retries_transient_errors_then_succeeds():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise _Status(429)
+        return "ok"
+
+    assert _governor().call("m", 10, flaky, log=lambda m: None) == "ok"
+    assert len(attempts) == 3
+
+
+def test_non_transient_error_is_not_retried():
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise _Status(400)
+
+    with pytest.raises(gov.LLMCallError) as info:
+        _governor().call("m", 10, broken, log=lambda m: None)
+    assert len(attempts) == 1
+    record = info.value.as_record()
+    assert record["kind"] == "error" and record["attempts"] == 1 and not record["retryable"]
+
+
+def test_bad_requests_do_not_open_the_circuit():
+    governor = _governor()
+
+    def rejected():
+        raise _Status(400)
+
+    for _ in range(gov.BREAKER_THRESHOLD + 1):
+        with pytest.raises(gov.LLMCallError) as info:
+            governor.call("m", 10, rejected, log=lambda m: None)
+        assert info.value.kind == "error"
+    assert governor.call("m", 10, lambda: "ok", log=lambda m: None) == "ok"
+
+
+def test_retry_after_is_capped_at_max_delay(monkeypatch):
+    slept = []
+    monkeypatch.setattr(gov.time, "sleep", slept.append)
+
+    class _Throttled(_Status):
+        response = type("R", (), {"headers": {"retry-after": "86400"}})()
+
+    calls = []
+
+    def throttled():
+        calls.append(1)
+        if len(calls) == 1:
+            raise _Throttled(429)
+        return "ok"
+
+    assert _governor(max_delay=2.0).call("m", 10, throttled, log=lambda m: None) == "ok"
+    assert slept == [2.0]
+
+
+def test_circuit_opens_after_repeated_failures():
+    governor = _governor(max_retries=10)
+
+    def down():
+        raise gov.TransientLLMError("503")
+
+    with pytest.raises(gov.LLMCallError) as info:
+        governor.call("m", 10, down, log=lambda m: None)
+    assert info.value.attempts == gov.BREAKER_THRESHOLD
+    with pytest.raises(gov.LLMCallError) as info:
+        governor.call("m", 10, lambda: "never called", log=lambda m: None)
+    assert info.value.kind == "circuit_open"
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = gov.TokenBucket(per_minute=600)  # 10 per second
+    assert bucket.acquire(600) == 0
+    assert bucket.acquire(2) > 0.1
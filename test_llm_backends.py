@@ -0,0 +1,118 @@
+"""Pytest covering windsurf_llm backend registry, stub server and mock backend."""
+import json
+import threading
+import time
+import urllib.request
+
+import pytest
+
+import windsurf_llm
+from windsurf_governor import TransientLLMError
+
+
+class _CountingBackend(windsurf_llm.LLMBackend):
+    name = "counting"
+    created = 0
+
+    def __init__(self):
+        type(self).created += 1
+        self.closed = False
+
+    def complete(self, model, messages, temperature):
+        return f"{model}:{messages[-1]['content']}"
+
+    def close(self):
+        self.closed = True
+
+
+def test_backend_is_created_once_and_shared():
+    windsurf_llm.register_backend("counting", _CountingBackend)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(windsurf_llm.get_backend("counting")))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert _CountingBackend.created == 1
+    assert all(b is results[0] for b in results)
+    assert results[0].complete("m", [{"role": "user", "content": "hi"}], 0.0) == "m:hi"
+    windsurf_llm.close_backends()
+    assert results[0].closed
+
+
+def test_stub_server_speaks_chat_completions():
+    server = windsurf_llm.make_stub_server()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        messages = [{"role": "user", "content": "hello"}]
+        req = urllib.request.Request(
+            f"http://127.0.0.1:{server.server_port}/v1/chat/completions",
+            data=json.dumps({"model": "gpt-4o-mini", "messages": messages}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(req) as resp:
+            body = json.loads(resp.read())
+        content = body["choices"][0]["message"]["content"]
+        assert content == windsurf_llm.stub_reply("gpt-4o-mini", messages)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_mock_backend_is_deterministic_and_paced():
+    messages = [{"role": "user", "content": "hello"}]
+    config = windsurf_llm.MockConfig.from_spec("ttft=fixed:0.05,tps=100,tokens=fixed:6,seed=3")
+    backend = windsurf_llm.MockBackend(config)
+    start = time.monotonic()
+    fragments = list(backend.stream("gpt-4o", messages, 0.7))
+    elapsed = time.monotonic() - start
+    assert len(fragments) == 6 and 0.05 + 5 * 0.01 <= elapsed < 1.0
+    reply = "".join(fragments)
+    assert reply.startswith("[mock:gpt-4o:")
+    assert windsurf_llm.MockBackend(config).complete("gpt-4o", messages, 0.7) == reply
+    assert backend.complete("gpt-4o", [{"role": "user", "content": "other"}], 0.7) != reply
+    seeded = windsurf_llm.MockConfig.from_spec("tokens=fixed:6,seed=4")
+    assert windsurf_llm.MockBackend(seeded).complete("gpt-4o", messages, 0.7) != reply
+
+    for spec in ("ttft=gamma:1", "ttft=lognormal:0:0.5", "ttft=lognormal:-1:0.5", "tokens=normal:10:-1"):
+        with pytest.raises(ValueError):
+            windsurf_llm.MockConfig.from_spec(spec)  # rejected when parsed, not when sampled
+
+
+def test_mock_backend_injects_errors_reproducibly():
+    config = windsurf_llm.MockConfig.from_spec("errors=0.5,tokens=fixed:3")
+
+    def outcomes():
+        backend = windsurf_llm.MockBackend(config)
+        results = []
+        for i in range(20):
+            messages = [{"role": "user", "content": f"request {i}"}]
+            try:
+                backend.complete("m", messages, 0.0)
+                results.append("ok")
+            except TransientLLMError:
+                results.append("transient")
+        return results, backend.injected_errors
+
+    results, injected = outcomes()
+    assert 0 < injected < 20 and results.count("transient") == injected
+
+    backend = windsurf_llm.MockBackend(config)
+    for i in range(20):
+        while True:
+            try:
+                backend.complete("m", [{"role": "user", "content": f"request {i}"}], 0.0)
+                break
+            except TransientLLMError:
+                pass  # retried like the governor does
+    assert backend._attempts == {}  # attempt counters are dropped once a request succeeds
+    assert outcomes() == (results, injected)  # same seed, same failures
+
+    always = windsurf_llm.MockBackend(windsurf_llm.MockConfig(fatal=1.0))
+    with pytest.raises(RuntimeError) as excinfo:
+        always.complete("m", [{"role": "user", "content": "x"}], 0.0)
+    assert not isinstance(excinfo.value, TransientLLMError)
@@ -0,0 +1,35 @@
+"""Pytest covering the windsurf_cache response cache."""
+from pathlib import Path
+import os
+import time
+
+from windsurf_cache import ResponseCache
+
+
+def test_cache_roundtrip_and_stats(tmp_path: Path):
+    cache = ResponseCache(tmp_path)
+    messages = [{"role": "user", "content": "hi"}]
+    key = cache.key("gpt-4o", messages, 0.7)
+    assert key == cache.key("gpt-4o", [dict(m) for m in messages], 0.7)
+    assert key != cache.key("gpt-4o", messages, 0.2)
+
+    assert cache.get(key) is None
+    cache.put(key, "gpt-4o", "hello")
+    assert cache.get(key) == "hello"
+    assert cache.stats == {"hits": 1, "misses": 1, "writes": 1, "evictions": 0}
+
+
+def test_cache_evicts_expired_then_lru(tmp_path: Path):
+    cache = ResponseCache(tmp_path, max_entries=2, max_age=3600)
+    keys = [cache.key("m", [{"role": "user", "content": str(i)}], 0.7) for i in range(4)]
+    now = time.time()
+    for age, key in zip((7200, 30, 20, 10), keys):
+        cache.put(key, "m", key)
+        path = tmp_path / key[:2] / f"{key}.json"
+        os.utime(path, (now - age, now - age))
+
+    assert cache.evict() == 2  # one expired, one over the entry limit
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) == keys[2]
+    assert cache.get(keys[3]) == keys[3]
@@ -0,0 +1,109 @@
+"""Pytest covering the rolling agent memory (windsurf_memory)."""
+from pathlib import Path
+import functools
+import threading
+
+import windsurf_memory
+import windsurf_tokens
+import windsurf_tick_runner as runner
+
+
+def _log(tmp_path: Path, ticks: range) -> str:
+    path = tmp_path / "memory.md"
+    path.write_text("Notes: prefer NGOs.\n")
+    for tick in ticks:
+        text = windsurf_memory.append_entry(path, tick, f"did thing {tick}\n" + "detail " * 40)
+    return text
+
+
+def test_append_and_view_before_tick(tmp_path: Path):
+    text = _log(tmp_path, range(1, 4))
+    text = windsurf_memory.append_entry(tmp_path / "memory.md", 2, "redone")  # re-run replaces
+    memory = windsurf_memory.parse_memory(text)
+    assert memory.notes == "Notes: prefer NGOs."
+    assert [t for t, _ in memory.entries] == [1, 2, 3]
+    assert memory.entries[1][1] == "## Tick 2\nredone"
+    assert "## Tick 3" not in windsurf_memory.before_tick(text, 3)
+
+    reply = '```json\n{"thought": "secret", "action": "file brief", "result": {"ok": true}}\n```'
+    assert windsurf_memory.learning(reply) == 'Action: file brief\nResult: {"ok": true}'
+
+
+def test_compaction_is_bounded_tiered_and_incremental(tmp_path: Path):
+    calls = []
+
+    def summarize(summary, sections, max_tokens):
+        calls.append(sections.split("\n", 1)[0])
+        return windsurf_memory.extractive_summary(summary, sections, max_tokens)
+
+    compactor = windsurf_memory.MemoryCompactor(tmp_path / "cache", summarize, cap=400, recent=2)
+    text = _log(tmp_path, range(1, 9))
+    view = compactor.compact(text)
+    assert windsurf_tokens.count_tokens(view) <= 400 < windsurf_tokens.count_tokens(text)
+    assert view.startswith("Notes: prefer NGOs.")
+    assert "## Summary of ticks 1–6" in view and "- tick 6: did thing 6" in view
+    assert "## Tick 7\ndid thing 7" in view and "## Tick 8\ndid thing 8" in view
+    assert calls == [f"## Tick {t}" for t in range(1, 7)]
+
+    text = windsurf_memory.append_entry(tmp_path / "memory.md", 9, "did thing 9")
+    compactor.compact(text)
+    assert calls[6:] == ["## Tick 7"]  # only the newly aged tick is folded
+
+    again = windsurf_memory.MemoryCompactor(tmp_path / "cache", summarize, cap=400, recent=2)
+    assert again.compact(text) == compactor.compact(text) and len(calls) == 7  # cached on disk
+    compactor.close()
+    again.close()
+
+
+def test_prefetch_runs_in_background(tmp_path: Path):
+    release = threading.Event()
+
+    def slow_summarize(summary, sections, max_tokens):
+        release.wait(5)
+        return "summary"
+
+    compactor = windsurf_memory.MemoryCompactor(tmp_path / "cache", slow_summarize, cap=300, recent=1)
+    text = _log(tmp_path, range(1, 6))
+    compactor.prefetch(text)  # returns while the summarizer is blocked
+    release.set()
+    assert "## Summary of ticks 1–4\nsummary" in compactor.compact(text)
+    compactor.close()
+
+
+def test_prefetch_keeps_the_summarizer_it_was_given(tmp_path: Path):
+    release = threading.Event()
+    ticks = []
+
+    def summarize(summary, sections, max_tokens, tick):
+        release.wait(5)
+        ticks.append(tick)
+        return "summary"
+
+    compactor = windsurf_memory.MemoryCompactor(tmp_path / "cache", cap=300, recent=1)
+    text = _log(tmp_path, range(1, 6))
+    compactor.prefetch(text, functools.partial(summarize, tick=5))  # submitted in tick 5
+    release.set()  # ... finishes once tick 6 has started
+    assert "## Summary of ticks 1–4\nsummary" in compactor.compact(text, functools.partial(summarize, tick=6))
+    assert ticks == [5, 5, 5, 5]
+    compactor.close()
+
+
+def test_runner_appends_learnings(runner_env: Path, write, monkeypatch):
+    agents = runner_env
+    write(agents / "agent_a" / "system_prompt.md", "# agent_a\n")
+    monkeypatch.setattr(runner, "CACHE_MODE", "off")
+    memories = []
+
+    def fake_llm_call(model, messages, stream_to=None, prompt_tokens=0):
+        memories.append(messages[-1]["content"])
+        return '{"thought": "t", "action": "act %d", "result": null}' % len(memories)
+
+    monkeypatch.setattr(runner, "llm_call", fake_llm_call)
+    runner.run_agents(4, ["agent_a"], "input")
+    runner.run_agents(4, ["agent_a"], "input")  # resumed: same memory, same request
+    runner.run_agents(9, ["agent_a"], "input")
+    runner.close_memory()
+
+    assert len(memories) == 2
+    assert "act 1" not in memories[0] and "## Tick 4\nAction: act 1" in memories[1]
+    assert (agents / "agent_a" / "memory.md").read_text().endswith("## Tick 9\nAction: act 2\n")
@@ -0,0 +1,89 @@
+"""Pytest covering windsurf_metrics and the runner's per-call metrics."""
+from pathlib import Path
+import json
+import time
+
+import windsurf_llm
+import windsurf_metrics
+import windsurf_tick_runner as runner
+
+
+class _SlowStreamBackend(windsurf_llm.LLMBackend):
+    name = "slowstream"
+
+    def stream(self, model, messages, temperature):
+        time.sleep(0.02)
+        yield "first "
+        time.sleep(0.02)
+        yield "second"
+
+
+def test_tier_costs_and_aggregate(tmp_path: Path):
+    costs = windsurf_metrics.load_tier_costs()
+    assert costs["CHEAP"] == 0.00025 and costs["O3-REASON"] == 0.03
+    assert windsurf_metrics.estimate_cost("MEDIUM", 1500, 500, costs) == 0.006
+    assert windsurf_metrics.estimate_cost("LLM-MEDIUM", 1500, 500, costs) == 0.006  # tag as in system prompts
+    assert windsurf_metrics.estimate_cost("UNKNOWN", 1, 1, costs) is None
+    assert windsurf_metrics.percentile([4, 1, 3, 2], 50) == 2.5
+
+    path = windsurf_metrics.metrics_path(3, tmp_path)
+    recorder = windsurf_metrics.MetricsRecorder(path)
+    for agent, latency, status in (("a", 1.0, "failed"), ("a", 2.0, "ok"), ("b", 4.0, "ok"), ("c", None, "cached")):
+        recorder.record(windsurf_metrics.CallMetrics(3, 3, agent, "gpt-4o", "HQ", status=status, latency=latency,
+                                                     prompt_tokens=100, cost=0.0 if latency is None else 0.5))
+    records = list(windsurf_metrics.load_metrics(tmp_path, ticks=(1, 3)))
+    assert [r["agent"] for r in records] == ["a", "b", "c"]  # re-run of "a" replaces its first record
+    (report,) = windsurf_metrics.aggregate(records, by="tier")
+    assert (report["tier"], report["calls"], report["cached"], report["failed"]) == ("HQ", 3, 1, 0)
+    assert report["latency_p50"] == 3.0 and report["latency_p95"] == 3.9
+    assert report["prompt_tokens"] == 300 and report["cost"] == 1.0
+    assert list(windsurf_metrics.load_metrics(tmp_path, ticks=(4, 9))) == []
+
+
+def test_runner_records_call_metrics(tmp_path: Path, runner_env: Path, write, monkeypatch):
+    write(runner_env / "agent_a" / "system_prompt.md", "# agent_a\n**LLM Default:** MEDIUM\n")
+    monkeypatch.setattr(runner, "STREAM", True)
+    monkeypatch.setattr(runner, "RESUME", False)
+    monkeypatch.setattr(runner.windsurf_llm, "DEFAULT_BACKEND", "slowstream")
+    windsurf_llm.register_backend("slowstream", _SlowStreamBackend)
+
+    runner.run_agents(4, ["agent_a"], "input")
+    runner.run_agents(4, ["agent_a"], "input")  # served from the response cache
+
+    lines = (tmp_path / "metrics" / "tik4.jsonl").read_text().splitlines()
+    sent, cached = (json.loads(line) for line in lines)
+    assert (sent["tier"], sent["model"], sent["stage"], sent["status"]) == ("MEDIUM", "gpt-4o", 4, "ok")
+    assert 0.02 <= sent["ttft"] < sent["latency"] and sent["attempts"] == 1
+    assert sent["completion_tokens"] > 0 and sent["cost"] > 0
+    assert cached["status"] == "cached" and cached["cost"] == 0.0 and cached["latency"] is None
+
+
+def test_tier_tags_do_not_change_the_model(runner_env: Path, write):
+    write(runner_env / "agent_a" / "system_prompt.md", "# agent_a\n**LLM Default:** LLM-HQ\n")
+    write(runner_env / "agent_b" / "system_prompt.md", "# agent_b\n**LLM Default:** HQ\n")
+    a, b = runner.prepare_agents(["agent_a", "agent_b"], [runner.Chunk("", "input")])
+    assert (a.model, a.tier) == (runner.DEFAULT_MODEL, "HQ")  # only the metrics see the tier
+    assert (b.model, b.tier) == ("gpt-4o", "HQ")
+    assert runner.price_tier(a.tier, a.model) == runner.DEFAULT_TIER  # priced as the model used
+    assert runner.price_tier(b.tier, b.model) == "HQ"
+
+
+def test_housekeeping_calls_are_recorded(tmp_path: Path, runner_env: Path, monkeypatch):
+    class _DigestBackend(windsurf_llm.LLMBackend):
+        def complete(self, model, messages, temperature):
+            return "digest"
+
+    windsurf_llm.register_backend("digest", _DigestBackend)
+    monkeypatch.setattr(runner, "CACHE_MODE", "off")
+    monkeypatch.setattr(runner.windsurf_llm, "DEFAULT_BACKEND", "digest")
+
+    runner.summarize_outputs("agent_a: did things", 50, tick=5)
+    runner.summarize_outputs("agent_b: did more", 50, tick=5)
+    runner.summarize_memory("", "## tick 4\nlearned", 50, tick=5)
+    runner.summarize_memory("", "## tick 5\nlearned", 50, tick=6)  # recorded for its own tick
+
+    records = list(windsurf_metrics.load_metrics(tmp_path / "metrics", (5, 5)))
+    assert [r["agent"] for r in records] == ["(reduce)", "(reduce)", "(memory)"]  # every call counts
+    assert {(r["tier"], r["model"], r["stage"]) for r in records} == {("CHEAP", "gpt-4o-mini", 5)}
+    assert [r["tick"] for r in windsurf_metrics.load_metrics(tmp_path / "metrics", (6, 6))] == [6]
+    assert all(r["status"] == "ok" and r["cost"] > 0 for r in records)
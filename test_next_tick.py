@@ -19,5 +19,5 @@ def test_next_tick_advances(tmp_path: Path):
 
     state = json.loads((repo / "windsurf" / "global_state.json").read_text())
     assert state["tick"] == 1
-    msg = (repo / "windsurf" / "agents" / "human" / "outbox" / "tik1" / "input.txt").read_text()
+    msg = (repo / "agents" / "human" / "outbox" / "tik1" / "input.txt").read_text()
     assert msg == "hello world"
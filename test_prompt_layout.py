@@ -0,0 +1,35 @@
+"""Pytest covering the shared-prefix prompt layout."""
+import windsurf_prompt
+
+PREAMBLE = "### COMMON PREAMBLE\nshared rules\n" + windsurf_prompt.PREAMBLE_END
+
+
+def _prompt(agent: str) -> str:
+    return f"{PREAMBLE}\n\n# {agent}\n**LLM Default:** LLM-HQ\n"
+
+
+def test_split_preamble():
+    preamble, block = windsurf_prompt.split_preamble(_prompt("meta_planner"))
+    assert preamble == PREAMBLE
+    assert block.startswith("# meta_planner")
+    assert windsurf_prompt.split_preamble("no marker") == ("", "no marker")
+
+
+def test_shared_prefix_layout_shares_stage_input():
+    stage_input = "human kickoff " * 200
+    shared_layout = [
+        ("gpt-4o", windsurf_prompt.build_messages(_prompt(a), stage_input, f"notes of {a}"))
+        for a in ("meta_a", "meta_b", "meta_c")
+    ]
+    legacy_layout = [
+        ("gpt-4o", windsurf_prompt.build_messages(_prompt(a), stage_input, "", layout="legacy"))
+        for a in ("meta_a", "meta_b", "meta_c")
+    ]
+    roles = [m["role"] for m in shared_layout[0][1]]
+    assert roles == ["system", "user", "system", "user"]
+    assert shared_layout[0][1][0]["content"] == PREAMBLE
+
+    shared, total = windsurf_prompt.shared_prefix_tokens(shared_layout)
+    legacy_shared, legacy_total = windsurf_prompt.shared_prefix_tokens(legacy_layout)
+    assert shared / total > 0.5
+    assert shared / total > legacy_shared / legacy_total
@@ -0,0 +1,64 @@
+"""Pytest covering the stage 5 fan-in reduction (windsurf_reduce)."""
+from pathlib import Path
+import argparse
+import threading
+import time
+
+import windsurf_reduce
+import windsurf_tick_runner as runner
+from windsurf_tokens import Chunk
+
+
+def test_tree_reduce_levels_and_parallel_groups():
+    chunks = [Chunk(f"agent_{i:02}/llm.txt", f"output {i} " + "detail " * 50) for i in range(10)]
+    active, peak, groups = [0], [0], []
+    lock = threading.Lock()
+
+    def summarize(text, max_tokens):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            groups.append(text.count("# "))
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return f"digest of {text.count('# ')}"
+
+    reduced, stats = windsurf_reduce.tree_reduce(chunks, summarize, budget=20, fan_in=4)
+
+    assert (stats.levels, stats.per_level, groups[:3]) == (2, [3, 1], [4, 4, 2])
+    assert peak[0] == 3  # the groups of a level run concurrently
+    (digest,) = reduced
+    assert digest.source == "digest L2.1 (agent_00 … agent_09, 10 outputs)"
+    assert stats.tokens_out < stats.tokens_in
+
+    same, stats = windsurf_reduce.tree_reduce(chunks, summarize, budget=10**6)
+    assert same == chunks and stats.calls == 0  # under budget: untouched
+
+
+def test_stage5_meta_agents_get_digest(runner_env: Path, write, monkeypatch):
+    agents = runner_env
+    actors = [f"agent_{i}" for i in range(6)]
+    for name in actors:
+        write(agents / name / "outbox" / "tik4" / "llm.txt", f"{name} result " + "filler " * 100)
+    write(agents / "meta_review" / "system_prompt.md", "# meta_review\n")
+    monkeypatch.setattr(runner, "META_AGENTS", ["meta_review"])
+    monkeypatch.setattr(runner, "STAGE_AGENTS", {5: ["meta_review"]})
+    monkeypatch.setattr(runner, "REDUCE_TOKENS", 200)
+    monkeypatch.setattr(runner, "CACHE_MODE", "off")
+    calls = []
+
+    def fake_llm_call(model, messages, stream_to=None, prompt_tokens=0):
+        if messages[0]["content"].startswith("Condense"):
+            calls.append(model)
+            return "DIGEST:" + ",".join(line[2:].split("/")[0] for line in
+                                       messages[1]["content"].splitlines() if line.startswith("# "))
+        calls.append(next(m["content"] for m in messages if m["content"].startswith("STAGE INPUT")))
+        return "reviewed"
+
+    monkeypatch.setattr(runner, "llm_call", fake_llm_call)
+    runner.run_tick(5, argparse.Namespace(concurrency=1, batch=None))
+
+    assert calls[:2] == [runner.LLM_MODEL_MAP["CHEAP"]] * 2
+    stage_input = calls[2]
+    assert "DIGEST:agent_0,agent_1,agent_2,agent_3" in stage_input and "filler" not in stage_input
@@ -0,0 +1,97 @@
+"""Pytest covering the retrieval memory (windsurf_retrieval)."""
+from pathlib import Path
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import windsurf_memory  # noqa: E402
+import windsurf_retrieval  # noqa: E402
+import windsurf_tick_runner as runner  # noqa: E402
+
+
+def test_hashing_embedder_is_deterministic_and_similar_for_overlap():
+    embedder = windsurf_retrieval.HashingEmbedder(dim=256)
+    a, b, c = embedder.embed(["asylum counsel for children", "counsel for asylum children",
+                              "quarterly server budget"])
+    assert np.allclose(embedder.embed(["asylum counsel for children"])[0], a)
+    assert np.isclose(np.linalg.norm(a), 1.0)
+    assert a @ b > 0.5 > a @ c
+
+
+def test_chunk_text_respects_token_limit():
+    text = "\n\n".join(f"paragraph {i} " + "word " * 30 for i in range(6))
+    chunks = windsurf_retrieval.chunk_text(text, max_tokens=80)
+    assert len(chunks) > 1 and "".join(chunks).count("paragraph") == 6
+    assert all(windsurf_retrieval.windsurf_tokens.count_tokens(c) <= 80 for c in chunks)
+
+
+def _agent(tmp_path: Path) -> Path:
+    agent_dir = tmp_path / "agents" / "agent_a"
+    (agent_dir / "cycles").mkdir(parents=True)
+    (agent_dir / "system_prompt.md").write_text("# agent_a\n")
+    memory = agent_dir / "memory.md"
+    windsurf_memory.append_entry(memory, 2, "Filed amicus brief on juvenile counsel funding.")
+    windsurf_memory.append_entry(memory, 4, "Negotiated cloud hosting discount with vendor.")
+    (agent_dir / "cycles" / "2.json").write_text(json.dumps(
+        {"thought_action_result": "Met congressional staff about counsel appropriations."}))
+    (agent_dir / "cycles" / "3.json").write_text(json.dumps(
+        {"thought_action_result": "Briefed reporters on the counsel appropriations bill."}))
+    (agent_dir / "cycles" / "4.json").write_text(json.dumps({"status": "failed", "error": {}}))
+    return agent_dir
+
+
+def test_index_is_incremental_and_ranks_relevant_chunks(tmp_path: Path):
+    agent_dir = _agent(tmp_path)
+    embedder = windsurf_retrieval.HashingEmbedder()
+    index = windsurf_retrieval.VectorIndex(tmp_path / "vectors", embedder)
+    assert index.update(windsurf_retrieval.agent_sources(agent_dir, before_tick=9)) == 3
+    assert index.update(windsurf_retrieval.agent_sources(agent_dir, before_tick=9)) == 0
+
+    query = windsurf_retrieval.embed_query(embedder, "funding counsel for juvenile cases")
+    (score, best), = index.search(query, 1)
+    assert best["source"] == "memory/tik2" and score > 0
+
+    windsurf_memory.append_entry(agent_dir / "memory.md", 6, "Drafted counsel funding memo.")
+    reloaded = windsurf_retrieval.VectorIndex(tmp_path / "vectors", embedder)  # from disk
+    assert len(reloaded.chunks) == 3
+    assert reloaded.update(windsurf_retrieval.agent_sources(agent_dir, before_tick=9)) == 1
+    assert reloaded.vectors.shape == (4, embedder.dim)
+    # a re-run of tick 4 does not see tick 4 or later
+    reloaded.update(windsurf_retrieval.agent_sources(agent_dir, before_tick=4))
+    # cycle 2 is covered by its memory section; cycle 3 has none
+    assert {c["source"] for c in reloaded.chunks} == {"memory/tik2", "cycle/tik3"}
+
+
+def test_index_rebuilds_vectors_of_another_dimension(tmp_path: Path):
+    agent_dir = _agent(tmp_path)
+    sources = windsurf_retrieval.agent_sources(agent_dir)
+    windsurf_retrieval.VectorIndex(tmp_path / "vectors", windsurf_retrieval.HashingEmbedder(dim=64)).update(sources)
+
+    embedder = windsurf_retrieval.HashingEmbedder(dim=128)
+    index = windsurf_retrieval.VectorIndex(tmp_path / "vectors", embedder)
+    assert index.chunks == [] and index.update(sources) == 3
+    assert index.vectors.shape == (3, 128)
+
+    index.embedder = windsurf_retrieval.HashingEmbedder(dim=32)  # dimension only known once used
+    query = windsurf_retrieval.embed_query(index.embedder, "hosting discount")
+    assert index.search(query, 1)[0][1]["source"] == "memory/tik4"
+    assert index.vectors.shape == (3, 32)
+
+
+def test_runner_sends_top_k_memory(tmp_path: Path, runner_env: Path, monkeypatch):
+    _agent(tmp_path)
+    monkeypatch.setattr(runner, "MEMORY_RETRIEVAL_K", 1)
+    monkeypatch.setattr(runner, "MEMORY_TOKENS", 0)
+    monkeypatch.setattr(runner, "CACHE_MODE", "off")
+    memories = []
+
+    def fake_llm_call(model, messages, stream_to=None, prompt_tokens=0):
+        memories.append(messages[-1]["content"])
+        return "ok"
+
+    monkeypatch.setattr(runner, "llm_call", fake_llm_call)
+    runner.run_agents(9, ["agent_a"], "Vendor wants to renegotiate the hosting contract")
+
+    assert memories == ["MEMORY:\n# memory/tik4\n## Tick 4\nNegotiated cloud hosting discount with vendor."]
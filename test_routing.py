@@ -0,0 +1,87 @@
+"""Pytest covering routed inbox delivery for the actor stage."""
+from pathlib import Path
+import argparse
+import json
+
+import pytest
+
+import windsurf_routing
+import windsurf_tick_runner as runner
+
+
+def test_find_routes_shapes():
+    actors = {"agent_a", "agent_b"}
+    assert windsurf_routing.collect_routes([
+        ("meta_planner", '{"agent_a": "draft amicus", "agent_b": ["call press", "brief"]}'),
+        ("meta_topology", 'Plan:\n```yaml\nassignments:\n  - to: [agent_b, agent_x]\n'
+                          '    task: {goal: sync}\n  - to: all\n    message: standup\n```\n'),
+        ("meta_security", '{"thought": "no routing here", "result": null}'),
+    ], actors) == {
+        "agent_a": {"meta_planner": ["draft amicus"], "meta_topology": ["standup"]},
+        "agent_b": {"meta_planner": ["call press", "brief"],
+                    "meta_topology": ['{\n  "goal": "sync"\n}', "standup"]},
+    }
+    assert windsurf_routing.extract_documents("plain prose, no plan") == []
+
+
+@pytest.fixture
+def stage4(runner_env: Path, write, monkeypatch):
+    agents = runner_env
+    for name in ("agent_a", "agent_b", "meta_planner"):
+        write(agents / name / "system_prompt.md", f"# {name}\n")
+    write(agents / "human" / "outbox" / "tik3" / "kickoff.txt", "Prompt: go")
+    monkeypatch.setattr(runner, "STAGE_AGENTS", {4: ["agent_a", "agent_b"]})
+    monkeypatch.setattr(runner, "META_AGENTS", ["meta_planner"])
+    monkeypatch.setattr(runner, "CACHE_MODE", "off")
+    inputs = {}
+
+    def fake_llm_call(model, messages, stream_to=None, prompt_tokens=0):
+        agent = next(m["content"] for m in messages if m["role"] == "system").strip("# \n")
+        inputs[agent] = next(m["content"] for m in messages if m["role"] == "user")
+        return "done"
+
+    monkeypatch.setattr(runner, "llm_call", fake_llm_call)
+    return agents, inputs
+
+
+def test_actors_read_only_their_inbox(tmp_path: Path, stage4, write):
+    agents, inputs = stage4
+    write(agents / "meta_planner" / "outbox" / "tik2" / "llm.txt",
+          '```json\n{"assignments": [{"to": "agent_a", "task": "SECRET-A"}]}\n```')
+    (tmp_path / "next_assignments.json").write_text(json.dumps({"agent_b": "TASK-B"}))
+    args = argparse.Namespace(concurrency=1, batch=None)
+
+    runner.run_tick(4, args)
+
+    assert (agents / "agent_a" / "inbox" / "tik4" / "from_meta_planner.txt").read_text() == "SECRET-A\n"
+    assert (agents / "agent_b" / "inbox" / "tik4" / "from_next_assignments.txt").exists()
+    assert "Prompt: go" in inputs["agent_a"] and "SECRET-A" in inputs["agent_a"]
+    assert "TASK-B" not in inputs["agent_a"] and "SECRET-A" not in inputs["agent_b"]
+
+    # routing changed: the stale inbox file is dropped on the re-run
+    (tmp_path / "next_assignments.json").write_text("{}")
+    runner.run_tick(4, args)
+    assert list((agents / "agent_b" / "inbox" / "tik4").iterdir()) == []
+    assert "TASK-B" not in inputs["agent_b"]
+
+
+def test_broadcast_fallback_without_routing(tmp_path: Path, stage4, write):
+    agents, inputs = stage4
+    write(agents / "meta_planner" / "outbox" / "tik3" / "llm.txt", "free-form analysis")
+    runner.run_tick(4, argparse.Namespace(concurrency=1, batch=None))
+
+    assert inputs["agent_a"] == inputs["agent_b"]
+    assert "free-form analysis" in inputs["agent_a"] and "Prompt: go" in inputs["agent_a"]
+    assert not (agents / "agent_a" / "inbox").exists()
+
+
+def test_assignments_are_routed_only_for_their_tick(tmp_path: Path):
+    path = tmp_path / "next_assignments.json"
+    path.write_text(json.dumps({"agent_a": "TASK-A"}))
+    assert "TASK-A" in windsurf_routing.load_assignments(path, 4)
+    assert "TASK-A" in windsurf_routing.load_assignments(path, 4)  # re-run of the same tick
+    assert windsurf_routing.load_assignments(path, 9) == ""  # unchanged since tick 4
+
+    path.write_text(json.dumps({"tick": 9, "agent_a": "TASK-A2"}))
+    assert "TASK-A2" in windsurf_routing.load_assignments(path, 9)
+    assert windsurf_routing.load_assignments(path, 14) == ""  # written for tick 9
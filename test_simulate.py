@@ -0,0 +1,72 @@
+"""Pytest covering the unattended simulation driver."""
+from pathlib import Path
+import itertools
+import json
+
+import pytest
+
+import windsurf_llm
+import windsurf_simulate
+import windsurf_tick_runner as runner
+
+
+class _EchoBackend(windsurf_llm.LLMBackend):
+    name = "echo"
+
+    def complete(self, model, messages, temperature):
+        return f"echo {len(messages)} messages"
+
+
+@pytest.fixture
+def sim_tree(runner_env: Path, write, monkeypatch):
+    agents_dir = runner_env
+    for name in ("meta_a", "actor_a", "actor_b"):
+        write(agents_dir / name / "system_prompt.md", f"# {name}\n")
+    monkeypatch.setattr(runner, "STAGE_AGENTS", {2: ["meta_a"], 4: ["actor_a", "actor_b"], 5: ["meta_a"]})
+    monkeypatch.setattr(runner.windsurf_llm, "DEFAULT_BACKEND", "echo")
+    windsurf_llm.register_backend("echo", _EchoBackend)
+    return agents_dir
+
+
+def test_read_script_skips_comments(tmp_path: Path):
+    script = tmp_path / "prompts.txt"
+    script.write_text("# scenario\nfirst prompt\n\n  second prompt  \n")
+    assert windsurf_simulate.read_script(script) == ["first prompt", "second prompt"]
+
+
+def test_simulate_finishes_open_cycle_then_full_cycles(sim_tree: Path):
+    runner.save_state({"tick": 3})
+    args = windsurf_simulate.parse_args(["--script", "unused", "--cycles", "1", "-j", "2"])
+    prompts = itertools.cycle(["go", "stop"])
+
+    timings = windsurf_simulate.simulate(1, args, prompts)
+
+    assert [t.tick for t in timings] == list(range(4, 11))
+    assert [t.agents for t in timings] == [2, 1, 0, 1, 0, 2, 1]
+    assert json.loads(runner.GLOBAL_STATE.read_text())["tick"] == 10
+    kickoff = (sim_tree / "human" / "outbox" / "tik6" / "kickoff.txt").read_text()
+    assert "Prompt: go\n" in kickoff
+    assert (sim_tree / "actor_b" / "outbox" / "tik9" / "llm.txt").exists()
+
+
+def test_synthetic_human_uses_cheap_tier(sim_tree: Path, monkeypatch):
+    seen = []
+
+    def fake_llm_call(model, messages, stream_to=None, prompt_tokens=0):
+        seen.append(model)
+        return "  next:\n investigate  "
+
+    monkeypatch.setattr(runner, "llm_call", fake_llm_call)
+    assert windsurf_simulate.synthetic_prompt(6) == "next: investigate"
+    assert seen == [runner.LLM_MODEL_MAP["CHEAP"]]
+
+
+def test_synthetic_human_falls_back_to_previous_prompt(sim_tree: Path, monkeypatch):
+    runner.human_input(6, "hold the line")
+
+    def failing_llm_call(model, messages, stream_to=None, prompt_tokens=0):
+        raise runner.windsurf_governor.LLMCallError("HTTP 503", model, 5, "retries_exhausted")
+
+    monkeypatch.setattr(runner, "llm_call", failing_llm_call)
+    assert windsurf_simulate.synthetic_prompt(8) == "hold the line"
+    assert windsurf_simulate.synthetic_prompt(3) == windsurf_simulate.FALLBACK_PROMPT
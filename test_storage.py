@@ -0,0 +1,86 @@
+"""Pytest covering the tick storage backends."""
+from pathlib import Path
+import json
+import sqlite3
+
+from windsurf import next_tick
+from windsurf.tools.storage import DatabaseStorage, FileStorage, open_storage
+import windsurf_tick_runner as runner
+
+
+def test_database_storage_batches_and_exports(tmp_path: Path):
+    db = DatabaseStorage("sqlite:///state/ticks.sqlite3", base_dir=tmp_path, batch_size=100)
+    with db.transaction():
+        db.write_cycle("meta_a", 2, {"thought_action_result": "plan"})
+        db.write_message("meta_a", 2, "outbox", "llm.txt", "plan")
+        db.write_message("agent_b", 2, "outbox", "llm.txt", "act")
+        db.write_message("agent_b", 2, "outbox", "old.txt", "stale")
+        db.delete_message("agent_b", 2, "outbox", "old.txt")
+        assert len(db._pending) == 6  # nothing committed inside the block
+    assert db._pending == []
+
+    assert db.read_cycle("meta_a", 2) == {"thought_action_result": "plan"}
+    assert [(m.agent, m.name) for m in db.messages(2)] == [("agent_b", "llm.txt"), ("meta_a", "llm.txt")]
+    assert not db.has_message("agent_b", 2, "outbox", "old.txt")
+
+    assert db.export(tmp_path / "agents") == 3
+    files = FileStorage(tmp_path / "agents")
+    assert files.read_cycle("meta_a", 2) == {"thought_action_result": "plan"}
+    assert [m.text for m in files.messages(2)] == ["act", "plan"]
+    db.close()
+    assert (tmp_path / "state" / "ticks.sqlite3").exists()
+
+
+def test_reads_inside_a_transaction_do_not_commit(tmp_path: Path):
+    db = DatabaseStorage("sqlite:///ticks.sqlite3", base_dir=tmp_path)
+    other = sqlite3.connect(tmp_path / "ticks.sqlite3")
+    with db.transaction():
+        db.write_message("meta_a", 2, "outbox", "llm.txt", "plan")
+        assert [m.text for m in db.messages(2)] == ["plan"]  # e.g. a DAG dependency's output
+        assert other.execute("SELECT COUNT(*) FROM messages").fetchone() == (0,)
+    assert other.execute("SELECT COUNT(*) FROM messages").fetchone() == (1,)
+    other.close()
+    db.close()
+
+
+def test_runner_persists_to_database(tmp_path: Path, runner_env: Path, write, monkeypatch):
+    agents_dir = runner_env
+    write(agents_dir / "agent_a" / "system_prompt.md", "# agent_a\n")
+    monkeypatch.setattr(runner, "STORAGE_MODE", "sqlite:///windsurf/storage.sqlite3")
+    monkeypatch.setattr(runner, "llm_call", lambda model, messages, stream_to=None, prompt_tokens=0: "done")
+
+    runner.human_input(1, "kick off")
+    runner.run_agents(2, ["agent_a"], runner.gather_prev_chunks(1))
+    runner.close_storage()
+
+    assert not (agents_dir / "agent_a" / "cycles").exists()
+    db = open_storage(agents_dir, "sqlite:///windsurf/storage.sqlite3")
+    assert db.read_cycle("agent_a", 2) == {"thought_action_result": "done"}
+    assert [m.agent for m in db.messages(1)] == ["human"]
+    db.close()
+    journal = (tmp_path / "journal" / "tik2.jsonl").read_text().splitlines()
+    assert json.loads(journal[0])["status"] == "ok"
+
+
+def test_next_tick_and_runner_share_one_database(tmp_path: Path, runner_env: Path, write, monkeypatch):
+    write(tmp_path / "windsurf" / "global_state.json", '{"tick": 0}')
+    monkeypatch.setattr(next_tick, "ROOT", tmp_path / "windsurf")
+    monkeypatch.setattr(next_tick, "REPO_ROOT", tmp_path)
+    monkeypatch.setattr(next_tick, "AGENTS_DIR", runner_env)
+    monkeypatch.setenv("WINDSURF_STORAGE", "db")
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    monkeypatch.setattr(runner, "STORAGE_MODE", "db")
+
+    assert next_tick.advance_tick("hi") == 1
+    try:
+        assert [(m.agent, m.text) for m in runner.storage().messages(1)] == [("human", "hi")]
+    finally:
+        runner.close_storage()
+    assert (tmp_path / "windsurf" / "storage.sqlite3").exists()
+    assert not (tmp_path / "windsurf" / "windsurf").exists()
+
+    monkeypatch.setenv("WINDSURF_STORAGE", "fs")  # file mode writes the same tree
+    monkeypatch.setattr(runner, "STORAGE_MODE", "fs")
+    assert next_tick.advance_tick("again") == 2
+    assert [(m.agent, m.text) for m in runner.storage().messages(2)] == [("human", "again")]
+    assert not (tmp_path / "windsurf" / "agents").exists()
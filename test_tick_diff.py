@@ -0,0 +1,39 @@
+"""Pytest covering hash-based tick comparison and windsurf_diff."""
+from pathlib import Path
+
+import windsurf_diff
+import windsurf_tick_viewer as viewer
+
+
+def test_semantic_json_and_yaml_diff():
+    old = '{"plan": {"owner": "meta_planner", "steps": [1, 2]}, "note": "a\\nb"}'
+    new = '```json\n{"plan": {"owner": "meta_topology", "steps": [1]}, "note": "a\\nc", "new": true}\n```'
+    lines = list(windsurf_diff.diff_content(old, new, "json"))
+    assert '+ $.new: true' in lines
+    assert '~ $.plan.owner: "meta_planner" → "meta_topology"' in lines
+    assert '- $.plan.steps[1]: 2' in lines
+    assert "~ $.note:" in lines and "    +c" in lines
+
+    assert list(windsurf_diff.diff_content("a: 1\nb: [x]\n", "a: 1\nb: [y]\n", "yaml")) == [
+        '~ $.b[0]: "x" → "y"'
+    ]
+    # unparsable structured content falls back to a line diff
+    assert "+{broken" in list(windsurf_diff.diff_content("{}", "{broken", "json"))
+
+
+def test_compare_range_skips_unchanged_by_hash(viewer_env: Path, write, monkeypatch, capsys):
+    agents = viewer_env
+    for tick, text in ((1, "same"), (2, "same"), (3, "changed")):
+        write(agents / "meta_a" / "outbox" / f"tik{tick}" / "llm.txt", text)
+    read = []
+    original = windsurf_diff.diff_files
+    monkeypatch.setattr(windsurf_diff, "diff_files",
+                        lambda old, new, ct: read.append((old.parent.name, new.parent.name)) or original(old, new, ct))
+
+    viewer.compare_range(1, 3)
+
+    out = capsys.readouterr().out
+    assert read == [("tik2", "tik3")]
+    assert "=== Tick 2 ===" not in out and "=== Tick 3 ===" in out
+    assert "+changed" in out
+    assert "Unchanged (by hash): 1" in out
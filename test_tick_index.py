@@ -0,0 +1,73 @@
+"""Pytest covering the windsurf_index tick store."""
+from pathlib import Path
+import hashlib
+import os
+
+from windsurf_index import TickIndex
+
+
+def test_index_maps_tick_files(tmp_path: Path, write):
+    agents = tmp_path / "agents"
+    write(agents / "meta_a" / "cycles" / "3.json", '{"thought_action_result": "hi"}')
+    write(agents / "meta_a" / "outbox" / "tik3" / "llm.txt", "# Plan\nstep")
+    write(agents / "agent_b" / "inbox" / "tik3" / "task.yaml", "a: 1")
+    write(agents / "agent_b" / "outbox" / "tik4" / "llm.txt", "later")
+    write(agents / "meta_a" / "system_prompt.md", "not a tick file")
+
+    index = TickIndex(agents)
+    assert index.refresh() == 4
+    files = index.files(3)
+    assert [(f.agent, f.key, f.content_type) for f in files] == [
+        ("agent_b", "inbox/task.yaml", "yaml"),
+        ("meta_a", "cycle", "json"),
+        ("meta_a", "outbox/llm.txt", "markdown"),
+    ]
+    llm = index.get(3, "meta_a", "outbox", "llm.txt")
+    assert llm.path == agents / "meta_a" / "outbox" / "tik3" / "llm.txt"
+    assert llm.sha256 == hashlib.sha256(b"# Plan\nstep").hexdigest()
+    assert index.ticks() == [3, 4]
+    assert (tmp_path / "windsurf" / "index.sqlite3").exists()
+
+
+def test_refresh_is_incremental(tmp_path: Path, write):
+    agents = tmp_path / "agents"
+    out = write(agents / "meta_a" / "outbox" / "tik1" / "llm.txt", "v1")
+    write(agents / "meta_a" / "outbox" / "tik2" / "llm.txt", "other")
+    index = TickIndex(agents)
+    index.refresh()
+    assert index.refresh() == 0
+
+    # replace via rename, as the runner does
+    write(out.with_suffix(".txt.partial"), "version 2").replace(out)
+    assert index.refresh(ticks=[1]) == 1
+    assert index.get(1, "meta_a", "outbox", "llm.txt").size == len("version 2")
+
+    os.remove(out)
+    (out.parent).rmdir()
+    index.refresh()
+    assert index.files(1) == []
+    assert [f.tick for f in TickIndex(agents).files(2)] == [2]  # persisted on disk
+
+
+def test_search_ranks_and_filters(tmp_path: Path, write):
+    agents = tmp_path / "agents"
+    write(agents / "meta_a" / "cycles" / "2.json",
+          '{"thought_action_result": "Route the counsel tasks to agent_bar."}')
+    write(agents / "agent_bar" / "outbox" / "tik4" / "llm.txt", "Counsel counsel counsel for every child.")
+    write(agents / "agent_un" / "outbox" / "tik9" / "llm.txt", "Unrelated report on counsel.")
+    index = TickIndex(agents)
+    index.refresh()
+
+    hits = index.search("counsel")
+    assert [h.file.agent for h in hits][0] == "agent_bar"  # most occurrences ranks first
+    assert "[counsel]" in hits[0].snippet.lower()
+    assert [h.file.key for h in index.search("counsel", group="meta")] == ["cycle"]
+    assert [h.file.tick for h in index.search("counsel", ticks=(3, 5))] == [4]
+    assert index.search("thought_action_result") == []  # only the cycle's text is indexed
+    assert [h.file.agent for h in index.search("agent_bar(")] == ["meta_a"]  # literal fallback
+
+    write(agents / "agent_bar" / "outbox" / "tik4" / "llm.txt.new", "no longer relevant")
+    (agents / "agent_bar" / "outbox" / "tik4" / "llm.txt.new").replace(
+        agents / "agent_bar" / "outbox" / "tik4" / "llm.txt")
+    index.refresh()
+    assert "agent_bar" not in [h.file.agent for h in index.search("counsel")]
@@ -0,0 +1,38 @@
+"""Pytest covering bounded previews and pagination in the tick viewer."""
+from pathlib import Path
+import json
+
+import windsurf_tick_viewer as viewer
+
+
+def test_read_preview_is_bounded(tmp_path: Path):
+    big = tmp_path / "llm.txt"
+    big.write_text("é" * 1_000_000)
+    text, truncated = viewer.read_preview(big, 100)
+    assert truncated and text == "é" * 100
+
+    small = tmp_path / "small.txt"
+    small.write_text("ünïcode")
+    assert viewer.read_preview(small, 100) == ("ünïcode", False)
+    # a truncated JSON preview is shown raw instead of failing to parse
+    out = viewer.format_content('{"a": [1, 2', "x.json", truncated=True)
+    assert '{"a": [1, 2' in out and "truncated" in out
+
+
+def test_large_cycle_and_pagination(viewer_env: Path, write, capsys):
+    agents = viewer_env
+    result = "line\n" + "x" * (viewer.CYCLE_PARSE_LIMIT * 2)
+    write(agents / "agent_a" / "cycles" / "4.json", json.dumps({"thought_action_result": result}))
+    for name in ("agent_b", "agent_c"):
+        write(agents / name / "outbox" / "tik4" / "llm.txt", f"hello from {name}")
+
+    entry = viewer.get_tick_entries(4)["agent_a"]["cycle"]
+    data, truncated = viewer.read_cycle(entry, 50)
+    assert truncated and data["thought_action_result"].startswith("line\nxxx")
+
+    viewer.view_tick(4, page=1, page_size=2)
+    out = capsys.readouterr().out
+    assert "agent_a" in out and "hello from agent_b" in out and "agent_c" not in out
+    assert "Page 1/2 (agents 1-2 of 3)" in out and "--page 2 --page-size 2" in out
+    viewer.view_tick(4, page=2, page_size=2)
+    assert "hello from agent_c" in capsys.readouterr().out
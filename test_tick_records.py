@@ -0,0 +1,42 @@
+"""Pytest covering the viewer's --format json/ndjson records."""
+from pathlib import Path
+import json
+
+import windsurf_tick_viewer as viewer
+
+
+def test_ndjson_tick_and_summary(viewer_env: Path, write, monkeypatch, capsys):
+    agents = viewer_env
+    monkeypatch.setattr(viewer, "OUTPUT_FORMAT", "ndjson")
+    write(agents / "meta_a" / "cycles" / "3.json", '{"thought_action_result": "plan the day"}')
+    write(agents / "meta_a" / "outbox" / "tik3" / "llm.txt", "x" * 2000)
+    write(agents / "agent_b" / "inbox" / "tik3" / "task.yaml", "a: 1")
+
+    viewer.view_tick(3)
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(r["agent"], r["kind"], r["name"]) for r in records] == [
+        ("agent_b", "inbox", "task.yaml"), ("meta_a", "cycle", "3.json"), ("meta_a", "outbox", "llm.txt")]
+    cycle, llm = records[1], records[2]
+    assert cycle["preview"] == "plan the day" and cycle["content_type"] == "json"
+    assert llm["size"] == 2000 and llm["truncated"] and len(llm["preview"]) == viewer.MAX_CONTENT_PREVIEW
+    assert len(llm["sha256"]) == 64
+
+    viewer.view_tick_summary(3)
+    summary = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert summary[1] == {"record": "agent", "tick": 3, "agent": "meta_a", "cycle": True,
+                          "outbox": 1, "inbox": 0, "size": 2000 + 41}
+
+
+def test_json_range_changes(viewer_env: Path, write, monkeypatch, capsys):
+    agents = viewer_env
+    monkeypatch.setattr(viewer, "OUTPUT_FORMAT", "json")
+    for tick, text in ((1, '{"a": 1}'), (2, '{"a": 1}'), (3, '{"a": 2}')):
+        write(agents / "meta_a" / "outbox" / f"tik{tick}" / "plan.json", text)
+
+    viewer.compare_range(1, 3)
+    (change,) = json.loads(capsys.readouterr().out)
+    assert (change["status"], change["old_tick"], change["new_tick"]) == ("changed", 2, 3)
+    assert change["diff"] == ["~ $.a: 1 → 2"] and not change["diff_truncated"]
+
+    viewer.compare_range(1, 2)
+    assert json.loads(capsys.readouterr().out) == []
@@ -0,0 +1,172 @@
+"""Pytest covering windsurf_tick_runner agent fan-out."""
+from pathlib import Path
+import json
+import threading
+import time
+
+import pytest
+
+import windsurf_tick_runner as runner
+
+
+pytestmark = pytest.mark.usefixtures("runner_env")
+
+
+def _fake_agents(tmp_path: Path, names: list[str]) -> Path:
+    agents_dir = tmp_path / "agents"
+    for name in names:
+        (agents_dir / name).mkdir(parents=True)
+        (agents_dir / name / "system_prompt.md").write_text(f"# {name}\n")
+    return agents_dir
+
+
+def test_run_agents_concurrent_is_ordered(tmp_path: Path, monkeypatch, capsys):
+    names = ["agent_a", "agent_b", "agent_c", "agent_d"]
+    _fake_agents(tmp_path, names)
+    in_flight = []
+    lock = threading.Lock()
+
+    def fake_llm_call(model, messages, stream_to=None, prompt_tokens=0):
+        agent = next(m["content"] for m in messages if m["role"] == "system").strip("# \n")
+        with lock:
+            in_flight.append(agent)
+        # Later agents answer first so completion order != list order.
+        time.sleep(0.05 * (len(names) - names.index(agent)))
+        return f"reply from {agent}"
+
+    monkeypatch.setattr(runner, "llm_call", fake_llm_call)
+    start = time.monotonic()
+    runner.run_agents(9, names, "input", concurrency=4)
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.05 * sum(range(1, len(names) + 1))
+    out = capsys.readouterr().out
+    positions = [out.index(f"PROCESSING {name}") for name in names]
+    assert positions == sorted(positions)
+    for name in names:
+        agent_dir = runner.AGENTS_DIR / name
+        cycle = json.loads((agent_dir / "cycles" / "9.json").read_text())
+        assert cycle["thought_action_result"] == f"reply from {name}"
+        assert (agent_dir / "outbox" / "tik9" / "llm.txt").read_text() == f"reply from {name}"
+
+
+def test_run_agents_replays_from_cache(tmp_path: Path, monkeypatch):
+    names = ["agent_a", "agent_b"]
+    _fake_agents(tmp_path, names)
+    monkeypatch.setattr(runner, "RESUME", False)
+    calls = []
+
+    class EchoBackend(runner.windsurf_llm.LLMBackend):
+        def complete(self, model, messages, temperature):
+            calls.append(model)
+            return "echo " + messages[-1]["content"]
+
+    runner.windsurf_llm.register_backend("echo", EchoBackend)
+    monkeypatch.setattr(runner.windsurf_llm, "DEFAULT_BACKEND", "echo")
+    monkeypatch.setattr(runner, "CACHE_MODE", "use")
+    runner.run_agents(3, names, "same input")
+    assert len(calls) == 2
+    runner.run_agents(3, names, "same input")
+    assert len(calls) == 2
+    assert runner.RESPONSE_CACHE.stats["hits"] == 2
+
+    monkeypatch.setattr(runner, "CACHE_MODE", "only")
+    runner.run_agents(4, names, "new input")
+    assert len(calls) == 2
+    assert not (runner.AGENTS_DIR / "agent_a" / "cycles" / "4.json").exists()
+
+
+def test_stream_writes_partial_then_renames(tmp_path: Path, monkeypatch):
+    names = ["agent_a"]
+    _fake_agents(tmp_path, names)
+    monkeypatch.setattr(runner, "CACHE_MODE", "off")
+    monkeypatch.setattr(runner, "STREAM", True)
+    partial = runner.AGENTS_DIR / "agent_a" / "outbox" / "tik2" / "llm.txt.partial"
+    seen = []
+
+    class SlowStream(runner.windsurf_llm.LLMBackend):
+        def stream(self, model, messages, temperature):
+            for word in ("alpha ", "beta ", "gamma"):
+                yield word
+                seen.append(partial.read_text())
+
+    runner.windsurf_llm.register_backend("slow-stream", SlowStream)
+    monkeypatch.setattr(runner.windsurf_llm, "DEFAULT_BACKEND", "slow-stream")
+    runner.run_agents(2, names, "input")
+
+    assert seen == ["alpha ", "alpha beta ", "alpha beta gamma"]
+    assert not partial.exists()
+    assert (partial.parent / "llm.txt").read_text() == "alpha beta gamma"
+
+
+def test_failed_call_is_recorded_and_rerun(tmp_path: Path, monkeypatch):
+    names = ["agent_a", "agent_b"]
+    _fake_agents(tmp_path, names)
+    monkeypatch.setattr(runner, "CACHE_MODE", "off")
+    broken = {"agent_b"}
+
+    def fake_llm_call(model, messages, stream_to=None, prompt_tokens=0):
+        agent = next(m["content"] for m in messages if m["role"] == "system").strip("# \n")
+        if agent in broken:
+            raise runner.windsurf_governor.LLMCallError("HTTP 400", model, 1, "error")
+        return f"reply from {agent}"
+
+    monkeypatch.setattr(runner, "llm_call", fake_llm_call)
+    runner.run_agents(4, names, "input")
+
+    record = json.loads((runner.AGENTS_DIR / "agent_b" / "cycles" / "4.json").read_text())
+    assert record["status"] == "failed"
+    assert record["error"]["message"] == "HTTP 400"
+    assert not (runner.AGENTS_DIR / "agent_b" / "outbox" / "tik4" / "llm.txt").exists()
+    assert runner.failed_agents(4, names) == ["agent_b"]
+
+    broken.clear()
+    runner.run_agents(4, runner.failed_agents(4, names), "input")
+    assert runner.failed_agents(4, names) == []
+    assert (runner.AGENTS_DIR / "agent_b" / "outbox" / "tik4" / "llm.txt").read_text() == "reply from agent_b"
+
+
+def test_interrupted_tick_resumes_missing_agents(tmp_path: Path, monkeypatch):
+    names = ["agent_a", "agent_b", "agent_c"]
+    _fake_agents(tmp_path, names)
+    monkeypatch.setattr(runner, "CACHE_MODE", "off")
+    calls = []
+
+    class _CtrlCBackend(runner.windsurf_llm.LLMBackend):
+        def complete(self, model, messages, temperature):
+            agent = next(m["content"] for m in messages if m["role"] == "system").strip("# \n")
+            if agent == "agent_c" and not calls.count("resumed"):
+                raise KeyboardInterrupt  # Ctrl-C during the real llm_call
+            calls.append(agent)
+            return f"reply from {agent}"
+
+    runner.windsurf_llm.register_backend("ctrlc", _CtrlCBackend)
+    monkeypatch.setattr(runner.windsurf_llm, "DEFAULT_BACKEND", "ctrlc")
+    with pytest.raises(KeyboardInterrupt):
+        runner.run_agents(2, names, "input")
+    assert calls == ["agent_a", "agent_b"]
+    assert not (runner.AGENTS_DIR / "agent_c" / "cycles" / "2.json").exists()  # not a failure
+    journal = runner.windsurf_journal.TickJournal(runner.JOURNAL_DIR / "tik2.jsonl")
+    assert journal.entries["agent_c"]["status"] == "interrupted"
+
+    calls.append("resumed")
+    runner.run_agents(2, names, "input")
+    assert calls == ["agent_a", "agent_b", "resumed", "agent_c"]
+
+
+def test_tick_replay_ignores_journal_and_refuses_human_ticks(capsys):
+    assert runner.parse_args(["--tick", "7", "--cache-only"]).resume is False
+    assert runner.parse_args([]).resume is True
+    for tick in ("6", "8"):
+        with pytest.raises(SystemExit):
+            runner.parse_args(["--tick", tick])
+    assert "human input is never replayed" in capsys.readouterr().err
+
+
+def test_rerun_failed_refuses_human_ticks(capsys):
+    runner.save_state({"tick": 3})
+    with pytest.raises(SystemExit):
+        runner.parse_args(["--rerun-failed"])
+    assert "no failed agents to re-run" in capsys.readouterr().err
+    runner.save_state({"tick": 4})
+    assert runner.parse_args(["--rerun-failed"]).rerun_failed
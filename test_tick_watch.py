@@ -0,0 +1,37 @@
+"""Pytest covering the change feed behind `windsurf_tick_viewer.py watch`."""
+from pathlib import Path
+
+from windsurf_index import TickIndex
+from windsurf_watch import PollingSource, parse_tick_path
+
+
+def test_parse_tick_path(tmp_path: Path):
+    agents = tmp_path / "agents"
+    assert parse_tick_path(agents, agents / "meta_a" / "cycles" / "7.json").key == "cycle"
+    parsed = parse_tick_path(agents, agents / "agent_b" / "outbox" / "tik7" / "llm.txt.partial")
+    assert (parsed.agent, parsed.tick, parsed.key) == ("agent_b", 7, "outbox/llm.txt.partial")
+    assert parse_tick_path(agents, agents / "agent_b" / "outbox" / "tik7" / ".llm.txt.tmp") is None
+    assert parse_tick_path(agents, agents / "agent_b" / "system_prompt.md") is None
+    assert parse_tick_path(agents, tmp_path / "elsewhere.txt") is None
+
+
+def test_polling_reports_new_files_and_partial_growth(tmp_path: Path):
+    agents = tmp_path / "agents"
+    out = agents / "agent_b" / "outbox" / "tik3"
+    out.mkdir(parents=True)
+    (out / "old.txt").write_text("already there")
+    source = PollingSource(TickIndex(agents), interval=0)
+    source.changes([3])  # files from before the watch started are not reported
+    assert source.changes([3]) == []
+
+    partial = out / "llm.txt.partial"
+    partial.write_text("hel")
+    assert source.changes([3]) == [partial]
+    with open(partial, "a") as f:  # grows without touching the directory
+        f.write("lo")
+    assert source.changes([3]) == [partial]
+    assert source.changes([3]) == []
+
+    partial.replace(out / "llm.txt")
+    assert source.changes([3]) == [out / "llm.txt"]
+    assert source.changes([4]) == []
@@ -0,0 +1,31 @@
+"""Pytest covering the windsurf_tokens budget engine."""
+from windsurf_tokens import Chunk, count_tokens, fit_chunks, render_chunks
+
+
+def test_fit_chunks_trims_lowest_priority_first():
+    human = Chunk("human/kickoff.txt", "keep this prompt " * 20, priority=2)
+    meta = Chunk("meta_planner/llm.txt", "plan " * 400, priority=1)
+    actor = Chunk("agent_media/llm.txt", "press release " * 400, priority=0)
+    chunks = [human, meta, actor]
+    total = sum(count_tokens(c.render()) for c in chunks)
+
+    fitted, removed = fit_chunks(chunks, total - 300)
+    assert fitted[0] == human
+    assert fitted[1] == meta
+    assert "truncated" in fitted[2].text
+    assert removed >= 300
+    assert count_tokens(render_chunks(fitted)) <= total - 300 + len(chunks)
+
+
+def test_fit_chunks_omits_chunk_that_cannot_survive():
+    chunks = [Chunk("human/kickoff.txt", "x " * 200, priority=2),
+              Chunk("agent_un/llm.txt", "y " * 200, priority=0)]
+    budget = count_tokens(chunks[0].render()) + 20
+    fitted, _ = fit_chunks(chunks, budget)
+    assert fitted[0] == chunks[0]
+    assert fitted[1].text.startswith("[omitted")
+
+
+def test_fit_chunks_within_budget_is_untouched():
+    chunks = [Chunk("a/llm.txt", "short")]
+    assert fit_chunks(chunks, 1000) == (chunks, 0)
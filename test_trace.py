@@ -0,0 +1,57 @@
+"""Pytest covering windsurf_trace and the runner's spans."""
+from pathlib import Path
+import json
+
+import pytest
+
+import windsurf_llm
+import windsurf_trace
+import windsurf_tick_runner as runner
+
+
+class _EchoBackend(windsurf_llm.LLMBackend):
+    name = "echo"
+
+    def complete(self, model, messages, temperature):
+        return "echo"
+
+
+@pytest.fixture
+def tracing():
+    windsurf_trace.enable()
+    yield windsurf_trace.TRACER
+    windsurf_trace.disable()
+
+
+def test_disabled_tracing_records_nothing():
+    assert not windsurf_trace.TRACER.enabled
+    with windsurf_trace.span("ignored", a=1):
+        windsurf_trace.annotate(b=2)
+    fn = lambda: 42  # noqa: E731
+    assert windsurf_trace.bind(fn) is fn
+    assert windsurf_trace.traced("x")(fn)() == 42
+    assert windsurf_trace.TRACER.events == []
+
+
+def test_runner_spans_nest_across_worker_threads(tmp_path: Path, runner_env: Path, write, monkeypatch, tracing):
+    for name in ("agent_a", "agent_b"):
+        write(runner_env / name / "system_prompt.md", f"# {name}\n")
+    monkeypatch.setattr(runner.windsurf_llm, "DEFAULT_BACKEND", "echo")
+    windsurf_llm.register_backend("echo", _EchoBackend)
+
+    with windsurf_trace.span("tick", tick=4):
+        runner.run_agents(4, ["agent_a", "agent_b"], "input", concurrency=2)
+    assert windsurf_trace.export(tmp_path / "trace.json") == len([e for e in tracing.events if e["ph"] == "X"])
+
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    spans = [e for e in events if e["ph"] == "X"]
+    by_id = {e["args"]["span_id"]: e for e in spans}
+    parent = lambda e: by_id.get(e["args"]["parent_id"], {}).get("name")  # noqa: E731
+    assert {e["name"] for e in spans} >= {"tick", "prepare_agents", "run_agents", "agent", "llm_call", "persist"}
+    agents = [e for e in spans if e["name"] == "agent"]
+    assert sorted(e["args"]["agent"] for e in agents) == ["agent_a", "agent_b"]
+    assert all(parent(e) == "run_agents" for e in agents)  # parentage survives the thread pool
+    assert any(e["tid"] != by_id[e["args"]["parent_id"]]["tid"] for e in agents)
+    assert all(parent(e) == "agent" and e["args"]["model"] for e in spans if e["name"] == "llm_call")
+    assert parent(next(e for e in spans if e["name"] == "run_agents")) == "tick"
+    assert any(e["ph"] == "M" and e["args"]["name"].startswith("windsurf-agent") for e in events)
@@ -8,10 +8,17 @@ $ python -m windsurf.next_tick -m "initial prompt"  # advance + store human mess
 
 Effect:
 • Increments `global_state.json["tick"]` atomically.
-• Creates `/agents/human/outbox/tikN/` directory.
+• Creates `agents/human/outbox/tikN/` in the tick runner's agents directory
+  (the repository's agents/, next to windsurf/).
 • If `-m/--message` is given, saves it to `input.txt` inside that folder.
 • Ensures each agent has a stub `cycles/N.json` file.
 
+With WINDSURF_STORAGE=db (or a database URL) the stub cycles and the human
+message are written to the database in one transaction instead
+(see windsurf/tools/storage.py). Both modes use the tick runner's agents
+directory, so relative database paths resolve like the runner's and the
+two share one tree or database.
+
 The script is idempotent per run (does nothing if already at target).
 """
 from __future__ import annotations
@@ -23,6 +30,8 @@ import sys
 from pathlib import Path
 from typing import List
 
+from windsurf.tools.atomic_io import atomic_write_text
+
 AGENT_ACTOR_NAMES: List[str] = [
     "agent_congress",
     "agent_doj_eoir",
@@ -51,6 +60,9 @@ AGENT_META_NAMES: List[str] = [
 ]
 
 ROOT = Path(__file__).resolve().parent
+REPO_ROOT = ROOT.parent  # the tick runner's root
+AGENTS_DIR = REPO_ROOT / "agents"  # = windsurf_tick_runner.AGENTS_DIR
+STUB_CYCLE = {"thought": "", "action": "", "result": ""}
 
 
 def _load_state() -> dict:
@@ -62,26 +74,43 @@ def _load_state() -> dict:
 
 def _save_state(state: dict) -> None:
     gpath = ROOT / "global_state.json"
-    gpath.write_text(json.dumps(state, indent=2))
+    atomic_write_text(gpath, json.dumps(state, indent=2))
 
 
 def _touch_cycles(tick: int) -> None:
-    agents_dir = ROOT / "agents"
     for name in AGENT_ACTOR_NAMES + AGENT_META_NAMES + ["human"]:
-        cycles_path = agents_dir / name / "cycles"
+        cycles_path = AGENTS_DIR / name / "cycles"
         cycles_path.mkdir(parents=True, exist_ok=True)
         stub = cycles_path / f"{tick}.json"
         if not stub.exists():
-            stub.write_text(json.dumps({"thought": "", "action": "", "result": ""}, indent=2))
+            stub.write_text(json.dumps(STUB_CYCLE, indent=2))
 
 
 def _human_outbox(tick: int, message: str | None) -> None:
-    out_dir = ROOT / "agents" / "human" / "outbox" / f"tik{tick}"
+    out_dir = AGENTS_DIR / "human" / "outbox" / f"tik{tick}"
     out_dir.mkdir(parents=True, exist_ok=True)
     if message is not None:
         msg_file = out_dir / "input.txt"
         msg_file.write_text(message)
-        print(f"[next_tick] Stored human message in {msg_file.relative_to(ROOT)}")
+        print(f"[next_tick] Stored human message in {msg_file.relative_to(REPO_ROOT)}")
+
+
+def _store_in_db(tick: int, message: str | None) -> None:
+    # Imported here so the default file mode needs no database driver.
+    from windsurf.tools.storage import open_storage
+
+    storage = open_storage(AGENTS_DIR)
+    try:
+        names = AGENT_ACTOR_NAMES + AGENT_META_NAMES + ["human"]
+        missing = [name for name in names if storage.read_cycle(name, tick) is None]
+        with storage.transaction():
+            for name in missing:
+                storage.write_cycle(name, tick, STUB_CYCLE)
+            if message is not None:
+                storage.write_message("human", tick, "outbox", "input.txt", message)
+                print("[next_tick] Stored human message in the database")
+    finally:
+        storage.close()
 
 
 def advance_tick(human_message: str | None = None) -> int:
@@ -92,8 +121,11 @@ def advance_tick(human_message: str | None = None) -> int:
     state["tick"] = nxt
     _save_state(state)
 
-    _touch_cycles(nxt)
-    _human_outbox(nxt, human_message)
+    if os.getenv("WINDSURF_STORAGE", "fs") != "fs":
+        _store_in_db(nxt, human_message)
+    else:
+        _touch_cycles(nxt)
+        _human_outbox(nxt, human_message)
 
     print(f"[next_tick] Advanced tick {current} → {nxt}")
     return nxt
@@ -0,0 +1,341 @@
+"""Tick storage - where agent cycles and inbox/outbox messages are persisted.
+
+Two backends share one interface:
+
+  FileStorage      the agents/<id>/{cycles,outbox,inbox} directory layout
+                   (default; every write is atomic)
+  DatabaseStorage  ticks, cycles and messages tables in SQLite or PostgreSQL
+                   (psycopg); writes are queued and committed in batches,
+                   one transaction per batch
+
+`open_storage` picks the backend from WINDSURF_STORAGE:
+
+  fs (default)   FileStorage
+  db             DatabaseStorage on DATABASE_URL
+                 (default sqlite:///windsurf/storage.sqlite3)
+  <url>          DatabaseStorage on that URL (sqlite:///… or postgresql://…)
+
+Relative SQLite paths are resolved against the parent of the agents
+directory. `export` regenerates the directory layout from a database:
+
+  $ python -m windsurf.tools.storage export --url sqlite:///windsurf/storage.sqlite3
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+from windsurf.tools.atomic_io import atomic_write_text
+
+DEFAULT_DATABASE_URL = "sqlite:///windsurf/storage.sqlite3"
+BATCH_SIZE = 64  # queued writes that trigger a commit
+
+
+@dataclass
+class Message:
+    agent: str
+    tick: int
+    box: str
+    name: str
+    text: str
+
+
+class TickStorage:
+    """Interface of the storage backends."""
+
+    def write_cycle(self, agent: str, tick: int, record: dict) -> None:
+        raise NotImplementedError
+
+    def read_cycle(self, agent: str, tick: int) -> dict | None:
+        raise NotImplementedError
+
+    def write_message(self, agent: str, tick: int, box: str, name: str, text: str) -> None:
+        raise NotImplementedError
+
+    def delete_message(self, agent: str, tick: int, box: str, name: str) -> None:
+        raise NotImplementedError
+
+    def has_message(self, agent: str, tick: int, box: str, name: str) -> bool:
+        raise NotImplementedError
+
+    def messages(self, tick: int, box: str = "outbox") -> list[Message]:
+        """Messages of *tick* in *box*, ordered by agent and name."""
+        raise NotImplementedError
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Group the writes inside the block (a no-op for files)."""
+        yield
+
+    def close(self) -> None:
+        pass
+
+
+class FileStorage(TickStorage):
+    def __init__(self, agents_dir: Path):
+        self.agents_dir = Path(agents_dir)
+
+    def _cycle_path(self, agent: str, tick: int) -> Path:
+        return self.agents_dir / agent / "cycles" / f"{tick}.json"
+
+    def _message_path(self, agent: str, tick: int, box: str, name: str) -> Path:
+        return self.agents_dir / agent / box / f"tik{tick}" / name
+
+    def write_cycle(self, agent: str, tick: int, record: dict) -> None:
+        path = self._cycle_path(agent, tick)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(path, json.dumps(record, indent=2))
+
+    def read_cycle(self, agent: str, tick: int) -> dict | None:
+        try:
+            return json.loads(self._cycle_path(agent, tick).read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def write_message(self, agent: str, tick: int, box: str, name: str, text: str) -> None:
+        path = self._message_path(agent, tick, box, name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Finalise through <name>.partial (also the streaming target) so the
+        # message never appears half-written.
+        partial = path.with_name(path.name + ".partial")
+        partial.write_text(text, encoding="utf-8")
+        os.replace(partial, path)
+
+    def delete_message(self, agent: str, tick: int, box: str, name: str) -> None:
+        self._message_path(agent, tick, box, name).unlink(missing_ok=True)
+
+    def has_message(self, agent: str, tick: int, box: str, name: str) -> bool:
+        return self._message_path(agent, tick, box, name).exists()
+
+    def messages(self, tick: int, box: str = "outbox") -> list[Message]:
+        found = []
+        for agent_dir in sorted(p for p in self.agents_dir.iterdir() if p.is_dir()):
+            for f in sorted((agent_dir / box / f"tik{tick}").glob("*")):
+                if f.is_file() and not f.name.endswith(".partial"):
+                    found.append(Message(agent_dir.name, tick, box, f.name,
+                                         f.read_text(encoding="utf-8", errors="replace")))
+        return found
+
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS ticks (tick INTEGER PRIMARY KEY, created TEXT NOT NULL)",
+    """CREATE TABLE IF NOT EXISTS cycles (
+        agent TEXT NOT NULL, tick INTEGER NOT NULL, record TEXT NOT NULL, updated TEXT NOT NULL,
+        PRIMARY KEY (agent, tick))""",
+    """CREATE TABLE IF NOT EXISTS messages (
+        tick INTEGER NOT NULL, box TEXT NOT NULL, agent TEXT NOT NULL, name TEXT NOT NULL,
+        content TEXT NOT NULL, updated TEXT NOT NULL,
+        PRIMARY KEY (tick, box, agent, name))""",
+]
+_UPSERT_TICK = "INSERT INTO ticks (tick, created) VALUES (?, ?) ON CONFLICT (tick) DO NOTHING"
+_UPSERT_CYCLE = ("INSERT INTO cycles (agent, tick, record, updated) VALUES (?, ?, ?, ?) "
+                 "ON CONFLICT (agent, tick) DO UPDATE SET record = excluded.record, "
+                 "updated = excluded.updated")
+_UPSERT_MESSAGE = ("INSERT INTO messages (tick, box, agent, name, content, updated) "
+                   "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (tick, box, agent, name) "
+                   "DO UPDATE SET content = excluded.content, updated = excluded.updated")
+_DELETE_MESSAGE = "DELETE FROM messages WHERE tick = ? AND box = ? AND agent = ? AND name = ?"
+
+
+class DatabaseStorage(TickStorage):
+    """Ticks, cycles and messages in SQLite or PostgreSQL.
+
+    Writes are queued and flushed in one transaction when BATCH_SIZE is
+    reached, when a `transaction()` block ends, before every read and on
+    close, so a stage of 10-12 agents costs a single commit. A read inside
+    a `transaction()` block sends the queued writes without committing
+    them, so it sees them while the block still commits once.
+    """
+
+    def __init__(self, url: str, base_dir: Path | None = None, batch_size: int = BATCH_SIZE):
+        self.url = url
+        self.batch_size = batch_size
+        self._pending: list[tuple[str, tuple]] = []
+        self._ticks: set[int] = set()  # ticks already queued for the ticks table
+        self._depth = 0
+        self._uncommitted = False  # writes sent to the connection but not committed
+        self._lock = threading.RLock()
+        if url.startswith("sqlite:///"):
+            path = Path(url[len("sqlite:///"):])
+            if not path.is_absolute():
+                path = Path(base_dir or ".") / path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._param = "?"
+        elif url.startswith(("postgresql://", "postgres://")):
+            import psycopg
+
+            self._conn = psycopg.connect(url)
+            self._param = "%s"
+        else:
+            raise ValueError(f"Unsupported database URL '{url}' (use sqlite:/// or postgresql://)")
+        with self._lock:
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+            self._conn.commit()
+
+    def _sql(self, sql: str) -> str:
+        return sql if self._param == "?" else sql.replace("?", self._param)
+
+    def _queue_tick(self, tick: int) -> None:
+        if tick not in self._ticks:
+            self._ticks.add(tick)
+            self._queue(_UPSERT_TICK, (tick, datetime.now().isoformat()))
+
+    def _queue(self, sql: str, params: tuple) -> None:
+        with self._lock:
+            self._pending.append((sql, params))
+            if self._depth == 0 and len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def _send(self) -> None:
+        """Execute the queued writes in the open transaction, without committing."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        try:
+            cursor = self._conn.cursor()
+            # consecutive writes of the same kind go out as one executemany
+            for sql, group in itertools.groupby(pending, key=lambda item: item[0]):
+                cursor.executemany(self._sql(sql), [params for _, params in group])
+        except BaseException:
+            self._rollback()
+            raise
+        self._uncommitted = True
+
+    def _rollback(self) -> None:
+        self._conn.rollback()
+        self._ticks.clear()
+        self._uncommitted = False
+
+    def flush(self) -> None:
+        """Commit all queued writes in one transaction."""
+        with self._lock:
+            self._send()
+            if not self._uncommitted:
+                return
+            try:
+                self._conn.commit()
+            except BaseException:
+                self._rollback()
+                raise
+            self._uncommitted = False
+
+    def _query(self, sql: str, params: tuple) -> list[tuple]:
+        with self._lock:
+            if self._depth:
+                self._send()  # committed when the transaction() block ends
+            else:
+                self.flush()
+            cursor = self._conn.cursor()
+            cursor.execute(self._sql(sql), params)
+            return cursor.fetchall()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        with self._lock:
+            self._depth += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.flush()
+
+    def write_cycle(self, agent: str, tick: int, record: dict) -> None:
+        now = datetime.now().isoformat()
+        self._queue_tick(tick)
+        self._queue(_UPSERT_CYCLE, (agent, tick, json.dumps(record), now))
+
+    def read_cycle(self, agent: str, tick: int) -> dict | None:
+        rows = self._query("SELECT record FROM cycles WHERE agent = ? AND tick = ?", (agent, tick))
+        return json.loads(rows[0][0]) if rows else None
+
+    def write_message(self, agent: str, tick: int, box: str, name: str, text: str) -> None:
+        now = datetime.now().isoformat()
+        self._queue_tick(tick)
+        self._queue(_UPSERT_MESSAGE, (tick, box, agent, name, text, now))
+
+    def delete_message(self, agent: str, tick: int, box: str, name: str) -> None:
+        self._queue(_DELETE_MESSAGE, (tick, box, agent, name))
+
+    def has_message(self, agent: str, tick: int, box: str, name: str) -> bool:
+        return bool(self._query(
+            "SELECT 1 FROM messages WHERE tick = ? AND box = ? AND agent = ? AND name = ?",
+            (tick, box, agent, name)))
+
+    def messages(self, tick: int, box: str = "outbox") -> list[Message]:
+        rows = self._query(
+            "SELECT agent, name, content FROM messages WHERE tick = ? AND box = ? "
+            "ORDER BY agent, name", (tick, box))
+        return [Message(agent, tick, box, name, content) for agent, name, content in rows]
+
+    def export(self, agents_dir: Path, ticks: list[int] | None = None) -> int:
+        """Write the stored cycles and messages as agents/<id>/… files; return the count."""
+        target = FileStorage(agents_dir)
+        where, params = "", ()
+        if ticks:
+            where = f" WHERE tick IN ({', '.join('?' * len(ticks))})"
+            params = tuple(ticks)
+        count = 0
+        for agent, tick, record in self._query(f"SELECT agent, tick, record FROM cycles{where}", params):
+            target.write_cycle(agent, tick, json.loads(record))
+            count += 1
+        for tick, box, agent, name, content in self._query(
+                f"SELECT tick, box, agent, name, content FROM messages{where}", params):
+            target.write_message(agent, tick, box, name, content)
+            count += 1
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+
+def storage_url(mode: str | None = None) -> str:
+    """Resolve a WINDSURF_STORAGE value ("fs", "db" or a URL) to "fs" or a database URL."""
+    mode = mode or os.getenv("WINDSURF_STORAGE", "fs")
+    if mode == "db":
+        return os.getenv("DATABASE_URL") or DEFAULT_DATABASE_URL
+    return mode
+
+
+def open_storage(agents_dir: Path, mode: str | None = None) -> TickStorage:
+    """Return the storage backend selected by *mode* (default: WINDSURF_STORAGE)."""
+    url = storage_url(mode)
+    if url == "fs":
+        return FileStorage(agents_dir)
+    return DatabaseStorage(url, base_dir=Path(agents_dir).parent)
+
+
+def _cli(argv: list[str] | None = None) -> None:  # pragma: no cover
+    parser = argparse.ArgumentParser(description="Windsurf tick storage utilities")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="regenerate the agents/ layout from a database")
+    export.add_argument("--url", default=storage_url("db"),
+                        help="database URL (default: DATABASE_URL or %(default)s)")
+    export.add_argument("--to", type=Path, default=Path("agents"), help="target agents directory")
+    export.add_argument("--tick", type=int, action="append", help="only these ticks (repeatable)")
+    args = parser.parse_args(argv)
+
+    db = DatabaseStorage(args.url, base_dir=args.to.resolve().parent)
+    try:
+        count = db.export(args.to, args.tick)
+    finally:
+        db.close()
+    print(f"[storage] Exported {count} file(s) to {args.to}")
+
+
+if __name__ == "__main__":
+    _cli()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Project Windsurf – batch submission of whole-stage agent runs
+=============================================================
+Packages every agent request of a stage into one bulk job file in the
+OpenAI Batch API format, submits it through a `BatchBackend`, polls until the
+job finishes and returns the replies keyed by agent id.
+
+  <job_dir>/requests.jsonl  – one {"custom_id", "method", "url", "body"} line per agent
+  <job_dir>/job.json        – {backend, job_id, requests_sha256, status, submitted}
+  <job_dir>/results.jsonl   – raw provider output, kept for auditing
+
+`job.json` makes a run resumable: re-running the stage while the job is
+still pending resumes polling instead of submitting (and paying) again. A
+job that ends failed, expired or cancelled yields a BatchError per request,
+and the next run submits a new job.
+
+Backends (created with the runner's batch directory):
+  • openai – the provider Batch API (cheaper, completes within 24 h)
+  • local  – file-based stand-in that answers each request through a
+             regular chat backend from windsurf_llm (tests, offline runs);
+             its jobs live in <batch dir>/local/
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import windsurf_llm
+
+ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+POLL_INTERVAL = float(os.getenv("WINDSURF_BATCH_POLL_SEC", "30"))
+DEFAULT_BATCH_BACKEND = os.getenv("WINDSURF_BATCH_BACKEND", "openai")
+FINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+DEFAULT_BATCH_DIR = Path(__file__).resolve().parent / "windsurf" / "batches"
+
+
+class BatchError(RuntimeError):
+    """A batch job ended without results."""
+
+
+class BatchBackend:
+    """Interface for bulk job services."""
+
+    name = "base"
+
+    def submit(self, requests_path: Path) -> str:
+        """Upload *requests_path* and start a job; return its id."""
+        raise NotImplementedError
+
+    def status(self, job_id: str) -> str:
+        """Return the job status (one of FINAL_STATES once finished)."""
+        raise NotImplementedError
+
+    def results(self, job_id: str) -> list[dict]:
+        """Return the output lines of a completed job."""
+        raise NotImplementedError
+
+
+class OpenAIBatchBackend(BatchBackend):
+    name = "openai"
+
+    def __init__(self, batch_dir: Path | None = None):
+        # Jobs live with the provider (*batch_dir* is unused); reuse the
+        # pooled client of the chat backend.
+        self.client = windsurf_llm.get_backend("openai").client
+
+    def submit(self, requests_path: Path) -> str:
+        with open(requests_path, "rb") as f:
+            upload = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=upload.id,
+            endpoint=ENDPOINT,
+            completion_window=COMPLETION_WINDOW,
+        )
+        return batch.id
+
+    def status(self, job_id: str) -> str:
+        return self.client.batches.retrieve(job_id).status
+
+    def results(self, job_id: str) -> list[dict]:
+        batch = self.client.batches.retrieve(job_id)
+        lines = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                text = self.client.files.content(file_id).text
+                lines.extend(json.loads(line) for line in text.splitlines() if line.strip())
+        return lines
+
+
+class LocalBatchBackend(BatchBackend):
+    """File-based stand-in for a provider batch service.
+
+    Jobs live in `<batch_dir>/local/<job_id>/`; the job is worked off
+    (through the chat backend *chat_backend*) the first time its status is
+    polled.
+    """
+
+    name = "local"
+
+    def __init__(self, batch_dir: Path | None = None, chat_backend: str | None = None):
+        self.root = Path(batch_dir or DEFAULT_BATCH_DIR) / "local"
+        self.chat_backend = chat_backend
+
+    def submit(self, requests_path: Path) -> str:
+        job_id = f"local-{uuid.uuid4().hex[:12]}"
+        job = self.root / job_id
+        job.mkdir(parents=True)
+        (job / "input.jsonl").write_bytes(Path(requests_path).read_bytes())
+        (job / "status").write_text("in_progress")
+        return job_id
+
+    def status(self, job_id: str) -> str:
+        job = self.root / job_id
+        state = (job / "status").read_text().strip()
+        if state == "in_progress":
+            self._process(job)
+            state = "completed"
+            (job / "status").write_text(state)
+        return state
+
+    def _process(self, job: Path) -> None:
+        backend = windsurf_llm.get_backend(self.chat_backend)
+        out = []
+        for line in (job / "input.jsonl").read_text().splitlines():
+            if not line.strip():
+                continue
+            req = json.loads(line)
+            body = req["body"]
+            entry = {"id": f"req-{uuid.uuid4().hex[:8]}", "custom_id": req["custom_id"],
+                     "response": None, "error": None}
+            try:
+                content = backend.complete(body["model"], body["messages"], body["temperature"])
+                entry["response"] = {"status_code": 200, "body": {
+                    "model": body["model"],
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                 "finish_reason": "stop"}],
+                }}
+            except Exception as e:
+                entry["error"] = {"code": type(e).__name__, "message": str(e)}
+            out.append(json.dumps(entry))
+        (job / "output.jsonl").write_text("\n".join(out) + "\n")
+
+    def results(self, job_id: str) -> list[dict]:
+        text = (self.root / job_id / "output.jsonl").read_text()
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+# factory(batch_dir) -> backend
+BATCH_BACKENDS: dict[str, Callable[[Path], BatchBackend]] = {
+    "openai": OpenAIBatchBackend,
+    "local": LocalBatchBackend,
+}
+
+
+def request_line(custom_id: str, model: str, messages: list[dict], temperature: float) -> dict:
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": ENDPOINT,
+        "body": {"model": model, "messages": messages, "temperature": temperature},
+    }
+
+
+def parse_result(line: dict) -> str | Exception:
+    """Return the reply text of one output line, or the error it carries."""
+    response = line.get("response") or {}
+    if line.get("error") or response.get("status_code") != 200:
+        err = line.get("error") or response.get("body", {}).get("error") or response
+        return BatchError(f"{line.get('custom_id')}: {err}")
+    content = response["body"]["choices"][0]["message"]["content"] or ""
+    return content.strip()
+
+
+def run_batch(job_dir: Path, requests: list[dict], backend: BatchBackend,
+              poll_interval: float = POLL_INTERVAL,
+              log: Callable[[str], None] = print) -> dict[str, str | Exception]:
+    """Submit *requests* as one job (or resume it) and wait for the replies.
+
+    Every request gets its reply or the Exception it failed with; a job that
+    ends without results fails all of them.
+    """
+    job_dir.mkdir(parents=True, exist_ok=True)
+    payload = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in requests)
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    job_file = job_dir / "job.json"
+    requests_path = job_dir / "requests.jsonl"
+
+    job = json.loads(job_file.read_text()) if job_file.exists() else {}
+    if (job.get("requests_sha256") == digest and job.get("backend") == backend.name
+            and job.get("status") not in ("failed", "expired", "cancelled")):
+        log(f"[BATCH] Resuming job {job['job_id']} ({job['status']})")
+    else:
+        requests_path.write_text(payload, encoding="utf-8")
+        job = {
+            "backend": backend.name,
+            "job_id": backend.submit(requests_path),
+            "requests_sha256": digest,
+            "status": "submitted",
+            "submitted": datetime.now().isoformat(),
+        }
+        job_file.write_text(json.dumps(job, indent=2))
+        log(f"[BATCH] Submitted {len(requests)} requests as job {job['job_id']} via '{backend.name}'")
+
+    started = time.monotonic()
+    while True:
+        status = backend.status(job["job_id"])
+        if status != job["status"]:
+            job["status"] = status
+            job_file.write_text(json.dumps(job, indent=2))
+        if status in FINAL_STATES:
+            break
+        log(f"[BATCH] Job {job['job_id']}: {status} ({time.monotonic() - started:.0f}s), "
+            f"next poll in {poll_interval:.0f}s")
+        time.sleep(poll_interval)
+
+    if status != "completed":
+        log(f"[BATCH] Job {job['job_id']} ended with status '{status}'")
+        return {r["custom_id"]: BatchError(f"batch job {job['job_id']} ended with status '{status}'")
+                for r in requests}
+    lines = backend.results(job["job_id"])
+    (job_dir / "results.jsonl").write_text(
+        "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines), encoding="utf-8"
+    )
+    results = {line["custom_id"]: parse_result(line) for line in lines}
+    for r in requests:
+        results.setdefault(r["custom_id"], BatchError(f"{r['custom_id']}: missing from batch output"))
+    return results
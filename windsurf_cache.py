@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Project Windsurf – LLM response cache
+=====================================
+Content-addressed, on-disk cache of chat completions. The key is the SHA-256
+of the canonical JSON of (model, messages, temperature), so re-running a
+stage whose system prompts, memory and gathered input are byte-identical
+replays the stored replies instead of re-billing every agent.
+
+Layout:  <root>/<key[:2]>/<key>.json  = {key, model, created, content}
+
+Entries older than `max_age` are dropped; when the cache exceeds
+`max_entries` or `max_bytes` the least recently used entries (by mtime,
+refreshed on every hit) are evicted first.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+MAX_ENTRIES = int(os.getenv("WINDSURF_CACHE_MAX_ENTRIES", "5000"))
+MAX_BYTES = int(os.getenv("WINDSURF_CACHE_MAX_MB", "256")) * 1024 * 1024
+MAX_AGE_SEC = float(os.getenv("WINDSURF_CACHE_MAX_AGE_DAYS", "30")) * 86400
+
+
+class CacheMiss(LookupError):
+    """Raised in cache-only mode when a request has no stored reply."""
+
+
+class ResponseCache:
+    """Thread-safe persistent cache of LLM replies."""
+
+    def __init__(self, root: Path, max_entries: int = MAX_ENTRIES,
+                 max_bytes: int = MAX_BYTES, max_age: float = MAX_AGE_SEC):
+        self.root = Path(root)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    # ------------------------------------------------------------------
+    @staticmethod
+    def key(model: str, messages: list[dict], temperature: float) -> str:
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature},
+            sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def _count(self, stat: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[stat] += n
+
+    def reset_stats(self) -> None:
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    # ------------------------------------------------------------------
+    def get(self, key: str) -> str | None:
+        path = self._path(key)
+        try:
+            age = time.time() - path.stat().st_mtime
+            if age > self.max_age:
+                path.unlink(missing_ok=True)
+                raise FileNotFoundError(path)
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)  # LRU: a hit refreshes the entry
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._count("misses")
+            return None
+        self._count("hits")
+        return entry["content"]
+
+    def put(self, key: str, model: str, content: str) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"key": key, "model": model, "created": time.time(), "content": content}
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self._count("writes")
+
+    def evict(self) -> int:
+        """Apply age, entry-count and size limits; return entries removed."""
+        if not self.root.exists():
+            return 0
+        now = time.time()
+        entries = []
+        removed = 0
+        for path in self.root.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - st.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()  # oldest first
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, path = entries.pop(0)
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        self._count("evictions", removed)
+        return removed
+
+    def summary(self) -> str:
+        s = self.stats
+        lookups = s["hits"] + s["misses"]
+        rate = f"{100 * s['hits'] / lookups:.0f}%" if lookups else "n/a"
+        return (f"hits={s['hits']} misses={s['misses']} hit-rate={rate} "
+                f"writes={s['writes']} evicted={s['evictions']}")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Project Windsurf – intra-stage dependency scheduling
+====================================================
+A stage may declare that some agents need the replies of others from the
+same tick (STAGE_DEPENDENCIES in the tick runner), e.g.
+
+  meta_supervisor ← meta_planner, meta_topology
+
+`run_dag` starts every agent whose dependencies have finished, up to
+*workers* at a time, and each dependent as soon as its last dependency
+lands; independent agents never wait for each other. Ready agents are
+started in list order, so with one worker the run is a deterministic
+topological order of the list.
+
+`critical_path` walks back from the agent that finished last through the
+dependency that finished last, i.e. the chain that bounded the stage's wall
+time, which is what to shorten (cheaper tier, smaller prompt) first.
+"""
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import windsurf_trace
+
+
+class CycleError(ValueError):
+    """The declared dependencies contain a cycle."""
+
+
+@dataclass
+class NodeTiming:
+    ready: float  # seconds after the stage started
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def restrict(order: list[str], deps: dict[str, list[str]]) -> dict[str, list[str]]:
+    """*deps* limited to the agents in *order* (others count as already done)."""
+    return {n: [d for d in deps.get(n, ()) if d in order and d != n] for n in order}
+
+
+def levels(order: list[str], deps: dict[str, list[str]]) -> list[list[str]]:
+    """Agents grouped into waves that only depend on earlier waves (raises CycleError)."""
+    deps = restrict(order, deps)
+    placed: set[str] = set()
+    waves = []
+    while len(placed) < len(order):
+        wave = [n for n in order if n not in placed and all(d in placed for d in deps[n])]
+        if not wave:
+            cycle = [n for n in order if n not in placed]
+            raise CycleError(f"dependency cycle among: {', '.join(cycle)}")
+        waves.append(wave)
+        placed.update(wave)
+    return waves
+
+
+def run_dag(order: list[str], deps: dict[str, list[str]],
+            start: Callable[[str], Callable[[], Any] | None],
+            finish: Callable[[str, Any], None], workers: int = 1) -> dict[str, NodeTiming]:
+    """Run the agents of *order* respecting *deps*; return their timings.
+
+    ``start(agent)`` runs in the calling thread once the agent's dependencies
+    have finished and returns the work to do (run in a worker thread), or
+    None when there is nothing to run. ``finish(agent, result)`` runs in the
+    calling thread as each work item completes.
+    """
+    deps = restrict(order, deps)
+    levels(order, deps)  # reject cycles before anything runs
+    waiting = {n: set(deps[n]) for n in order}
+    timings: dict[str, NodeTiming] = {}
+    t0 = time.monotonic()
+    ready = [n for n in order if not waiting[n]]
+    ready_at = {n: 0.0 for n in ready}
+    running: dict[Future, str] = {}
+
+    def release(node: str) -> None:
+        now = time.monotonic() - t0
+        for n in order:
+            if node in waiting[n]:
+                waiting[n].discard(node)
+                if not waiting[n]:
+                    ready.append(n)
+                    ready_at[n] = now
+        ready.sort(key=order.index)
+
+    def timed(work: Callable[[], Any]) -> tuple[float, float, Any]:
+        began = time.monotonic() - t0
+        result = work()
+        return began, time.monotonic() - t0, result
+
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="windsurf-agent")
+    try:
+        while ready or running:
+            while ready and len(running) < max(1, workers):
+                node = ready.pop(0)
+                work = start(node)
+                if work is None:
+                    now = time.monotonic() - t0
+                    timings[node] = NodeTiming(ready_at[node], now, now)
+                    release(node)
+                    continue
+                running[pool.submit(windsurf_trace.bind(timed), work)] = node
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in sorted(finished, key=lambda f: order.index(running[f])):
+                node = running.pop(future)
+                began, ended, result = future.result()
+                timings[node] = NodeTiming(ready_at[node], began, ended)
+                finish(node, result)
+                release(node)
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return timings
+
+
+def critical_path(deps: dict[str, list[str]], timings: dict[str, NodeTiming]) -> list[str]:
+    """The dependency chain that ended last, first agent first."""
+    if not timings:
+        return []
+    node = max(timings, key=lambda n: timings[n].end)
+    path = [node]
+    while True:
+        before = [d for d in deps.get(node, ()) if d in timings]
+        if not before:
+            return path
+        node = max(before, key=lambda n: timings[n].end)
+        path.insert(0, node)
+
+
+def describe_path(path: list[str], timings: dict[str, NodeTiming]) -> str:
+    """"meta_planner 2.1s → meta_supervisor 1.8s (3.9s)"."""
+    steps = " → ".join(f"{n} {timings[n].duration:.1f}s" for n in path)
+    return f"{steps} ({sum(timings[n].duration for n in path):.1f}s)"
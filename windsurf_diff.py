@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Project Windsurf – content diffs for tick comparison
+====================================================
+Used by `windsurf_tick_viewer.py compare`. Callers compare the sha256 from
+the tick index first and only diff files whose hashes differ.
+
+  • JSON and YAML (see windsurf_index.detect_content_type) get a semantic
+    diff: one line per changed/added/removed path (`$.tasks[2].owner`);
+    multi-line string values are shown as a nested line diff.
+  • Everything else, and structured content that fails to parse, gets a
+    unified line diff.
+"""
+from __future__ import annotations
+
+import difflib
+import json
+from pathlib import Path
+from typing import Any, Iterator
+
+MAX_VALUE_CHARS = 80  # scalar values are shortened to this in semantic diffs
+_MISSING = object()
+
+
+def _short(value: Any) -> str:
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= MAX_VALUE_CHARS else text[:MAX_VALUE_CHARS - 3] + "..."
+
+
+def _strip_fence(content: str) -> str:
+    text = content.strip()
+    if text.startswith("```") and text.endswith("```"):
+        text = text[3:-3]
+        return text.split("\n", 1)[1] if "\n" in text else ""
+    return content
+
+
+def parse_structured(content: str, content_type: str) -> Any:
+    """Parse JSON/YAML *content*; return _MISSING if it cannot be parsed."""
+    text = _strip_fence(content)
+    try:
+        if content_type == "json":
+            return json.loads(text)
+        import yaml  # optional; without it YAML is diffed line by line
+
+        return yaml.safe_load(text)
+    except Exception:  # ImportError or a malformed document
+        return _MISSING
+
+
+def text_diff(old: str, new: str, old_label: str = "a", new_label: str = "b",
+              context: int = 2) -> Iterator[str]:
+    """Unified diff lines (without trailing newlines)."""
+    yield from difflib.unified_diff(old.splitlines(), new.splitlines(), old_label, new_label,
+                                    n=context, lineterm="")
+
+
+def semantic_diff(old: Any, new: Any, path: str = "$") -> Iterator[str]:
+    """Describe the differences between two parsed JSON/YAML documents."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in sorted(set(old) | set(new), key=str):
+            sub = f"{path}.{key}"
+            if key not in new:
+                yield f"- {sub}: {_short(old[key])}"
+            elif key not in old:
+                yield f"+ {sub}: {_short(new[key])}"
+            else:
+                yield from semantic_diff(old[key], new[key], sub)
+    elif isinstance(old, list) and isinstance(new, list):
+        for i in range(max(len(old), len(new))):
+            sub = f"{path}[{i}]"
+            if i >= len(new):
+                yield f"- {sub}: {_short(old[i])}"
+            elif i >= len(old):
+                yield f"+ {sub}: {_short(new[i])}"
+            else:
+                yield from semantic_diff(old[i], new[i], sub)
+    elif old != new:
+        if isinstance(old, str) and isinstance(new, str) and ("\n" in old or "\n" in new):
+            yield f"~ {path}:"
+            for line in text_diff(old, new):
+                yield "    " + line
+        else:
+            yield f"~ {path}: {_short(old)} → {_short(new)}"
+
+
+def diff_content(old: str, new: str, content_type: str, old_label: str = "a",
+                 new_label: str = "b") -> Iterator[str]:
+    """Semantic diff for JSON/YAML content, unified line diff otherwise."""
+    if content_type in ("json", "yaml"):
+        old_doc = parse_structured(old, content_type)
+        new_doc = parse_structured(new, content_type)
+        if old_doc is not _MISSING and new_doc is not _MISSING:
+            yield from semantic_diff(old_doc, new_doc)
+            return
+    yield from text_diff(old, new, old_label, new_label)
+
+
+def diff_files(old: Path, new: Path, content_type: str) -> Iterator[str]:
+    yield from diff_content(old.read_text(encoding="utf-8", errors="replace"),
+                            new.read_text(encoding="utf-8", errors="replace"),
+                            content_type, str(old), str(new))
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Project Windsurf – LLM request governor
+=======================================
+Wraps every LLM call of the tick runner with
+
+  • token-bucket rate limiting per model (requests/min and tokens/min), so a
+    concurrent fan-out stays under the provider limits instead of provoking
+    429 storms;
+  • retries with full-jitter exponential backoff on transient errors
+    (429, 408/409, 5xx, timeouts, connection resets), honouring Retry-After
+    up to max_delay;
+  • a per-model circuit breaker that fails fast after repeated transient
+    failures and lets one probe through once the cool-down has passed (bad
+    requests and auth errors fail the call, not the model).
+
+Calls that still fail raise `LLMCallError`, which carries a structured
+record (`as_record()`) for cycles/<tick>.json.
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+MAX_RETRIES = 4
+BASE_DELAY = 1.0  # seconds, doubled per attempt
+MAX_DELAY = 30.0
+BREAKER_THRESHOLD = 5  # consecutive transient failures that open the circuit
+BREAKER_RESET = 60.0  # seconds before a half-open probe is allowed
+
+_TRANSIENT_NAMES = {
+    "APITimeoutError", "APIConnectionError", "RateLimitError", "InternalServerError",
+    "TimeoutException", "ConnectError", "ReadTimeout", "RemoteProtocolError",
+}
+
+
+class TransientLLMError(RuntimeError):
+    """Raised by backends for errors worth retrying."""
+
+
+class LLMCallError(RuntimeError):
+    """An LLM call failed for good (non-retryable, retries exhausted, circuit open)."""
+
+    def __init__(self, message: str, model: str, attempts: int, kind: str,
+                 retryable: bool = False):
+        super().__init__(message)
+        self.model = model
+        self.attempts = attempts
+        self.kind = kind
+        self.retryable = retryable
+        self.timestamp = datetime.now().isoformat()
+
+    def as_record(self) -> dict:
+        return {
+            "kind": self.kind,
+            "message": str(self),
+            "model": self.model,
+            "attempts": self.attempts,
+            "retryable": self.retryable,
+            "timestamp": self.timestamp,
+        }
+
+
+def is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, (TransientLLMError, TimeoutError, ConnectionError)):
+        return True
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int) and (status in (408, 409, 429) or status >= 500):
+        return True
+    return any(cls.__name__ in _TRANSIENT_NAMES for cls in type(exc).__mro__)
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RateLimit:
+    rpm: int  # requests per minute
+    tpm: int  # tokens per minute
+
+
+class TokenBucket:
+    """Classic token bucket; `acquire` blocks until enough capacity is free."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.available = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Take *amount* (capped at capacity); return seconds spent waiting."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.available >= amount:
+                    self.available -= amount
+                    return waited
+                delay = (amount - self.available) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, reset_after: float = BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_after:
+                self.opened_at = time.monotonic()  # half-open: one probe per window
+                return True
+            return False
+
+    def success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def failure(self) -> bool:
+        """Record a failure; return True if the circuit is (now) open."""
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            return self.opened_at is not None
+
+
+class Governor:
+    """Rate limiter + retry policy + circuit breaker, keyed by model."""
+
+    def __init__(self, limits: dict[str, RateLimit], default: RateLimit,
+                 max_retries: int = MAX_RETRIES, base_delay: float = BASE_DELAY,
+                 max_delay: float = MAX_DELAY):
+        self.limits = limits
+        self.default = default
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._buckets: dict[str, tuple[TokenBucket, TokenBucket]] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, model: str) -> tuple[TokenBucket, TokenBucket, CircuitBreaker]:
+        with self._lock:
+            if model not in self._buckets:
+                limit = self.limits.get(model, self.default)
+                self._buckets[model] = (TokenBucket(limit.rpm), TokenBucket(limit.tpm))
+                self._breakers[model] = CircuitBreaker()
+            return (*self._buckets[model], self._breakers[model])
+
+    def call(self, model: str, tokens: int, fn: Callable[[], T],
+             log: Callable[[str], None] = print, stats: dict | None = None) -> T:
+        """Run *fn* under the limits for *model*; *tokens* is the request size.
+
+        *stats*, if given, receives "attempts" and "waited" (seconds spent on
+        rate limits, summed over attempts).
+        """
+        requests, token_bucket, breaker = self._state(model)
+        if stats is None:
+            stats = {}
+        stats.update(attempts=0, waited=0.0)
+        attempt = 0
+        while True:
+            attempt += 1
+            stats["attempts"] = attempt
+            if not breaker.allow():
+                raise LLMCallError(f"circuit open for {model} after repeated failures",
+                                   model, attempt - 1, "circuit_open", retryable=True)
+            waited = requests.acquire(1) + token_bucket.acquire(tokens)
+            stats["waited"] += waited
+            if waited >= 1.0:
+                log(f"  [GOVERNOR] Waited {waited:.1f}s for {model} rate limit")
+            try:
+                result = fn()
+            except Exception as exc:
+                if not is_transient(exc):  # the request is at fault, not the model
+                    raise LLMCallError(f"{type(exc).__name__}: {exc}", model, attempt,
+                                       "error") from exc
+                opened = breaker.failure()
+                if attempt > self.max_retries or opened:
+                    raise LLMCallError(f"{type(exc).__name__}: {exc}", model, attempt,
+                                       "retries_exhausted", retryable=True) from exc
+                delay = _retry_after(exc)
+                if delay is None:
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+                delay = min(max(delay, 0.0), self.max_delay)
+                log(f"  [GOVERNOR] {type(exc).__name__} on {model} (attempt {attempt}), "
+                    f"retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            breaker.success()
+            return result
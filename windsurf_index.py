@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Project Windsurf – indexed tick store
+=====================================
+SQLite index of every per-tick agent file:
+
+  (tick, agent, kind, name) → path, size, sha256, content type
+      kind = "cycle"  agents/<id>/cycles/<tick>.json
+             "outbox" agents/<id>/outbox/tik<tick>/<name>
+             "inbox"  agents/<id>/inbox/tik<tick>/<name>
+
+The index lives in windsurf/index.sqlite3 and is refreshed incrementally:
+directories whose mtime is unchanged are skipped, and inside a changed
+directory only files with a new size/mtime are re-read and re-hashed. All
+writes go through rename (atomic_write_text, llm.txt.partial → llm.txt), so
+a changed file always shows up as a changed directory; `refresh(full=True)`
+re-stats every file for trees edited by hand.
+
+Lookups by tick (and agent) are single indexed queries, shared by the tick
+viewer, the tick runner and the web UI dev-server. The text of every file
+(for cycles: their thought_action_result) is kept in an FTS5 full-text
+index that is updated together with the file rows, so `search` returns
+bm25-ranked hits without touching the files:
+
+  $ python3 windsurf_index.py refresh
+  $ python3 windsurf_index.py files 7 --agent meta_planner
+  $ python3 windsurf_index.py search "counsel rate" --group meta --ticks 2..40
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable
+
+SCHEMA_VERSION = 2
+KINDS = ("cycle", "outbox", "inbox")
+GROUPS = {"meta": "meta\\_%", "actor": "agent\\_%", "human": "human"}  # agent LIKE patterns
+_TICK_DIR = re.compile(r"tik(\d+)")
+_CYCLE_FILE = re.compile(r"(\d+)\.json")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    tick INTEGER NOT NULL,
+    agent TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    dir TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    PRIMARY KEY (tick, agent, kind, name)
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+CREATE INDEX IF NOT EXISTS files_mtime ON files (mtime_ns);
+CREATE TABLE IF NOT EXISTS dirs (
+    dir TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS fts USING fts5 (body, tokenize = 'porter unicode61');
+CREATE TRIGGER IF NOT EXISTS files_fts_delete AFTER DELETE ON files BEGIN
+    DELETE FROM fts WHERE rowid = old.rowid;
+END;
+"""
+
+
+def detect_content_type(content: str, file_name: str) -> str:
+    """Detect the type of content based on file name and content."""
+    if file_name.endswith('.json'):
+        return 'json'
+    elif file_name.endswith('.yaml') or file_name.endswith('.yml'):
+        return 'yaml'
+    elif file_name.endswith('.md'):
+        return 'markdown'
+
+    # Try to detect from content
+    if content.strip().startswith('{') and content.strip().endswith('}'):
+        try:
+            json.loads(content)
+            return 'json'
+        except json.JSONDecodeError:
+            pass
+
+    if content.strip().startswith('```json'):
+        return 'json'
+    elif content.strip().startswith('```yaml'):
+        return 'yaml'
+    elif content.strip().startswith('```md') or content.strip().startswith('```markdown'):
+        return 'markdown'
+    elif content.strip().startswith('#'):
+        return 'markdown'
+
+    return 'text'
+
+
+def searchable_text(kind: str, text: str) -> str:
+    """The part of a file that is full-text indexed (a cycle's thought_action_result)."""
+    if kind == "cycle":
+        try:
+            record = json.loads(text)
+        except json.JSONDecodeError:
+            return text
+        if isinstance(record, dict) and isinstance(record.get("thought_action_result"), str):
+            return record["thought_action_result"]
+    return text
+
+
+def fts_query(query: str) -> str:
+    """Quote every term of *query* so FTS5 operators and punctuation are literal."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+@dataclass
+class IndexedFile:
+    tick: int
+    agent: str
+    kind: str
+    name: str
+    path: Path
+    size: int
+    mtime_ns: int
+    sha256: str
+    content_type: str
+
+    @property
+    def key(self) -> str:
+        """Viewer-style key: "cycle", "outbox/<name>" or "inbox/<name>"."""
+        return "cycle" if self.kind == "cycle" else f"{self.kind}/{self.name}"
+
+    def as_record(self) -> dict:
+        record = asdict(self)
+        record["path"] = str(self.path)
+        return record
+
+
+@dataclass
+class SearchHit:
+    file: IndexedFile
+    score: float  # higher is more relevant
+    snippet: str
+
+    def as_record(self) -> dict:
+        return {**self.file.as_record(), "score": self.score, "snippet": self.snippet}
+
+
+class TickIndex:
+    """Incrementally maintained index over agents/<id>/{cycles,outbox,inbox}."""
+
+    def __init__(self, agents_dir: Path, db_path: Path | None = None):
+        self.agents_dir = Path(agents_dir)
+        self.db_path = Path(db_path or self.agents_dir.parent / "windsurf" / "index.sqlite3")
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._conn.executescript(
+                f"DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS dirs; DROP TABLE IF EXISTS fts; "
+                f"PRAGMA user_version={SCHEMA_VERSION};"
+            )
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # ------------------------------------------------------------------
+    # REFRESH
+    # ------------------------------------------------------------------
+
+    def refresh(self, ticks: Iterable[int] | None = None, full: bool = False) -> int:
+        """Bring the index up to date; return the number of (re)indexed files.
+
+        With *ticks*, only the tik<N> directories of those ticks (and the
+        cycles directories) are examined. *full* ignores directory mtimes.
+        """
+        ticks = None if ticks is None else sorted(set(ticks))
+        with self._lock, self._conn:
+            dir_mtimes = dict(self._conn.execute("SELECT dir, mtime_ns FROM dirs"))
+            seen: set[str] = set()
+            changed = 0
+            agent_dirs = sorted(p for p in self.agents_dir.iterdir() if p.is_dir()) \
+                if self.agents_dir.is_dir() else []
+            for agent_dir in agent_dirs:
+                changed += self._sync_dir(agent_dir / "cycles", agent_dir.name, "cycle", None,
+                                          dir_mtimes, seen, full)
+                for kind in ("outbox", "inbox"):
+                    for tick, tick_dir in self._tick_dirs(agent_dir / kind, ticks):
+                        changed += self._sync_dir(tick_dir, agent_dir.name, kind, tick,
+                                                  dir_mtimes, seen, full)
+            self._forget(dir_mtimes, seen, ticks)
+        return changed
+
+    @staticmethod
+    def _tick_dirs(box: Path, ticks: list[int] | None) -> list[tuple[int, Path]]:
+        if ticks is not None:
+            return [(t, box / f"tik{t}") for t in ticks]
+        try:
+            entries = list(os.scandir(box))
+        except FileNotFoundError:
+            return []
+        found = []
+        for entry in entries:
+            m = _TICK_DIR.fullmatch(entry.name)
+            if m and entry.is_dir():
+                found.append((int(m.group(1)), Path(entry.path)))
+        return found
+
+    def _sync_dir(self, path: Path, agent: str, kind: str, tick: int | None,
+                  dir_mtimes: dict[str, int], seen: set[str], full: bool) -> int:
+        try:
+            mtime = path.stat().st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            return 0
+        rel = path.relative_to(self.agents_dir).as_posix()
+        seen.add(rel)
+        if not full and dir_mtimes.get(rel) == mtime:
+            return 0
+
+        stored = {name: (size, mtime_ns) for name, size, mtime_ns in self._conn.execute(
+            "SELECT name, size, mtime_ns FROM files WHERE dir = ?", (rel,))}
+        present = set()
+        changed = 0
+        for entry in os.scandir(path):
+            if not entry.is_file() or entry.name.startswith("."):  # skip atomic-write temp files
+                continue
+            file_tick = tick
+            if kind == "cycle":
+                m = _CYCLE_FILE.fullmatch(entry.name)
+                if not m:
+                    continue
+                file_tick = int(m.group(1))
+            present.add(entry.name)
+            st = entry.stat()
+            if stored.get(entry.name) == (st.st_size, st.st_mtime_ns):
+                continue
+            data = Path(entry.path).read_bytes()
+            text = data.decode("utf-8", errors="replace")
+            content_type = detect_content_type(text, entry.name)
+            # delete + insert (not REPLACE) so the trigger drops the old FTS row
+            self._conn.execute("DELETE FROM files WHERE dir = ? AND name = ?", (rel, entry.name))
+            rowid = self._conn.execute(
+                "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (file_tick, agent, kind, entry.name, rel, st.st_size, st.st_mtime_ns,
+                 hashlib.sha256(data).hexdigest(), content_type),
+            ).lastrowid
+            self._conn.execute("INSERT INTO fts (rowid, body) VALUES (?, ?)",
+                               (rowid, searchable_text(kind, text)))
+            changed += 1
+        gone = [(rel, name) for name in stored.keys() - present]
+        self._conn.executemany("DELETE FROM files WHERE dir = ? AND name = ?", gone)
+        self._conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?)", (rel, mtime))
+        return changed + len(gone)
+
+    def _forget(self, dir_mtimes: dict[str, int], seen: set[str], ticks: list[int] | None) -> None:
+        """Drop directories that vanished (within the refreshed ticks, if scoped)."""
+        if ticks is None:
+            candidates = set(dir_mtimes)
+        else:
+            candidates = set()
+            for d in dir_mtimes:
+                m = _TICK_DIR.fullmatch(d.rsplit("/", 1)[-1])
+                if d.endswith("/cycles") or (m and int(m.group(1)) in ticks):
+                    candidates.add(d)
+        stale = [(d,) for d in candidates - seen]
+        self._conn.executemany("DELETE FROM files WHERE dir = ?", stale)
+        self._conn.executemany("DELETE FROM dirs WHERE dir = ?", stale)
+
+    # ------------------------------------------------------------------
+    # QUERIES
+    # ------------------------------------------------------------------
+
+    def _rows(self, sql: str, params: tuple) -> list[IndexedFile]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            IndexedFile(tick, agent, kind, name, self.agents_dir / d / name,
+                        size, mtime_ns, sha256, content_type)
+            for tick, agent, kind, name, d, size, mtime_ns, sha256, content_type in rows
+        ]
+
+    def files(self, tick: int, agent: str | None = None, kind: str | None = None) -> list[IndexedFile]:
+        """Files of *tick*, ordered by agent, kind (cycle, outbox, inbox) and name."""
+        sql = "SELECT * FROM files WHERE tick = ?"
+        params: tuple = (tick,)
+        if agent is not None:
+            sql += " AND agent = ?"
+            params += (agent,)
+        if kind is not None:
+            sql += " AND kind = ?"
+            params += (kind,)
+        sql += " ORDER BY agent, CASE kind WHEN 'cycle' THEN 0 WHEN 'outbox' THEN 1 ELSE 2 END, name"
+        return self._rows(sql, params)
+
+    def modified_since(self, mtime_ns: int, ticks: Iterable[int] | None = None) -> list[IndexedFile]:
+        """Files with an mtime after *mtime_ns* (optionally within *ticks*), oldest first."""
+        sql = "SELECT * FROM files WHERE mtime_ns > ?"
+        params: tuple = (mtime_ns,)
+        if ticks is not None:
+            ticks = tuple(ticks)
+            sql += f" AND tick IN ({', '.join('?' * len(ticks)) or 'NULL'})"
+            params += ticks
+        return self._rows(sql + " ORDER BY mtime_ns, agent, name", params)
+
+    def get(self, tick: int, agent: str, kind: str, name: str) -> IndexedFile | None:
+        found = self._rows("SELECT * FROM files WHERE tick = ? AND agent = ? AND kind = ? AND name = ?",
+                           (tick, agent, kind, name))
+        return found[0] if found else None
+
+    def search(self, query: str, group: str | None = None, ticks: tuple[int, int] | None = None,
+               content_type: str | None = None, kind: str | None = None,
+               limit: int = 20, highlight: tuple[str, str] = ("[", "]")) -> list[SearchHit]:
+        """Best *limit* matches for *query*, most relevant first.
+
+        *query* uses FTS5 syntax (`"exact phrase"`, `plan OR route`, `coun*`);
+        if it does not parse, its terms are searched literally. *group* is a
+        key of GROUPS, *ticks* an inclusive (first, last) range. Matched
+        terms in the snippet are wrapped in *highlight*.
+        """
+        where, params = ["fts MATCH ?"], []
+        if group is not None:
+            where.append("f.agent LIKE ? ESCAPE '\\'")
+            params.append(GROUPS[group])
+        if ticks is not None:
+            where.append("f.tick BETWEEN ? AND ?")
+            params.extend(ticks)
+        if content_type is not None:
+            where.append("f.content_type = ?")
+            params.append(content_type)
+        if kind is not None:
+            where.append("f.kind = ?")
+            params.append(kind)
+        sql = (
+            "SELECT f.tick, f.agent, f.kind, f.name, f.dir, f.size, f.mtime_ns, f.sha256, "
+            "f.content_type, bm25(fts), snippet(fts, 0, ?, ?, '…', 12) "
+            "FROM fts JOIN files f ON f.rowid = fts.rowid "
+            f"WHERE {' AND '.join(where)} ORDER BY bm25(fts) LIMIT ?"
+        )
+        with self._lock:
+            try:
+                rows = self._conn.execute(sql, (*highlight, query, *params, limit)).fetchall()
+            except sqlite3.OperationalError:  # FTS5 syntax error
+                rows = self._conn.execute(sql, (*highlight, fts_query(query), *params, limit)).fetchall()
+        return [
+            SearchHit(IndexedFile(tick, agent, kind, name, self.agents_dir / d / name,
+                                  size, mtime_ns, sha256, ctype), -score, snippet)
+            for tick, agent, kind, name, d, size, mtime_ns, sha256, ctype, score, snippet in rows
+        ]
+
+    def ticks(self) -> list[int]:
+        with self._lock:
+            return [t for (t,) in self._conn.execute("SELECT DISTINCT tick FROM files ORDER BY tick")]
+
+    def agents(self, tick: int) -> list[str]:
+        with self._lock:
+            return [a for (a,) in self._conn.execute(
+                "SELECT DISTINCT agent FROM files WHERE tick = ? ORDER BY agent", (tick,))]
+
+
+def parse_tick_range(text: str) -> tuple[int, int]:
+    """Parse "A..B" (or a single tick "A") into an inclusive range."""
+    first, sep, last = text.partition("..")
+    try:
+        return (int(first), int(last)) if sep else (int(first), int(first))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid tick range '{text}' (use A..B)") from None
+
+
+def _cli(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Windsurf tick index")
+    parser.add_argument("--agents-dir", type=Path, default=Path(__file__).resolve().parent / "agents")
+    parser.add_argument("--db", type=Path, help="index file (default: <root>/windsurf/index.sqlite3)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    refresh = sub.add_parser("refresh", help="update the index")
+    refresh.add_argument("--full", action="store_true", help="re-stat every file")
+    files = sub.add_parser("files", help="print the files of a tick as JSON")
+    files.add_argument("tick", type=int)
+    files.add_argument("--agent")
+    files.add_argument("--kind", choices=KINDS)
+    sub.add_parser("ticks", help="print the indexed ticks as JSON")
+    search = sub.add_parser("search", help="print full-text search hits as JSON")
+    search.add_argument("query")
+    search.add_argument("--group", choices=sorted(GROUPS))
+    search.add_argument("--ticks", type=parse_tick_range, metavar="A..B")
+    search.add_argument("--type", dest="content_type")
+    search.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    index = TickIndex(args.agents_dir, args.db)
+    try:
+        if args.command == "refresh":
+            print(f"[INDEX] {index.refresh(full=args.full)} file(s) updated in {index.db_path}")
+        elif args.command == "files":
+            index.refresh(ticks=[args.tick])
+            print(json.dumps([f.as_record() for f in index.files(args.tick, args.agent, args.kind)]))
+        elif args.command == "search":
+            index.refresh()
+            hits = index.search(args.query, args.group, args.ticks, args.content_type,
+                                limit=args.limit)
+            print(json.dumps([hit.as_record() for hit in hits]))
+        else:
+            index.refresh()
+            print(json.dumps(index.ticks()))
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    _cli()
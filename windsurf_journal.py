@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Project Windsurf – per-tick completion journal
+==============================================
+Append-only record of which agents finished a tick:
+
+  windsurf/journal/tik<N>.jsonl
+    {"agent", "input_sha256", "status", "output", "completed"}   – one line per persist
+
+If the runner dies part-way through a stage, the tick is not advanced and the
+next run re-processes it; agents whose latest entry is "ok" for the same
+input hash (and whose output still exists) are skipped, so only the missing
+agents call the LLM again.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+
+class TickJournal:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.entries: dict[str, dict] = {}  # agent -> latest entry
+        if self.path.exists():
+            for line in self.path.read_text(encoding="utf-8").splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from a crash
+                self.entries[entry["agent"]] = entry
+
+    def completed(self, agent: str, input_sha256: str, root: Path | None = None) -> bool:
+        """True if *agent* already finished this tick with the same input.
+
+        With *root*, the recorded output file must also still exist there.
+        """
+        entry = self.entries.get(agent)
+        return bool(
+            entry
+            and entry["status"] == "ok"
+            and entry["input_sha256"] == input_sha256
+            and (root is None or (root / entry["output"]).exists())
+        )
+
+    def record(self, agent: str, input_sha256: str, status: str, output: str) -> None:
+        entry = {
+            "agent": agent,
+            "input_sha256": input_sha256,
+            "status": status,
+            "output": output,
+            "completed": datetime.now().isoformat(),
+        }
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries[agent] = entry
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Project Windsurf – LLM backends
+===============================
+Long-lived, thread-safe chat-completion backends shared by every
+`run_agents` call in a process.
+
+  • `OpenAIBackend` keeps one `openai.OpenAI` client on top of a pooled
+    `httpx.Client`, so TLS/HTTP connections are reused (keep-alive) across
+    agents, stages and worker threads instead of being rebuilt per call.
+  • Backends are looked up by name (`get_backend`) and created once; tests
+    and benchmarks can `register_backend` their own implementation.
+  • `WINDSURF_LLM_BASE_URL` (or `OPENAI_BASE_URL`) points the OpenAI backend
+    at any OpenAI-compatible server, e.g. the stub server below:
+
+      $ python3 windsurf_llm.py stub-server --port 8799
+      $ WINDSURF_LLM_BASE_URL=http://127.0.0.1:8799/v1 OPENAI_API_KEY=stub \\
+            python3 windsurf_tick_runner.py
+
+  • `--backend mock` needs no network at all: deterministic replies with
+    simulated latency, throughput and errors, configured by WINDSURF_MOCK
+    (see `MockConfig`), for benchmarking the runner itself:
+
+      $ WINDSURF_MOCK="ttft=lognormal:0.8:0.5,tps=60,tokens=uniform:150:600,errors=0.05" \\
+            python3 windsurf_simulate.py --backend mock --synthetic-human -j 12 -n 2
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator
+
+from windsurf_governor import TransientLLMError
+
+DEFAULT_TIMEOUT = 60.0  # seconds, per request
+MAX_CONNECTIONS = int(os.getenv("WINDSURF_LLM_MAX_CONNECTIONS", "16"))
+KEEPALIVE_EXPIRY = 120.0  # seconds an idle pooled connection is kept open
+DEFAULT_BACKEND = os.getenv("WINDSURF_LLM_BACKEND", "openai")
+
+
+class LLMBackend:
+    """Interface for chat-completion backends.
+
+    A single instance is shared by all worker threads of the runner, so
+    implementations must be thread-safe.
+    """
+
+    name = "base"
+
+    def complete(self, model: str, messages: list[dict], temperature: float) -> str:
+        """Return the assistant reply for *messages*."""
+        raise NotImplementedError
+
+    def stream(self, model: str, messages: list[dict], temperature: float) -> Iterator[str]:
+        """Yield the reply in text fragments as they arrive.
+
+        Backends without native streaming yield the complete reply once.
+        """
+        yield self.complete(model, messages, temperature)
+
+    def describe(self) -> str:
+        return self.name
+
+    def close(self) -> None:
+        """Release pooled resources (connections, sockets)."""
+
+
+class OpenAIBackend(LLMBackend):
+    """OpenAI chat completions over a pooled keep-alive HTTP transport."""
+
+    name = "openai"
+
+    def __init__(self, api_key: str | None = None, base_url: str | None = None,
+                 timeout: float = DEFAULT_TIMEOUT, max_connections: int = MAX_CONNECTIONS):
+        import httpx
+        import openai
+
+        self.base_url = base_url or os.getenv("WINDSURF_LLM_BASE_URL") or None
+        self.max_connections = max_connections
+        self._http = httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+        )
+        self.client = openai.OpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            base_url=self.base_url,
+            timeout=timeout,
+            http_client=self._http,
+            max_retries=0,  # the governor is the only retry layer (rate limits, breaker)
+        )
+
+    def complete(self, model: str, messages: list[dict], temperature: float) -> str:
+        completion = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+        )
+        return (completion.choices[0].message.content or "").strip()
+
+    def stream(self, model: str, messages: list[dict], temperature: float) -> Iterator[str]:
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            stream=True,
+        )
+        with response:
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    def describe(self) -> str:
+        target = self.base_url or "api.openai.com"
+        return f"{self.name} ({target}, pool of {self.max_connections} connections)"
+
+    def close(self) -> None:
+        self.client.close()
+
+
+# ---------------------------------------------------------------------------
+# MOCK BACKEND (offline, simulated latency/throughput/errors)
+# ---------------------------------------------------------------------------
+
+_MOCK_WORDS = ("agent", "plan", "route", "task", "review", "meta", "tick", "policy",
+               "draft", "signal", "report", "goal", "risk", "step", "output", "input")
+
+
+def parse_distribution(spec: str) -> Callable[[random.Random], float]:
+    """Sampler for "fixed:X", "uniform:A:B", "normal:MU:SD", "lognormal:MEDIAN:SIGMA" or "exp:MEAN".
+
+    A bare number means fixed; samples are never negative. Parameters are
+    checked here (positive median, non-negative spreads), not on first use.
+    """
+    kind, _, rest = spec.partition(":")
+    if not rest:
+        kind, rest = "fixed", spec
+    try:
+        params = [float(p) for p in rest.split(":")]
+        if kind == "fixed" and len(params) == 1:
+            return lambda rng: max(0.0, params[0])
+        if kind == "uniform" and len(params) == 2:
+            return lambda rng: max(0.0, rng.uniform(*params))
+        if kind == "normal" and len(params) == 2 and params[1] >= 0:
+            return lambda rng: max(0.0, rng.gauss(*params))
+        if kind == "lognormal" and len(params) == 2 and params[0] > 0 and params[1] >= 0:
+            mu = math.log(params[0])
+            return lambda rng: rng.lognormvariate(mu, params[1])
+        if kind == "exp" and len(params) == 1:
+            return lambda rng: rng.expovariate(1 / params[0]) if params[0] > 0 else 0.0
+    except ValueError:
+        pass
+    raise ValueError(f"invalid distribution '{spec}'")
+
+
+@dataclass
+class MockConfig:
+    """Behaviour of the mock backend, from a WINDSURF_MOCK spec such as
+    "ttft=lognormal:0.8:0.5,tps=60,tokens=uniform:150:600,errors=0.05".
+
+      ttft     seconds before the first token (distribution)
+      tps      generated tokens per second (0 = the whole reply at once)
+      tokens   reply length in tokens (distribution, rounded)
+      errors   share of attempts failing with a transient error (retried)
+      fatal    share of attempts failing with a non-retryable error
+      slots    requests served at once, others queue (0 = unlimited)
+      scale    multiplier for every delay, e.g. 0.01 for fast test runs
+      seed     varies the replies/latencies while keeping them reproducible
+    """
+    ttft: str = "fixed:0"
+    tps: float = 0.0
+    tokens: str = "fixed:50"
+    errors: float = 0.0
+    fatal: float = 0.0
+    slots: int = 0
+    scale: float = 1.0
+    seed: int = 0
+
+    @classmethod
+    def from_spec(cls, spec: str) -> MockConfig:
+        config = cls()
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            key, sep, value = item.partition("=")
+            if not sep or key not in cls.__dataclass_fields__:
+                raise ValueError(f"invalid WINDSURF_MOCK setting '{item}'")
+            setattr(config, key, type(getattr(cls, key))(value))
+        parse_distribution(config.ttft)  # validate early
+        parse_distribution(config.tokens)
+        return config
+
+
+class MockBackend(LLMBackend):
+    """Deterministic offline replies with simulated latency, throughput and errors.
+
+    Everything about a request (reply text, length, latency, injected
+    errors) is derived from the request content, the attempt number and the
+    seed, so a benchmark run can be repeated exactly, concurrency included.
+    """
+
+    name = "mock"
+
+    def __init__(self, config: MockConfig | None = None):
+        self.config = config or MockConfig.from_spec(os.getenv("WINDSURF_MOCK", ""))
+        self._ttft = parse_distribution(self.config.ttft)
+        self._tokens = parse_distribution(self.config.tokens)
+        self._slots = threading.BoundedSemaphore(self.config.slots) if self.config.slots > 0 else None
+        self._attempts: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.injected_errors = 0
+
+    def _plan(self, model: str, messages: list[dict]) -> tuple[random.Random, str, str]:
+        """RNG for this attempt of the request, the request's reply text and its digest."""
+        digest = hashlib.sha256(json.dumps([model, messages], sort_keys=True).encode()).hexdigest()
+        with self._lock:
+            attempt = self._attempts[digest] = self._attempts.get(digest, 0) + 1
+            self.calls += 1
+        reply_rng = random.Random(f"{self.config.seed}:{digest}")
+        count = max(1, round(self._tokens(reply_rng)))
+        words = " ".join(reply_rng.choice(_MOCK_WORDS) for _ in range(count - 1))
+        text = f"[mock:{model}:{digest[:12]}] {words}".rstrip()
+        return random.Random(f"{self.config.seed}:{digest}:{attempt}"), text, digest
+
+    def _fail(self, rng: random.Random, model: str) -> None:
+        roll = rng.random()
+        if roll < self.config.fatal:
+            with self._lock:
+                self.injected_errors += 1
+            raise RuntimeError(f"mock: injected fatal error for {model}")
+        if roll < self.config.fatal + self.config.errors:
+            with self._lock:
+                self.injected_errors += 1
+            raise TransientLLMError(f"mock: injected transient error for {model}")
+
+    def _sleep(self, seconds: float) -> None:
+        if seconds > 0 and self.config.scale > 0:
+            time.sleep(seconds * self.config.scale)
+
+    def stream(self, model: str, messages: list[dict], temperature: float) -> Iterator[str]:
+        rng, text, digest = self._plan(model, messages)
+        if self._slots is not None:
+            self._slots.acquire()
+        try:
+            self._sleep(self._ttft(rng))
+            self._fail(rng, model)
+            with self._lock:  # only retried attempts need counting
+                self._attempts.pop(digest, None)
+            words = text.split(" ")
+            delay = 1 / self.config.tps if self.config.tps > 0 else 0.0
+            for i, word in enumerate(words):
+                if i:
+                    self._sleep(delay)
+                yield word if i == 0 else " " + word
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    def complete(self, model: str, messages: list[dict], temperature: float) -> str:
+        return "".join(self.stream(model, messages, temperature))
+
+    def describe(self) -> str:
+        c = self.config
+        rate = f"{c.tps:g} tok/s" if c.tps > 0 else "instant"
+        return (f"{self.name} (ttft {c.ttft}, {rate}, {c.tokens} tokens, "
+                f"errors {c.errors:.0%}/{c.fatal:.0%} fatal, slots {c.slots or 'unlimited'}, "
+                f"scale {c.scale:g})")
+
+
+_FACTORIES: dict[str, Callable[[], LLMBackend]] = {
+    "openai": OpenAIBackend,
+    "mock": MockBackend,
+}
+_instances: dict[str, LLMBackend] = {}
+_lock = threading.Lock()
+
+
+def register_backend(name: str, factory: Callable[[], LLMBackend]) -> None:
+    """Make *factory* available as backend *name* (replaces a cached instance)."""
+    with _lock:
+        _FACTORIES[name] = factory
+        old = _instances.pop(name, None)
+    if old is not None:
+        old.close()
+
+
+def available_backends() -> list[str]:
+    return sorted(_FACTORIES)
+
+
+def set_default_backend(name: str) -> None:
+    global DEFAULT_BACKEND
+    if name not in _FACTORIES:
+        raise ValueError(f"Unknown LLM backend '{name}' (available: {', '.join(available_backends())})")
+    DEFAULT_BACKEND = name
+
+
+def get_backend(name: str | None = None) -> LLMBackend:
+    """Return the process-wide instance of backend *name*, creating it once."""
+    name = name or DEFAULT_BACKEND
+    with _lock:
+        backend = _instances.get(name)
+        if backend is None:
+            try:
+                factory = _FACTORIES[name]
+            except KeyError:
+                raise ValueError(
+                    f"Unknown LLM backend '{name}' (available: {', '.join(sorted(_FACTORIES))})"
+                ) from None
+            backend = _instances[name] = factory()
+        return backend
+
+
+def close_backends() -> None:
+    """Close every backend created so far."""
+    with _lock:
+        backends = list(_instances.values())
+        _instances.clear()
+    for backend in backends:
+        backend.close()
+
+
+# ---------------------------------------------------------------------------
+# LOCAL STUB SERVER (OpenAI-compatible /v1/chat/completions)
+# ---------------------------------------------------------------------------
+
+def stub_reply(model: str, messages: list[dict]) -> str:
+    """Deterministic reply used by the stub server."""
+    digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).hexdigest()[:12]
+    last = messages[-1]["content"] if messages else ""
+    return f"[stub:{model}:{digest}] received {len(last)} chars"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def do_POST(self):  # noqa: N802
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        model = body.get("model", "stub")
+        content = stub_reply(model, body.get("messages", []))
+        if body.get("stream"):
+            self._stream(model, content)
+            return
+        payload = json.dumps({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": 0,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, model: str, content: str) -> None:
+        """Send *content* as server-sent events, one word per chunk."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            delta = {"content": word if i == 0 else " " + word}
+            event = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": 0,
+                     "model": model,
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def log_message(self, format, *args):  # noqa: A002 - silence per-request logging
+        pass
+
+
+def make_stub_server(host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Create (but do not start) a stub server; port 0 picks a free port."""
+    return ThreadingHTTPServer((host, port), _StubHandler)
+
+
+def _cli() -> None:  # pragma: no cover
+    parser = argparse.ArgumentParser(description="Windsurf LLM backend utilities")
+    sub = parser.add_subparsers(dest="command", required=True)
+    stub = sub.add_parser("stub-server", help="serve an OpenAI-compatible stub API")
+    stub.add_argument("--host", default="127.0.0.1")
+    stub.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    server = make_stub_server(args.host, args.port)
+    print(f"[windsurf_llm] Stub server on http://{args.host}:{server.server_port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    _cli()
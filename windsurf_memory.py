@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Project Windsurf – rolling agent memory
+=======================================
+agents/<id>/memory.md is the agent's append-only log. After every call the
+runner appends a "## Tick <N>" section with what the agent did (action and
+result of its reply, never its thought); free-form notes above the first
+section are kept as they are.
+
+What goes into a prompt is a bounded, tiered view of that log, at most
+`cap` tokens:
+
+  notes          the hand-written head of memory.md, verbatim
+  ## Summary     every older tick folded into a running summary
+  ## Tick <N>    the `recent` newest ticks, verbatim
+
+A log that already fits the cap is used unchanged. Otherwise the older
+sections (more of them if the recent ones do not fit) are folded in one at
+a time (summary + next section → summary), and each fold is cached on disk
+by the hash of its input, so a new tick costs a single summarizer call and
+an unchanged memory costs none. The
+runner starts that work in the background as soon as an entry is appended
+(`MemoryCompactor.prefetch`), off the critical path of the stage; the next
+stage only waits if the fold has not finished yet.
+
+The view for tick N only uses sections of earlier ticks, so re-running a
+tick sees the same memory (and the same request hash) as the first run.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import windsurf_tokens
+from windsurf.tools.atomic_io import atomic_write_text
+from windsurf_diff import parse_structured
+
+TOKEN_CAP = 2000  # tokens of the memory view
+RECENT_TICKS = 3  # newest tick sections kept verbatim
+ENTRY_TOKENS = 300  # cap of one appended tick section
+SUMMARY_SHARE = 0.4  # of the cap, for the summary of older ticks
+_SECTION = re.compile(r"^## Tick (\d+)[^\n]*\n", re.M)
+
+# summarize(summary, new_sections, max_tokens) -> new summary
+Summarizer = Callable[[str, str, int], str]
+
+
+@dataclass
+class Memory:
+    notes: str
+    entries: list[tuple[int, str]]  # (tick, section text incl. header), oldest first
+
+
+def parse_memory(text: str) -> Memory:
+    """Split memory.md into its free-form head and its tick sections."""
+    matches = list(_SECTION.finditer(text))
+    if not matches:
+        return Memory(text.strip(), [])
+    entries = []
+    for m, end in zip(matches, [n.start() for n in matches[1:]] + [len(text)]):
+        entries.append((int(m.group(1)), text[m.start():end].strip()))
+    return Memory(text[:matches[0].start()].strip(), entries)
+
+
+def render_memory(memory: Memory) -> str:
+    parts = [memory.notes] if memory.notes else []
+    parts += [text for _, text in memory.entries]
+    return "\n\n".join(parts) + "\n" if parts else ""
+
+
+def learning(reply: str, model: str = "gpt-4o") -> str:
+    """What to remember of *reply*: its action and result, or its head."""
+    doc = parse_structured(reply, "json")
+    if isinstance(doc, dict) and ("action" in doc or "result" in doc):
+        lines = []
+        for key in ("action", "result"):
+            value = doc.get(key)
+            if value not in (None, ""):
+                lines.append(f"{key.title()}: {value if isinstance(value, str) else json.dumps(value)}")
+        text = "\n".join(lines)
+    else:
+        text = reply.strip()
+    return windsurf_tokens.truncate_tokens(text, ENTRY_TOKENS, model)
+
+
+def append_entry(path: Path, tick: int, text: str) -> str:
+    """Add (or, for a re-run, replace) the tick's section in memory.md; return the new log."""
+    path = Path(path)
+    try:
+        memory = parse_memory(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        memory = Memory("", [])
+    entries = [e for e in memory.entries if e[0] != tick]
+    entries.append((tick, f"## Tick {tick}\n{text.strip()}"))
+    memory.entries = sorted(entries, key=lambda e: e[0])
+    content = render_memory(memory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_text(path, content)
+    return content
+
+
+def before_tick(text: str, tick: int) -> str:
+    """The log as it was before *tick* wrote to it."""
+    memory = parse_memory(text)
+    memory.entries = [e for e in memory.entries if e[0] < tick]
+    return render_memory(memory)
+
+
+def extractive_summary(summary: str, sections: str, max_tokens: int,
+                       model: str = "gpt-4o") -> str:
+    """Summarizer without an LLM: keep the first line of each section body."""
+    lines = [line for line in summary.splitlines() if line.strip()]
+    for m in _SECTION.finditer(sections):
+        body = sections[m.end():].strip().split("\n", 1)[0]
+        lines.append(f"- tick {m.group(1)}: {body}")
+    return windsurf_tokens.truncate_tokens("\n".join(lines), max_tokens, model, keep="tail")
+
+
+class MemoryCompactor:
+    """Builds the bounded memory views; folds are cached under *cache_dir*."""
+
+    def __init__(self, cache_dir: Path, summarizer: Summarizer | None = None,
+                 cap: int = TOKEN_CAP, recent: int = RECENT_TICKS,
+                 model: str = "gpt-4o", workers: int = 2):
+        self.cache_dir = Path(cache_dir)
+        self.summarizer = summarizer or (lambda s, e, n: extractive_summary(s, e, n, model))
+        self.name = getattr(summarizer, "__name__", "extractive") if summarizer else "extractive"
+        self.cap = cap
+        self.recent = recent
+        self.model = model
+        self.stats = {"folds": 0, "cached": 0}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="windsurf-memory")
+        self._pending: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    def _cached(self, kind: str, payload: list[str], compute: Callable[[], str]) -> str:
+        key = hashlib.sha256(json.dumps(
+            [kind, self.name, self.cap, self.recent, self.model, *payload]).encode("utf-8")).hexdigest()
+        path = self.cache_dir / key[:2] / f"{key}.md"
+        try:
+            text = path.read_text(encoding="utf-8")
+            self.stats["cached"] += 1
+            return text
+        except FileNotFoundError:
+            pass
+        text = compute()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(path, text)
+        return text
+
+    def _fold(self, summary: str, section: str, max_tokens: int, summarizer: Summarizer) -> str:
+        def compute() -> str:
+            self.stats["folds"] += 1
+            folded = summarizer(summary, section, max_tokens)
+            return windsurf_tokens.truncate_tokens(folded.strip(), max_tokens, self.model)
+        return self._cached("fold", [summary, section], compute)
+
+    def _build(self, text: str, summarizer: Summarizer) -> str:
+        memory = parse_memory(text)
+        if not memory.entries:  # only hand-written notes
+            return windsurf_tokens.truncate_tokens(text, self.cap, self.model)
+        keep = min(self.recent, len(memory.entries) - 1)
+        while True:
+            older = memory.entries[:len(memory.entries) - keep]
+            recent = memory.entries[len(older):]
+            summary = ""
+            for _, section in older:
+                summary = self._fold(summary, section, int(self.cap * SUMMARY_SHARE), summarizer)
+            first, last = older[0][0], older[-1][0]
+            span = f"tick {first}" if first == last else f"ticks {first}–{last}"
+            view = render_memory(Memory(memory.notes, [(0, f"## Summary of {span}\n{summary}"), *recent]))
+            if windsurf_tokens.count_tokens(view, self.model) <= self.cap:
+                return view
+            if keep == 0:  # the notes alone are too long
+                return windsurf_tokens.truncate_tokens(view, self.cap, self.model, keep="tail")
+            keep -= 1  # fold one more tick into the summary
+
+    def compact(self, text: str, summarizer: Summarizer | None = None) -> str:
+        """The bounded view of the memory log *text* (waits for a running prefetch).
+
+        *summarizer* replaces the compactor's for this call, e.g. to bind it to
+        a tick; it must fold like the compactor's (the cache key is the same).
+        """
+        if windsurf_tokens.count_tokens(text, self.model) <= self.cap:
+            return text
+        with self._lock:
+            future = self._pending.get(text)
+        if future is not None:
+            try:
+                return future.result()
+            except Exception:
+                pass  # rebuilt below
+        return self._cached("view", [text], lambda: self._build(text, summarizer or self.summarizer))
+
+    def prefetch(self, text: str, summarizer: Summarizer | None = None) -> None:
+        """Start building the view of *text* in the background (*summarizer* as in compact)."""
+        if windsurf_tokens.count_tokens(text, self.model) <= self.cap:
+            return
+        with self._lock:
+            if text in self._pending:
+                return
+            future = self._pool.submit(self._cached, "view", [text],
+                                       lambda: self._build(text, summarizer or self.summarizer))
+            self._pending[text] = future
+        future.add_done_callback(lambda _: self._forget(text))
+
+    def _forget(self, text: str) -> None:
+        with self._lock:
+            self._pending.pop(text, None)
+
+    def close(self) -> None:
+        """Wait for the background work (a failed prefetch is rebuilt on use)."""
+        self._pool.shutdown(wait=True)
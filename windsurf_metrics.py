@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Project Windsurf – per-call LLM metrics
+=======================================
+The tick runner records one line per agent call:
+
+  windsurf/metrics/tik<N>.jsonl
+    {"tick", "stage", "agent", "model", "tier", "status", "queue_wait", "ttft",
+     "latency", "attempts", "prompt_tokens", "completion_tokens", "cost", "started"}
+
+  • queue_wait  seconds between the stage dispatching the request and the
+                request being sent (worker pool slot + governor rate limits);
+  • ttft        time to first token, streamed calls only (else null);
+  • latency     seconds from sending the request to the complete reply,
+                retries included, rate-limit waits excluded;
+  • tier        the agent's **LLM Default:** tag, normalized ("LLM-MEDIUM"
+                → "MEDIUM"); the model is picked from the tag as written;
+  • cost        estimated USD from the "Cost" column in
+                windsurf/protocols/LLM_TIERS.md of the tier of the model
+                used, read as USD per 1K tokens (prompt + completion);
+                cached replies cost nothing.
+
+status is "ok", "cached", "failed" or "skipped" (cache-only miss). The
+CHEAP-tier housekeeping calls (memory summaries, stage 5 reduction) are
+recorded as agents "(memory)" and "(reduce)".
+`aggregate` groups records (by agent, model, tier or stage) into counts,
+p50/p95 timings and token/cost totals; the tick viewer (`metrics`) and the
+web UI (/api/metrics, via `python3 windsurf_metrics.py report`) use it.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import re
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator
+
+ROOT = Path(__file__).resolve().parent
+METRICS_DIR = ROOT / "windsurf" / "metrics"
+TIERS_FILE = ROOT / "windsurf" / "protocols" / "LLM_TIERS.md"
+GROUP_FIELDS = ("agent", "model", "tier", "stage", "tick")
+_TIERS_ROW = re.compile(r"^\s*(?:LLM-)?([A-Z0-9-]+)\s*\|.*?\|.*?\|\s*([0-9.]+)\s*\|", re.M)
+
+
+@dataclass
+class CallMetrics:
+    tick: int
+    stage: int
+    agent: str
+    model: str
+    tier: str
+    status: str = "ok"
+    queue_wait: float = 0.0
+    ttft: float | None = None
+    latency: float | None = None
+    attempts: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float | None = None
+    started: str = ""
+
+    def __post_init__(self):
+        if not self.started:
+            self.started = datetime.now().isoformat()
+
+    def as_record(self) -> dict:
+        return asdict(self)
+
+
+def load_tier_costs(path: Path = TIERS_FILE) -> dict[str, float]:
+    """Tier tag (without "LLM-") -> cost per 1K tokens, from LLM_TIERS.md."""
+    try:
+        text = path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return {}
+    return {tag: float(cost) for tag, cost in _TIERS_ROW.findall(text)}
+
+
+def normalize_tier(tag: str) -> str:
+    """"LLM-MEDIUM" (as written in system prompts and LLM_TIERS.md) -> "MEDIUM"."""
+    tag = tag.upper()
+    return tag[4:] if tag.startswith("LLM-") else tag
+
+
+def estimate_cost(tier: str, prompt_tokens: int, completion_tokens: int,
+                  costs: dict[str, float]) -> float | None:
+    """Estimated USD for a call, or None when the tier has no listed cost."""
+    rate = costs.get(normalize_tier(tier))
+    if rate is None:
+        return None
+    return round((prompt_tokens + completion_tokens) / 1000 * rate, 6)
+
+
+# The metrics of the call running in this thread, filled in by llm_call.
+_current = threading.local()
+
+
+@contextmanager
+def measure(metrics: CallMetrics):
+    """Make *metrics* the current call's record while the block runs."""
+    previous = getattr(_current, "metrics", None)
+    _current.metrics = metrics
+    try:
+        yield metrics
+    finally:
+        _current.metrics = previous
+
+
+def current() -> CallMetrics | None:
+    return getattr(_current, "metrics", None)
+
+
+class MetricsRecorder:
+    """Append-only metrics file of one tick (thread-safe)."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def record(self, metrics: CallMetrics) -> None:
+        line = json.dumps(metrics.as_record()) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+def metrics_path(tick: int, metrics_dir: Path = METRICS_DIR) -> Path:
+    return Path(metrics_dir) / f"tik{tick}.jsonl"
+
+
+def load_metrics(metrics_dir: Path = METRICS_DIR,
+                 ticks: tuple[int, int] | None = None) -> Iterator[dict]:
+    """Yield the records of every (or an inclusive range of) tick, oldest first.
+
+    A re-run appends to the tick's file; only the latest record per agent
+    counts, so a repaired tick is not reported twice. Housekeeping records
+    ("(memory)", "(reduce)") are separate calls and all count.
+    """
+    files = []
+    for path in Path(metrics_dir).glob("tik*.jsonl"):
+        m = re.fullmatch(r"tik(\d+)\.jsonl", path.name)
+        if m and (ticks is None or ticks[0] <= int(m.group(1)) <= ticks[1]):
+            files.append((int(m.group(1)), path))
+    for _, path in sorted(files):
+        latest: dict[str | int, dict] = {}
+        for i, line in enumerate(path.read_text(encoding="utf-8").splitlines()):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from a crash
+            latest[i if record["agent"].startswith("(") else record["agent"]] = record
+        yield from latest.values()
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Linear-interpolated *q*-th percentile (0-100) of *values*."""
+    if not values:
+        return None
+    values = sorted(values)
+    pos = (len(values) - 1) * q / 100
+    low, high = math.floor(pos), math.ceil(pos)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+def aggregate(records: Iterable[dict], by: str = "agent") -> list[dict]:
+    """Group *records* by field *by* into count, p50/p95 and token/cost totals.
+
+    Timings only consider calls that reached the model (status ok/failed).
+    """
+    groups: dict = {}
+    for record in records:
+        groups.setdefault(record.get(by), []).append(record)
+    report = []
+    for key in sorted(groups, key=lambda k: (k is None, k)):
+        rows = groups[key]
+        sent = [r for r in rows if r["status"] in ("ok", "failed")]
+        entry = {by: key, "calls": len(rows),
+                 "failed": sum(r["status"] == "failed" for r in rows),
+                 "cached": sum(r["status"] == "cached" for r in rows)}
+        for name in ("latency", "ttft", "queue_wait"):
+            values = [r[name] for r in sent if r.get(name) is not None]
+            entry[f"{name}_p50"] = _round(percentile(values, 50))
+            entry[f"{name}_p95"] = _round(percentile(values, 95))
+        entry["prompt_tokens"] = sum(r["prompt_tokens"] for r in rows)
+        entry["completion_tokens"] = sum(r["completion_tokens"] for r in rows)
+        entry["cost"] = round(sum(r["cost"] or 0.0 for r in rows), 6)
+        report.append(entry)
+    return report
+
+
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 3)
+
+
+def _cli(argv: list[str] | None = None) -> None:
+    from windsurf_index import parse_tick_range
+
+    parser = argparse.ArgumentParser(description="Windsurf LLM call metrics")
+    parser.add_argument("--metrics-dir", type=Path, default=METRICS_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    report = sub.add_parser("report", help="print p50/p95 aggregates as JSON")
+    report.add_argument("--ticks", type=parse_tick_range, metavar="A..B")
+    report.add_argument("--by", choices=GROUP_FIELDS, default="agent")
+    calls = sub.add_parser("calls", help="print the raw per-call records as JSON")
+    calls.add_argument("--ticks", type=parse_tick_range, metavar="A..B")
+    args = parser.parse_args(argv)
+
+    records = load_metrics(args.metrics_dir, args.ticks)
+    if args.command == "report":
+        print(json.dumps(aggregate(records, args.by)))
+    else:
+        print(json.dumps(list(records)))
+
+
+if __name__ == "__main__":
+    _cli()
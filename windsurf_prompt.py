@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Project Windsurf – prompt layout
+================================
+Every agent's system_prompt.md begins with the same COMMON SYSTEM-PROMPT
+PREAMBLE, and all agents of a stage receive the same gathered input. The
+"shared-prefix" layout orders each request so that everything common to the
+stage comes first and the agent-specific part last:
+
+  1. system  – common preamble                    (identical for all agents)
+  2. user    – STAGE INPUT                          (identical within a stage)
+  3. system  – agent block of system_prompt.md     (per agent)
+  4. user    – MEMORY                               (per agent)
+
+Provider-side prefix caching can then reuse (1)+(2) across the 10–12 calls of
+a stage. The "legacy" layout keeps the original two-message form.
+"""
+from __future__ import annotations
+
+import os
+
+import windsurf_tokens
+
+PREAMBLE_END = "######## END COMMON PREAMBLE ########"
+LAYOUTS = ("shared-prefix", "legacy")
+DEFAULT_LAYOUT = os.getenv("WINDSURF_PROMPT_LAYOUT", "shared-prefix")
+
+
+def split_preamble(system_prompt: str) -> tuple[str, str]:
+    """Split *system_prompt* into (common preamble, agent-specific block).
+
+    Prompts without the preamble marker are returned as ("", system_prompt).
+    """
+    head, sep, tail = system_prompt.partition(PREAMBLE_END)
+    if not sep:
+        return "", system_prompt
+    return head + sep, tail.strip("\n")
+
+
+def build_messages(system_prompt: str, stage_input: str, memory: str,
+                   layout: str = DEFAULT_LAYOUT) -> list[dict]:
+    """Assemble the chat messages for one agent."""
+    if layout == "legacy":
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": stage_input + "\n\nMEMORY:\n" + memory},
+        ]
+    if layout != "shared-prefix":
+        raise ValueError(f"Unknown prompt layout '{layout}' (choose from {', '.join(LAYOUTS)})")
+    preamble, agent_block = split_preamble(system_prompt)
+    messages = []
+    if preamble:
+        messages.append({"role": "system", "content": preamble})
+    messages.append({"role": "user", "content": "STAGE INPUT:\n" + stage_input})
+    messages.append({"role": "system", "content": agent_block})
+    messages.append({"role": "user", "content": "MEMORY:\n" + memory})
+    return messages
+
+
+def _serialize(messages: list[dict]) -> str:
+    return "".join(f"<|{m['role']}|>{m['content']}" for m in messages)
+
+
+def _common_prefix(a: str, b: str) -> int:
+    # Binary search on slice equality keeps the comparison in C.
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def shared_prefix_tokens(requests: list[tuple[str, list[dict]]]) -> tuple[int, int]:
+    """Return (prefix-cacheable tokens, total prompt tokens) for a stage.
+
+    *requests* are (model, messages) pairs in submission order. A request's
+    cacheable part is the longest prefix it shares with an earlier request
+    for the same model.
+    """
+    seen: dict[str, list[str]] = {}
+    shared = total = 0
+    for model, messages in requests:
+        text = _serialize(messages)
+        earlier = seen.setdefault(model, [])
+        prefix = max((_common_prefix(text, other) for other in earlier), default=0)
+        earlier.append(text)
+        total += windsurf_tokens.count_tokens(text, model)
+        shared += windsurf_tokens.count_tokens(text[:prefix], model)
+    return shared, total
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Project Windsurf – hierarchical fan-in reduction of stage outputs
+=================================================================
+Stage 5 hands every meta-agent the outputs of all actors, so its input
+grows with the number of actors. `tree_reduce` bounds it: while the
+outputs exceed a token budget they are grouped FAN_IN at a time and each
+group is condensed by a summarizer call (all groups of a level in
+parallel); the digests are grouped again until they fit or one is left.
+
+  level 0   a1 a2 a3 a4 | a5 a6 a7 a8 | a9 … a12      12 actor outputs
+  level 1   d1          | d2          | d3            3 CHEAP calls
+  (level 2  d1+d2+d3 → d4, only if the 3 digests still do not fit)
+
+With 100 actors and FAN_IN 4 that is 25 + 7 + 2 (+1) calls on the cheapest
+tier, instead of ten meta calls that each read all 100 outputs. Each
+digest is labelled with the outputs it covers. The runner supplies the
+summarizer (a CHEAP-tier call, see LLM_MODEL_MAP) and uses the response
+cache, so re-running a stage does not re-summarize.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+import windsurf_tokens
+import windsurf_trace
+from windsurf_tokens import Chunk
+
+FAN_IN = 4  # outputs (or digests) condensed per summarizer call
+DIGEST_TOKENS = 400  # cap of one digest
+REDUCE_THRESHOLD = 8000  # tokens of actor output above which stage 5 input is reduced
+MAX_WORKERS = 8  # summarizer calls in flight per level
+
+# summarize(rendered group, max_tokens) -> digest
+Summarizer = Callable[[str, int], str]
+
+
+@dataclass
+class ReduceStats:
+    levels: int = 0
+    calls: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    per_level: list[int] = field(default_factory=list)  # calls per level
+
+
+def _label(sources: list[str]) -> str:
+    names = [s.split("/")[0] for s in sources]
+    if len(names) <= 4:
+        return ", ".join(names)
+    return f"{names[0]} … {names[-1]}, {len(names)} outputs"
+
+
+def tree_reduce(chunks: list[Chunk], summarize: Summarizer, budget: int,
+                fan_in: int = FAN_IN, digest_tokens: int = DIGEST_TOKENS,
+                workers: int = MAX_WORKERS, model: str = "gpt-4o-mini") -> tuple[list[Chunk], ReduceStats]:
+    """Condense *chunks* level by level until they fit *budget* tokens."""
+    if fan_in < 2:
+        raise ValueError("fan_in must be at least 2")
+    stats = ReduceStats()
+    current = list(chunks)
+    covers = [[c.source] for c in current]
+    stats.tokens_in = windsurf_tokens.count_tokens(windsurf_tokens.render_chunks(current), model)
+    size = stats.tokens_in
+    while len(current) > 1 and size > budget:
+        stats.levels += 1
+        groups = [current[i:i + fan_in] for i in range(0, len(current), fan_in)]
+        group_covers = [sum(covers[i:i + fan_in], []) for i in range(0, len(covers), fan_in)]
+        with windsurf_trace.span("reduce_level", level=stats.levels, groups=len(groups)):
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(groups))),
+                                    thread_name_prefix="windsurf-reduce") as pool:
+                digests = list(pool.map(
+                    windsurf_trace.bind(lambda g: summarize(windsurf_tokens.render_chunks(g), digest_tokens)),
+                    groups))
+        stats.calls += len(groups)
+        stats.per_level.append(len(groups))
+        current = [
+            Chunk(f"digest L{stats.levels}.{i + 1} ({_label(cov)})",
+                  windsurf_tokens.truncate_tokens(digest.strip(), digest_tokens, model),
+                  max(c.priority for c in group))
+            for i, (digest, cov, group) in enumerate(zip(digests, group_covers, groups))
+        ]
+        covers = group_covers
+        size = windsurf_tokens.count_tokens(windsurf_tokens.render_chunks(current), model)
+    stats.tokens_out = size
+    return current, stats
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Project Windsurf – retrieval memory (per-agent vector index)
+============================================================
+With `--memory-retrieval K` the tick runner sends an agent the K chunks of
+its memory that are most similar to the stage input, instead of the whole
+memory view, so the prompt stays the same size however many ticks ran.
+
+Sources, chunked into paragraphs of at most CHUNK_TOKENS tokens:
+
+  memory/notes, memory/tik<N>   the notes and "## Tick <N>" sections of memory.md
+  cycle/tik<N>                  the reply recorded in cycles/<N>.json, only for
+                                ticks without a memory section (no duplicates)
+
+Each agent's index lives in windsurf/vectors/<agent>/:
+
+  vectors.npy   float32 (chunks × dim), rows L2-normalised
+  chunks.json   {"embedder", "sources": {key: signature}, "chunks": [{source, tick, text}]}
+
+`update` is incremental: a source is only re-embedded when its signature
+(content hash, or size+mtime for cycle files) changed, and its old rows are
+dropped. Vectors of another embedder or dimension (e.g. a different
+embedding model) are re-embedded. Search is one matrix-vector product
+(cosine similarity).
+
+Embedders are pluggable (`register_embedder`):
+
+  hash     offline feature hashing of word and character n-grams (default;
+           deterministic, no network, used by the tests)
+  openai   the embeddings endpoint through the pooled OpenAI client
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable
+
+import numpy as np
+
+import windsurf_memory
+import windsurf_tokens
+from windsurf.tools.atomic_io import atomic_write_text
+
+CHUNK_TOKENS = 200
+QUERY_TOKENS = 2000  # head of the stage input used as the query
+DEFAULT_EMBEDDER = os.getenv("WINDSURF_EMBEDDER", "hash")
+_WORD = re.compile(r"\w+", re.U)
+
+
+class Embedder:
+    """Interface: map texts to an (n × dim) float32 array of unit vectors."""
+
+    name = "base"
+    dim = 0
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        raise NotImplementedError
+
+
+def _normalise(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.where(norms == 0, 1, norms)).astype(np.float32)
+
+
+class HashingEmbedder(Embedder):
+    """Signed feature hashing of words, word bigrams and character n-grams."""
+
+    name = "hash"
+
+    def __init__(self, dim: int = 512, char_ngrams: tuple[int, ...] = (3, 4)):
+        self.dim = dim
+        self.char_ngrams = char_ngrams
+
+    def _features(self, text: str) -> Iterable[str]:
+        words = [w.lower() for w in _WORD.findall(text)]
+        yield from (f"w:{w}" for w in words)
+        yield from (f"b:{a} {b}" for a, b in zip(words, words[1:]))
+        for word in words:
+            padded = f" {word} "
+            for n in self.char_ngrams:
+                yield from (f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                vectors[row, value % self.dim] += 1.0 if value >> 63 else -1.0
+        return _normalise(vectors)
+
+
+class OpenAIEmbedder(Embedder):
+    """Embeddings endpoint, over the runner's pooled OpenAI client."""
+
+    name = "openai"
+
+    def __init__(self, model: str = os.getenv("WINDSURF_EMBEDDING_MODEL", "text-embedding-3-small")):
+        self.model = model
+        self.dim = 0  # known after the first call
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        import windsurf_llm
+
+        client = windsurf_llm.get_backend("openai").client
+        response = client.embeddings.create(model=self.model, input=texts)
+        vectors = np.array([d.embedding for d in response.data], dtype=np.float32)
+        self.dim = vectors.shape[1]
+        return _normalise(vectors)
+
+
+_EMBEDDERS: dict[str, Callable[[], Embedder]] = {
+    "hash": HashingEmbedder,
+    "openai": OpenAIEmbedder,
+}
+
+
+def register_embedder(name: str, factory: Callable[[], Embedder]) -> None:
+    _EMBEDDERS[name] = factory
+
+
+def get_embedder(name: str | None = None) -> Embedder:
+    name = name or DEFAULT_EMBEDDER
+    try:
+        return _EMBEDDERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown embedder '{name}' (available: {', '.join(sorted(_EMBEDDERS))})") from None
+
+
+def chunk_text(text: str, max_tokens: int = CHUNK_TOKENS) -> list[str]:
+    """Split *text* at blank lines into chunks of at most *max_tokens* tokens."""
+    chunks, current = [], ""
+    for para in (p.strip() for p in re.split(r"\n\s*\n", text)):
+        if not para:
+            continue
+        while windsurf_tokens.count_tokens(para) > max_tokens:  # one oversized paragraph
+            head = windsurf_tokens.truncate_tokens(para, max_tokens)
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(head)
+            para = para[len(head):].strip()
+        candidate = f"{current}\n\n{para}" if current else para
+        if current and windsurf_tokens.count_tokens(candidate) > max_tokens:
+            chunks.append(current)
+            candidate = para
+        current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+@dataclass
+class Source:
+    key: str  # memory/notes | memory/tik<N> | cycle/tik<N>
+    tick: int | None
+    signature: str
+    load: Callable[[], str]
+
+
+def agent_sources(agent_dir: Path, before_tick: int | None = None) -> list[Source]:
+    """The memory sections and cycle replies of an agent (of ticks < *before_tick*).
+
+    A tick's cycle reply is only a source when memory.md has no section for
+    it; the section already records that reply, and indexing both would
+    return every hit twice.
+    """
+    sources = []
+    memory = windsurf_memory.parse_memory(_read(agent_dir / "memory.md"))
+    if memory.notes:
+        sources.append(Source("memory/notes", None, _sha(memory.notes), lambda t=memory.notes: t))
+    for tick, text in memory.entries:
+        if before_tick is None or tick < before_tick:
+            sources.append(Source(f"memory/tik{tick}", tick, _sha(text), lambda t=text: t))
+    remembered = {tick for tick, _ in memory.entries}
+    for path in (agent_dir / "cycles").glob("*.json"):
+        if (not path.stem.isdigit() or int(path.stem) in remembered
+                or (before_tick is not None and int(path.stem) >= before_tick)):
+            continue
+        stat = path.stat()
+        sources.append(Source(f"cycle/tik{path.stem}", int(path.stem),
+                              f"{stat.st_size}:{stat.st_mtime_ns}", lambda p=path: _cycle_text(p)))
+    return sources
+
+
+def _read(path: Path) -> str:
+    try:
+        return path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return ""
+
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _cycle_text(path: Path) -> str:
+    try:
+        record = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return ""
+    reply = record.get("thought_action_result") if isinstance(record, dict) else None
+    return reply if isinstance(reply, str) else ""  # failed calls and empty cycles add nothing
+
+
+class VectorIndex:
+    """One agent's chunk vectors (see module docstring for the layout)."""
+
+    def __init__(self, directory: Path, embedder: Embedder):
+        self.directory = Path(directory)
+        self.embedder = embedder
+        self.sources: dict[str, str] = {}
+        self.chunks: list[dict] = []
+        self.vectors = np.zeros((0, embedder.dim), dtype=np.float32)
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            meta = json.loads((self.directory / "chunks.json").read_text(encoding="utf-8"))
+            vectors = np.load(self.directory / "vectors.npy")
+        except (FileNotFoundError, ValueError, OSError):
+            return
+        if (meta.get("embedder") != self.embedder.name or len(meta["chunks"]) != len(vectors)
+                or vectors.ndim != 2 or (self.embedder.dim and vectors.shape[1] != self.embedder.dim)):
+            return  # other embedder or dimension, or torn write: rebuild
+        self.sources, self.chunks, self.vectors = meta["sources"], meta["chunks"], vectors
+
+    def _save(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.directory / ".vectors.npy.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, self.vectors)
+        os.replace(tmp, self.directory / "vectors.npy")
+        atomic_write_text(self.directory / "chunks.json", json.dumps(
+            {"embedder": self.embedder.name, "sources": self.sources, "chunks": self.chunks}))
+
+    def update(self, sources: list[Source]) -> int:
+        """Bring the index in line with *sources*; return the number of chunks embedded."""
+        wanted = {s.key: s for s in sources}
+        stale = {key for key, sig in self.sources.items()
+                 if key not in wanted or wanted[key].signature != sig}
+        fresh = [s for s in sources if s.key not in self.sources or s.key in stale]
+        if not stale and not fresh:
+            return 0
+        keep = [i for i, c in enumerate(self.chunks) if c["source"] not in stale]
+        self.chunks = [self.chunks[i] for i in keep]
+        self.vectors = self.vectors[keep]
+        for key in stale:
+            del self.sources[key]
+        new = [{"source": s.key, "tick": s.tick, "text": text}
+               for s in fresh for text in chunk_text(s.load())]
+        embedded = len(new)
+        if new:
+            vectors = self.embedder.embed([c["text"] for c in new])
+            if len(self.vectors) and vectors.shape[1] != self.vectors.shape[1]:
+                embedded += self._reembed()  # the embedder's dimension changed
+            self.vectors = vectors if not len(self.vectors) else np.vstack([self.vectors, vectors])
+            self.chunks += new
+        self.sources.update({s.key: s.signature for s in fresh})
+        self._save()
+        return embedded
+
+    def _reembed(self) -> int:
+        """Embed the kept chunks again with the current embedder."""
+        self.vectors = self.embedder.embed([c["text"] for c in self.chunks])
+        return len(self.chunks)
+
+    def search(self, query: np.ndarray, k: int) -> list[tuple[float, dict]]:
+        """The *k* chunks most similar to the *query* vector, best first."""
+        if not self.chunks or k <= 0 or not query.any():
+            return []
+        if query.shape[0] != self.vectors.shape[1]:  # embedder's dimension changed since update
+            self._reembed()
+            self._save()
+        scores = self.vectors @ query
+        top = np.argsort(-scores, kind="stable")[:k]
+        return [(float(scores[i]), self.chunks[i]) for i in top]
+
+
+def embed_query(embedder: Embedder, text: str) -> np.ndarray:
+    return embedder.embed([windsurf_tokens.truncate_tokens(text, QUERY_TOKENS)])[0]
+
+
+def render_hits(hits: list[tuple[float, dict]]) -> str:
+    """Retrieved chunks as memory text, in tick order."""
+    ordered = sorted((c for _, c in hits), key=lambda c: (c["tick"] is not None, c["tick"] or 0))
+    return "\n\n".join(f"# {c['source']}\n{c['text']}" for c in ordered)
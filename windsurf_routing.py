@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Project Windsurf – routed inbox delivery for the actor stage
+============================================================
+Instead of handing every actor the whole previous stage, stage 4 delivers
+each actor only what was addressed to it. `route_stage` parses
+
+  • windsurf/protocols/next_assignments.json (meta_planner's plan), when it
+    was written for this tick (see `load_assignments`), and
+  • the JSON/YAML documents (whole reply or fenced blocks) in the meta
+    agents' outboxes since the last actor stage
+
+into per-recipient messages, one file per sender:
+
+  agents/<recipient>/inbox/tik<N>/from_<sender>.txt
+
+Recognised shapes, anywhere inside a document:
+
+  {"agent_bar": "task", "agent_un": ["task", ...]}          recipient → task(s)
+  {"assignments": [{"to": "agent_bar", "task": "..."}]}     list of messages
+  [{"recipient": ["agent_bar", "agent_un"], "message": {...}}]
+
+"to" (or recipient/recipients/agent/assignee) may also be "all" or "*" for
+every recipient. When nothing is routed the runner falls back to the
+broadcast of all outputs.
+"""
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from windsurf.tools.atomic_io import atomic_write_text
+from windsurf.tools.storage import Message, TickStorage
+from windsurf_diff import _MISSING, parse_structured
+
+SENDER_PREFIX = "from_"
+ASSIGNMENTS_SENDER = "next_assignments"
+ROUTED_SUFFIX = ".routed.json"  # {"tick", "mtime_ns"} of the last routing, next to the file
+TO_KEYS = ("to", "recipient", "recipients", "agent", "assignee")
+BODY_KEYS = ("task", "tasks", "message", "content", "body", "assignment")
+EVERYONE = ("all", "*", "actors")
+_FENCE = re.compile(r"```(json|ya?ml)?[ \t]*\n(.*?)```", re.S)
+
+
+def extract_documents(text: str) -> list[Any]:
+    """Structured documents in *text*: its fenced JSON/YAML blocks, else the whole text."""
+    blocks = [(lang or "json", body) for lang, body in _FENCE.findall(text)]
+    if not blocks:
+        stripped = text.strip()
+        blocks = [("json" if stripped.startswith(("{", "[")) else "yaml", stripped)]
+    documents = []
+    for lang, body in blocks:
+        doc = parse_structured(body, "json" if lang == "json" else "yaml")
+        if doc is _MISSING and lang == "json":
+            doc = parse_structured(body, "yaml")  # YAML is a superset of most sloppy JSON
+        if isinstance(doc, (dict, list)):
+            documents.append(doc)
+    return documents
+
+
+def _render(value: Any) -> str:
+    return value if isinstance(value, str) else json.dumps(value, indent=2, ensure_ascii=False)
+
+
+def _targets(value: Any, recipients: set[str]) -> list[str]:
+    names = [value] if isinstance(value, str) else value if isinstance(value, list) else []
+    if any(isinstance(n, str) and n.lower() in EVERYONE for n in names):
+        return sorted(recipients)
+    return [n for n in names if n in recipients]
+
+
+def find_routes(doc: Any, recipients: set[str]) -> Iterator[tuple[str, str]]:
+    """Yield (recipient, text) for every message addressed inside *doc*."""
+    if isinstance(doc, list):
+        for item in doc:
+            yield from find_routes(item, recipients)
+        return
+    if not isinstance(doc, dict):
+        return
+    to_key = next((k for k in TO_KEYS if k in doc), None)
+    targets = _targets(doc[to_key], recipients) if to_key else []
+    if targets:
+        body_key = next((k for k in BODY_KEYS if k in doc), None)
+        body = doc[body_key] if body_key else {k: v for k, v in doc.items() if k != to_key}
+        for recipient in targets:
+            yield recipient, _render(body)
+        return
+    for key, value in doc.items():
+        if key in recipients or (isinstance(key, str) and key.lower() in EVERYONE):
+            for recipient in _targets(key, recipients):
+                for task in value if isinstance(value, list) else [value]:
+                    yield recipient, _render(task)
+        elif isinstance(value, (dict, list)):
+            yield from find_routes(value, recipients)
+
+
+def collect_routes(sources: Iterable[tuple[str, str]],
+                   recipients: Iterable[str]) -> dict[str, dict[str, list[str]]]:
+    """recipient -> sender -> texts, from (sender, reply text) *sources*."""
+    recipients = set(recipients)
+    routes: dict[str, dict[str, list[str]]] = {}
+    for sender, text in sources:
+        for doc in extract_documents(text):
+            for recipient, body in find_routes(doc, recipients):
+                texts = routes.setdefault(recipient, {}).setdefault(sender, [])
+                if body not in texts:
+                    texts.append(body)
+    return routes
+
+
+def load_assignments(path: Path, tick: int) -> str:
+    """The assignments file's text if it was written for *tick*, else "".
+
+    A top-level "tick" field must name *tick*. A file without one is routed
+    until it has gone into an earlier tick unchanged: the tick and mtime of
+    the last routing are kept in <name>.routed.json, so a plan left over from
+    a previous cycle is not delivered again. Re-running a tick re-routes it.
+    """
+    path = Path(path)
+    try:
+        text = path.read_text(encoding="utf-8")
+        mtime_ns = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return ""
+    docs = extract_documents(text)
+    if docs and isinstance(docs[0], dict) and "tick" in docs[0]:
+        return text if docs[0]["tick"] == tick else ""
+    state_path = path.with_suffix(ROUTED_SUFFIX)
+    try:
+        last = json.loads(state_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        last = {}
+    if last.get("mtime_ns") == mtime_ns and last.get("tick") != tick:
+        return ""
+    atomic_write_text(state_path, json.dumps({"tick": tick, "mtime_ns": mtime_ns}))
+    return text
+
+
+def route_stage(store: TickStorage, tick: int, sources: list[Message],
+                recipients: list[str], assignments: Path | None = None) -> dict[str, list[str]]:
+    """Write the messages routed from *sources* into the recipients' inbox/tik<tick>/.
+
+    Inbox files left by an earlier routing of the same tick that are no
+    longer addressed are removed. Returns recipient -> names written.
+    """
+    inputs = [(m.agent, m.text) for m in sources]
+    if assignments is not None:
+        inputs.insert(0, (ASSIGNMENTS_SENDER, load_assignments(assignments, tick)))
+    routes = collect_routes(inputs, recipients)
+    written: dict[str, list[str]] = {}
+    for recipient in sorted(routes):
+        for sender, texts in sorted(routes[recipient].items()):
+            name = f"{SENDER_PREFIX}{sender}.txt"
+            store.write_message(recipient, tick, "inbox", name, "\n\n---\n\n".join(texts) + "\n")
+            written.setdefault(recipient, []).append(name)
+    for message in store.messages(tick, "inbox"):
+        if (message.agent in recipients and message.name.startswith(SENDER_PREFIX)
+                and message.name not in written.get(message.agent, [])):
+            store.delete_message(message.agent, tick, "inbox", message.name)
+    return written
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Project Windsurf – unattended multi-tick simulation
+===================================================
+Runs N full 5-stage cycles back to back in one process, without the
+interactive prompts of the tick runner:
+
+  $ python3 windsurf_simulate.py --cycles 3 --script prompts.txt -j 12
+  $ WINDSURF_LLM_BASE_URL=http://127.0.0.1:8799/v1 OPENAI_API_KEY=stub \\
+        python3 windsurf_simulate.py --cycles 10 --synthetic-human -j 12
+
+Human stages (1 and 3) are answered from
+  • `--script FILE`      one prompt per line (blank lines and `#` comments are
+                         ignored; the script wraps around when exhausted), or
+  • `--synthetic-human`  an LLM call on the CHEAP tier that plays the human,
+                         using agents/human/system_prompt.md if present; if
+                         that call fails (or misses in --cache-only mode) the
+                         previous human prompt is repeated.
+
+If the state is mid-cycle, the remaining stages of that cycle run first.
+global_state.json is advanced after every tick, so an interrupted simulation
+continues where it stopped (with the runner's journal/resume logic). The LLM
+backend, response cache and governor stay warm across all stages; at the end
+a per-stage and per-cycle throughput table is printed.
+
+All run options of windsurf_tick_runner.py (-j, --backend, --batch, --stream,
+cache flags, …) apply to every agent stage.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+import windsurf_tick_runner as runner
+import windsurf_tokens
+
+SYNTHETIC_HUMAN_PROMPT = """\
+You are the human operator of Project Windsurf, a multi-agent simulation.
+Read the agents' latest outputs below and reply with the next instruction
+for them: one short paragraph, plain text, no preamble."""
+FALLBACK_PROMPT = "Continue with the current plan."  # before any human prompt exists
+
+
+@dataclass
+class StageTiming:
+    tick: int
+    stage: int
+    seconds: float
+    agents: int = 0
+    failed: int = 0
+
+    @property
+    def rate(self) -> float:
+        return self.agents / self.seconds if self.seconds else 0.0
+
+
+def read_script(path: Path) -> list[str]:
+    """Prompts of a script file: one per line, blanks and `#` comments skipped."""
+    prompts = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            prompts.append(line)
+    if not prompts:
+        raise ValueError(f"{path}: no prompts found")
+    return prompts
+
+
+def previous_prompt(tick: int) -> str:
+    """The prompt of the latest human stage before *tick* (FALLBACK_PROMPT if none)."""
+    for prev in range(tick - 1, 0, -1):
+        if runner.stage_of(prev) not in (1, 3):
+            continue
+        for m in runner.storage().messages(prev, "outbox"):
+            if m.agent == runner.HUMAN_ID and m.name == "kickoff.txt":
+                found = re.search(r"^Prompt: (.*)$", m.text, re.M)
+                if found and found.group(1).strip():
+                    return found.group(1).strip()
+    return FALLBACK_PROMPT
+
+
+def synthetic_prompt(tick: int) -> str:
+    """Let the CHEAP tier answer a human stage from the previous tick's outputs.
+
+    A failed call does not stop the run: the previous human prompt is used.
+    """
+    prompt_file = runner.AGENTS_DIR / runner.HUMAN_ID / "system_prompt.md"
+    system_prompt = runner.read_text(prompt_file) or SYNTHETIC_HUMAN_PROMPT
+    model = runner.LLM_MODEL_MAP["CHEAP"]
+    chunks = runner.gather_prev_chunks(tick - 1)
+    fitted, _ = windsurf_tokens.fit_chunks(chunks, runner.input_budget(model), model)
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": windsurf_tokens.render_chunks(fitted) or "(no outputs yet)"},
+    ]
+    try:
+        reply = runner.llm_call(model, messages,
+                                prompt_tokens=windsurf_tokens.count_message_tokens(messages, model))
+    except (runner.windsurf_cache.CacheMiss, runner.windsurf_governor.LLMCallError) as exc:
+        reply = previous_prompt(tick)
+        print(f"[SIMULATE] Synthetic human failed for tick {tick} ({type(exc).__name__}: {exc}) "
+              f"— repeating: {reply}")
+    prompt = " ".join(reply.split())  # kickoff.txt keeps the prompt on one line
+    return prompt or previous_prompt(tick)
+
+
+def simulate(cycles: int, args: argparse.Namespace,
+             prompts: Iterator[str] | None = None) -> list[StageTiming]:
+    """Run the rest of the current cycle plus *cycles* full cycles.
+
+    Human stages take the next item of *prompts*, or a synthetic prompt when
+    *prompts* is None. Returns one timing per tick.
+    """
+    state = runner.load_state()
+    first = state.get("tick", 0) + 1
+    # finish the open cycle (if any), then run *cycles* complete ones
+    last = (-(-(first - 1) // 5) + cycles) * 5
+    timings = []
+    for tick in range(first, last + 1):
+        stage = runner.stage_of(tick)
+        start = time.perf_counter()
+        prompt = None
+        if stage in (1, 3):
+            prompt = next(prompts) if prompts is not None else synthetic_prompt(tick)
+        counts = runner.run_tick(tick, args, human_prompt=prompt) or {}
+        timings.append(StageTiming(tick, stage, time.perf_counter() - start,
+                                   counts.get("processed", 0), counts.get("failed", 0)))
+        state["tick"] = tick
+        runner.save_state(state)
+    return timings
+
+
+def report(timings: list[StageTiming]) -> None:
+    print("\n=== SIMULATION THROUGHPUT ===")
+    print(f"{'tick':>6} {'stage':>5} {'agents':>6} {'failed':>6} {'wall s':>8} {'agents/s':>8}")
+    for t in timings:
+        print(f"{t.tick:>6} {t.stage:>5} {t.agents:>6} {t.failed:>6} {t.seconds:>8.2f} {t.rate:>8.2f}")
+
+    print(f"\n{'cycle':>6} {'ticks':>5} {'agents':>6} {'failed':>6} {'wall s':>8} {'agents/s':>8}")
+    for cycle, group in itertools.groupby(timings, key=lambda t: (t.tick - 1) // 5 + 1):
+        group = list(group)
+        agents = sum(t.agents for t in group)
+        seconds = sum(t.seconds for t in group)
+        rate = agents / seconds if seconds else 0.0
+        print(f"{cycle:>6} {len(group):>5} {agents:>6} {sum(t.failed for t in group):>6} "
+              f"{seconds:>8.2f} {rate:>8.2f}")
+
+    print(f"\n{'stage':>6} {'runs':>5} {'agents':>6} {'mean s':>8} {'agents/s':>8}")
+    for stage in range(1, 6):
+        group = [t for t in timings if t.stage == stage]
+        if not group:
+            continue
+        agents = sum(t.agents for t in group)
+        seconds = sum(t.seconds for t in group)
+        rate = agents / seconds if seconds else 0.0
+        print(f"{stage:>6} {len(group):>5} {agents:>6} {seconds / len(group):>8.2f} {rate:>8.2f}")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run Project Windsurf cycles unattended")
+    parser.add_argument("-n", "--cycles", type=int, default=1,
+                        help="full 5-stage cycles to run (default: %(default)s)")
+    human = parser.add_mutually_exclusive_group(required=True)
+    human.add_argument("--script", type=Path, metavar="FILE",
+                       help="human prompts, one per line (wraps around)")
+    human.add_argument("--synthetic-human", action="store_true",
+                       help="let a CHEAP-tier LLM call play the human")
+    runner.add_run_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    prompts = None
+    if args.script:
+        try:
+            prompts = itertools.cycle(read_script(args.script))
+        except (OSError, ValueError) as exc:
+            print(f"ERROR: {exc}")
+            sys.exit(1)
+    runner.configure(args)
+    if runner.CACHE_MODE != "only":
+        print(f"[SETUP] LLM backend: {runner.windsurf_llm.get_backend().describe()}")
+
+    start = time.perf_counter()
+    first = runner.load_state().get("tick", 0) + 1
+    timings: list[StageTiming] = []
+    try:
+        with runner.windsurf_trace.span("simulate", cycles=args.cycles):
+            timings = simulate(args.cycles, args, prompts)
+    finally:
+        runner.close_memory()
+        runner.windsurf_llm.close_backends()
+        runner.close_storage()
+        runner.export_trace(args, f"simulate-tik{first}")
+    report(timings)
+    print(f"\n✔ Simulated {len(timings)} tick(s) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
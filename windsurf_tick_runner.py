@@ -10,29 +10,133 @@ Runs the 5-tick lifecycle end-to-end:
   Tick 5  – Meta-agent review for the human
 
 Usage:
-  $ python3 windsurf_tick_runner.py
+  $ python3 windsurf_tick_runner.py            # agents run one at a time
+  $ python3 windsurf_tick_runner.py -j 12      # up to 12 agents in parallel
 The script will determine the next required tick, guide you interactively when
 human input is needed, and automatically call the LLM for the relevant agents.
-Outputs are streamed to the console and persisted to the directory structure:
+Outputs are streamed to the console (grouped per agent, in list order, even
+when agents run in parallel) and persisted to the directory structure:
   agents/<id>/cycles/<tick>.json        – {thought, action, result}
   agents/<id>/outbox/tik<tick>/llm.txt  – raw LLM content
+With `--stream` replies are written to outbox/tik<tick>/llm.txt.partial as
+tokens arrive (time-to-first-token and tokens/s are reported per agent);
+llm.txt only ever appears complete, via an atomic rename.
 
 Requirements:
   • OPENAI_API_KEY in .env  (the bootstrap already created .env)
   • `openai` and `python-dotenv` python packages (in requirements.txt)
+LLM calls go through one pooled client per process (see windsurf_llm.py);
+`--backend` selects another registered backend.
+
+Replies are cached under windsurf/cache/llm keyed on (model, messages,
+temperature): re-running a stage with identical inputs costs nothing.
+  --no-cache     always call the LLM (the cache is neither read nor written)
+  --cache-only   never call the LLM; agents without a cached reply are skipped
+  --tick N       replay agent tick N (e.g. `--tick 7 --cache-only`) without
+                 advancing; every agent is re-run, the journal is ignored, and
+                 human ticks (stages 1 and 3) are refused
+
+LLM calls run under a request governor (windsurf_governor.py): per-model
+rate limits, jittered retries on transient errors and a circuit breaker. A
+call that still fails is recorded as {"status": "failed", "error": {...}} in
+cycles/<tick>.json (no outbox file is written); `--rerun-failed` repeats
+just those agents.
+
+`--storage db` (or WINDSURF_STORAGE=db) keeps cycles and outbox messages in
+DATABASE_URL (SQLite or PostgreSQL) instead of files, committed once per
+stage; `python -m windsurf.tools.storage export` writes the files back out.
+
+Every finished agent is appended to windsurf/journal/tik<tick>.jsonl. If the
+runner dies or is stopped with Ctrl-C mid-stage the tick is not advanced
+(agents in flight are journaled as "interrupted"); running it again resumes
+with only the agents that are missing. global_state.json and cycle files are
+replaced atomically (write-temp-then-rename).
+
+Requests use the "shared-prefix" message layout (common preamble, then the
+stage input, then the agent's own prompt and memory) so provider prefix
+caching is reused across a stage; see windsurf_prompt.py.
+
+The previous tick's outbox files are looked up through the SQLite tick index
+(windsurf_index.py, windsurf/index.sqlite3) shared with the tick viewer.
+
+`--trace [FILE]` records timing spans (tick → stage → run_agents → agent →
+llm_call / persist) and writes a Chrome trace JSON, by default
+windsurf/traces/tik<tick>.json; see windsurf_trace.py.
+
+Every agent call is measured (queue wait, time-to-first-token, latency,
+tokens, tier and estimated cost) into windsurf/metrics/tik<tick>.jsonl, as
+are the CHEAP-tier memory and reduction calls; the cost is priced at the
+tier of the model actually used. See windsurf_metrics.py and `windsurf_tick_viewer.py metrics`.
+
+Stage 4 delivers routed work instead of the whole meta output: the
+assignments in windsurf/protocols/next_assignments.json and in the meta
+agents' replies are written to agents/<id>/inbox/tik<tick>/, and each actor
+sees the human prompt plus its own inbox (see windsurf_routing.py). When
+nothing is routed, or with `--routing broadcast`, every actor gets every
+output of the previous tick as before.
+
+Each finished agent's action and result are appended to its memory.md as
+a "## Tick <N>" section; prompts get a tiered view capped at
+--memory-tokens (recent ticks verbatim, older ticks summarized by a CHEAP
+call in the background, cached by content hash; see windsurf_memory.py).
+
+`--memory-retrieval K` replaces the memory view by the K chunks of the
+agent's memory.md and past cycles most similar to its stage input, from a
+per-agent vector index updated incrementally each tick (needs NumPy; see
+windsurf_retrieval.py).
+
+Stage 5 input is bounded too: once the actor outputs exceed --reduce-tokens
+they are condensed, FAN_IN at a time and in parallel, by CHEAP-tier
+summaries (repeated level by level) and the meta-agents review the digests
+(see windsurf_reduce.py).
+
+Agents with STAGE_DEPENDENCIES (e.g. meta_supervisor on meta_planner and
+meta_topology) start as soon as those agents have replied in the same tick
+and get their replies as extra input; independent agents run concurrently
+(up to -j) and the stage reports its critical path (see windsurf_dag.py).
+
+`--batch [openai|local]` submits all requests of a stage as one bulk job
+(see windsurf_batch.py) instead of calling agents interactively; the job is
+tracked in windsurf/batches/tik<tick>/ (level<N>/ per dependency level) so an
+interrupted run resumes polling. Requests of a job that fails or expires are
+recorded as failed calls (see --rerun-failed).
 """
 from __future__ import annotations
 
+import argparse
+import functools
 import json
 import os
 import re
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from textwrap import indent
 
 from dotenv import load_dotenv
-import openai
+
+import windsurf_batch
+import windsurf_cache
+import windsurf_dag
+import windsurf_governor
+import windsurf_index
+import windsurf_journal
+import windsurf_llm
+import windsurf_memory
+import windsurf_metrics
+import windsurf_prompt
+import windsurf_reduce
+import windsurf_routing
+import windsurf_tokens
+import windsurf_trace
+from windsurf_tokens import Chunk
+from windsurf.tools import storage as windsurf_storage
+from windsurf.tools.atomic_io import atomic_write_text
 
 # ---------------------------------------------------------------------------
 # CONFIGURATION
@@ -76,11 +180,118 @@ LLM_MODEL_MAP = {
     "O3-REASON": "gpt-4o",       # Full gpt-4o
 }
 DEFAULT_MODEL = "gpt-4o-mini"    # Default upgraded to gpt-4o-mini
+DEFAULT_TIER = "CHEAP"           # tier of DEFAULT_MODEL, for cost estimates
+STAGE_AGENTS = {2: META_AGENTS, 4: ACTOR_AGENTS, 5: META_AGENTS}
+# Intra-stage dependencies: the agent starts once the listed agents have
+# replied in the same tick and gets those replies as extra input
+STAGE_DEPENDENCIES = {
+    2: {"meta_supervisor": ["meta_planner", "meta_topology"]},
+    5: {"meta_supervisor": ["meta_planner", "meta_topology"]},
+}
+TEMPERATURE = 0.7
+
+# Prompt-side token budget per model; gathered input is trimmed to fit, lowest
+# priority first (human > meta > actor outputs). Memory may use at most
+# MEMORY_BUDGET_SHARE of the budget and keeps its most recent part.
+MODEL_INPUT_BUDGET = {
+    "gpt-4o-mini": 32_000,
+    "gpt-4o": 48_000,
+}
+DEFAULT_INPUT_BUDGET = 32_000
+MEMORY_BUDGET_SHARE = 0.25
+
+# Provider rate limits per model, enforced by the request governor
+RateLimit = windsurf_governor.RateLimit
+MODEL_RATE_LIMITS = {
+    "gpt-4o-mini": RateLimit(rpm=500, tpm=200_000),
+    "gpt-4o": RateLimit(rpm=500, tpm=30_000),
+}
+DEFAULT_RATE_LIMIT = RateLimit(rpm=500, tpm=30_000)
+GOVERNOR = windsurf_governor.Governor(MODEL_RATE_LIMITS, DEFAULT_RATE_LIMIT)
+
+# Response cache: "use" (read + write), "off" (--no-cache), "only" (--cache-only)
+CACHE_MODE = os.getenv("WINDSURF_CACHE_MODE", "use")
+RESPONSE_CACHE = windsurf_cache.ResponseCache(ROOT / "windsurf" / "cache" / "llm")
+
+BATCH_DIR = ROOT / "windsurf" / "batches"
+
+# Per-tick completion journals; a re-run of an unfinished tick skips agents
+# that already completed with the same input (disable with --no-resume)
+JOURNAL_DIR = ROOT / "windsurf" / "journal"
+RESUME = True
+
+# Message layout, see windsurf_prompt.py ("shared-prefix" | "legacy")
+PROMPT_LAYOUT = windsurf_prompt.DEFAULT_LAYOUT
+
+# Stream replies into outbox/tik<N>/llm.txt.partial while they are generated
+STREAM = os.getenv("WINDSURF_STREAM", "") == "1"
+
+# Where cycles and outbox messages are persisted: "fs" (agents/<id>/… files),
+# "db" (DATABASE_URL) or a database URL; see windsurf/tools/storage.py
+STORAGE_MODE = os.getenv("WINDSURF_STORAGE", "fs")
+
+# Per-call metrics, costed with the per-tier prices listed in LLM_TIERS.md
+METRICS_DIR = ROOT / "windsurf" / "metrics"
+TIER_COSTS = windsurf_metrics.load_tier_costs(ROOT / "windsurf" / "protocols" / "LLM_TIERS.md")
+
+# Token cap of the memory view in prompts; older ticks are summarized into
+# MEMORY_CACHE_DIR in the background (0 = memory.md as is, nothing appended)
+MEMORY_TOKENS = int(os.getenv("WINDSURF_MEMORY_TOKENS", str(windsurf_memory.TOKEN_CAP)))
+MEMORY_CACHE_DIR = ROOT / "windsurf" / "cache" / "memory"
+
+# Retrieval memory: the K most relevant chunks instead of the view (0 = off)
+MEMORY_RETRIEVAL_K = int(os.getenv("WINDSURF_MEMORY_RETRIEVAL", "0"))
+VECTOR_DIR = ROOT / "windsurf" / "vectors"
+
+# Stage 5 input: actor outputs above this many tokens are condensed by a tree
+# of CHEAP-tier summaries before the meta review (0 = never)
+REDUCE_TOKENS = int(os.getenv("WINDSURF_REDUCE_TOKENS", str(windsurf_reduce.REDUCE_THRESHOLD)))
+
+# Stage 4 input: "inbox" (routed per actor, see windsurf_routing.py) or
+# "broadcast" (every actor gets all outputs of the previous tick)
+ROUTING = os.getenv("WINDSURF_ROUTING", "inbox")
+ASSIGNMENTS_FILE = ROOT / "windsurf" / "protocols" / "next_assignments.json"
+
+# Chrome trace files written with --trace (tracing is off by default)
+TRACE_DIR = ROOT / "windsurf" / "traces"
+
+# Max number of agents whose LLM calls are in flight at once (1 = sequential)
+DEFAULT_CONCURRENCY = int(os.getenv("WINDSURF_CONCURRENCY", "1"))
 
 # ---------------------------------------------------------------------------
 # HELPERS
 # ---------------------------------------------------------------------------
 
+_console = threading.local()
+
+
+def log(message: str = "") -> None:
+    """Print *message*, or buffer it while running inside an agent worker.
+
+    Worker threads collect their console lines so that each agent's output is
+    printed as one contiguous block, in agent-list order.
+    """
+    lines = getattr(_console, "lines", None)
+    if lines is None:
+        print(message)
+    else:
+        lines.append(message)
+
+
+@contextmanager
+def capture_log():
+    """Collect :func:`log` output of the current thread into a list."""
+    previous = getattr(_console, "lines", None)
+    _console.lines = lines = []
+    try:
+        yield lines
+    finally:
+        if previous is None:
+            del _console.lines
+        else:
+            _console.lines = previous
+
+
 def load_state() -> dict:
     if GLOBAL_STATE.exists():
         return json.loads(GLOBAL_STATE.read_text())
@@ -88,21 +299,35 @@ def load_state() -> dict:
 
 
 def save_state(state: dict) -> None:
-    GLOBAL_STATE.write_text(json.dumps(state, indent=2))
+    atomic_write_text(GLOBAL_STATE, json.dumps(state, indent=2))
+
+
+def model_tier(system_prompt: str) -> str | None:
+    """The tier named by the **LLM Default:** tag inside system_prompt, if any."""
+    m = re.search(r"\*\*LLM Default:\*\*\s*([A-Z0-9\-]+)", system_prompt)
+    return m.group(1).upper() if m else None
 
 
 def choose_model(system_prompt: str) -> str:
     """Pick model based on **LLM Default:** tag inside system_prompt."""
-    m = re.search(r"\*\*LLM Default:\*\*\s*([A-Z0-9\-]+)", system_prompt)
-    tier = m.group(1).upper() if m else None
+    tier = model_tier(system_prompt)
     model = LLM_MODEL_MAP.get(tier, DEFAULT_MODEL)
     if tier:
-        print(f"  [MODEL] Found tag '{tier}' in system prompt, using model '{model}'")
+        log(f"  [MODEL] Found tag '{tier}' in system prompt, using model '{model}'")
     else:
-        print(f"  [MODEL] No specific model tag found, using default model '{DEFAULT_MODEL}'")
+        log(f"  [MODEL] No specific model tag found, using default model '{DEFAULT_MODEL}'")
     return model
 
 
+def price_tier(tier: str, model: str) -> str:
+    """The tier whose LLM_TIERS.md cost applies to a call of *model* tagged *tier*.
+
+    A tag picks its model only when written as an LLM_MODEL_MAP key
+    ("MEDIUM"); other tags ("LLM-MEDIUM") run DEFAULT_MODEL at DEFAULT_TIER cost.
+    """
+    return tier if LLM_MODEL_MAP.get(tier) == model else DEFAULT_TIER
+
+
 def read_text(path: Path) -> str:
     try:
         return path.read_text()
@@ -114,136 +339,1035 @@ def ensure_dir(path: Path):
     path.mkdir(parents=True, exist_ok=True)
 
 
-def llm_call(model: str, messages: list[dict]) -> str:
-    print(f"  [LLM REQUEST] Calling {model}...")
-    print(f"  [LLM REQUEST] System prompt: {len(messages[0]['content'])} chars")
-    print(f"  [LLM REQUEST] User content: {len(messages[1]['content'])} chars")
-    print(f"  [LLM REQUEST] Waiting for response...")
+def cache_lookup(model: str, messages: list[dict]) -> tuple[str | None, str | None]:
+    """Return (cache key, cached reply) for a request under the current CACHE_MODE.
+
+    Raises CacheMiss in cache-only mode when nothing is stored.
+    """
+    if CACHE_MODE == "off":
+        return None, None
+    key = RESPONSE_CACHE.key(model, messages, TEMPERATURE)
+    cached = RESPONSE_CACHE.get(key)
+    if cached is not None:
+        log(f"  [LLM CACHE] Hit {key[:12]} — {len(cached)} chars, no request sent")
+    elif CACHE_MODE == "only":
+        log(f"  [LLM CACHE] Miss {key[:12]} in cache-only mode")
+        raise windsurf_cache.CacheMiss(key)
+    return key, cached
+
+
+@windsurf_trace.traced("llm_call")
+def llm_call(model: str, messages: list[dict], stream_to: Path | None = None,
+             prompt_tokens: int = 0) -> str:
+    """Send *messages* to *model* and return the reply.
+
+    The call runs under GOVERNOR (rate limits, retries, circuit breaker) and
+    raises LLMCallError when it fails for good; Ctrl-C is not a failure and
+    propagates, so the tick stops and resumes on the next run. With
+    *stream_to* the reply is streamed and appended to that file as it
+    arrives, so a stalled or crashed request still leaves its partial text.
+    """
+    windsurf_trace.annotate(model=model)
+    log(f"  [LLM REQUEST] Calling {model}...")
+    system_chars = sum(len(m["content"]) for m in messages if m["role"] == "system")
+    user_chars = sum(len(m["content"]) for m in messages if m["role"] == "user")
+    log(f"  [LLM REQUEST] System prompt: {system_chars} chars")
+    log(f"  [LLM REQUEST] User content: {user_chars} chars")
+    metrics = windsurf_metrics.current()
+    key, cached = cache_lookup(model, messages)
+    if cached is not None:
+        windsurf_trace.annotate(cached=True)
+        if metrics is not None:
+            metrics.status = "cached"
+        return cached
+    log(f"  [LLM REQUEST] Waiting for response...")
+    if stream_to is None:
+        def request():
+            return windsurf_llm.get_backend().complete(model, messages, TEMPERATURE)
+    else:
+        def request():
+            return _stream_reply(model, messages, stream_to)
+    tokens = prompt_tokens or windsurf_tokens.count_message_tokens(messages, model)
+    stats: dict = {}
+    start = time.monotonic()
     try:
-        # Modern OpenAI API (>=1.0.0) - using the official example from GitHub
-        client = openai.OpenAI(
-            api_key=os.getenv("OPENAI_API_KEY"),
-            timeout=60.0  # 60 second timeout
-        )
-        completion = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=0.7,
-            timeout=60.0  # 60 second timeout
-        )
-        content = completion.choices[0].message.content.strip()
-        print(f"  [LLM RESPONSE] Received {len(content)} chars")
-        return content
+        content = GOVERNOR.call(model, tokens, request, log=log, stats=stats)
     except KeyboardInterrupt:
-        print(f"  [LLM INTERRUPTED] User interrupted the API call")
-        return "[INTERRUPTED] API call was interrupted by the user"
-    except Exception as e:
-        print(f"  [LLM ERROR] {e}")
-        return f"[ERROR] {e}"
+        log(f"  [LLM INTERRUPTED] User interrupted the API call")
+        raise
+    except windsurf_governor.LLMCallError as e:
+        log(f"  [LLM ERROR] {e} ({e.kind}, {e.attempts} attempt(s))")
+        if stream_to is not None and stream_to.exists():
+            kept = stream_to.with_suffix(".failed")
+            os.replace(stream_to, kept)
+            log(f"  [LLM ERROR] Partial reply kept in {kept.name}")
+        raise
+    finally:
+        windsurf_trace.annotate(attempts=stats.get("attempts", 0),
+                                rate_limit_wait=stats.get("waited", 0.0))
+        if metrics is not None:
+            metrics.attempts = stats.get("attempts", 0)
+            metrics.queue_wait += stats.get("waited", 0.0)
+            metrics.latency = time.monotonic() - start - stats.get("waited", 0.0)
+    log(f"  [LLM RESPONSE] Received {len(content)} chars")
+    if key is not None:
+        RESPONSE_CACHE.put(key, model, content)
+    return content
+
+
+def _stream_reply(model: str, messages: list[dict], partial: Path) -> str:
+    ensure_dir(partial.parent)
+    log(f"  [LLM STREAM] Writing tokens to {partial.relative_to(AGENTS_DIR.parent)}")
+    parts = []
+    start = time.monotonic()
+    first = None
+    with open(partial, "w") as f:
+        for fragment in windsurf_llm.get_backend().stream(model, messages, TEMPERATURE):
+            if first is None:
+                first = time.monotonic()
+            parts.append(fragment)
+            f.write(fragment)
+            f.flush()
+    end = time.monotonic()
+    content = "".join(parts).strip()
+    if first is not None:
+        metrics = windsurf_metrics.current()
+        if metrics is not None:
+            metrics.ttft = first - start
+        tokens = windsurf_tokens.count_tokens(content, model)
+        rate = tokens / (end - first) if end > first else float("inf")
+        log(f"  [LLM STREAM] time-to-first-token {first - start:.2f}s, "
+            f"{tokens} tokens in {end - start:.2f}s ({rate:.1f} tokens/s)")
+    return content
+
+
+def input_budget(model: str) -> int:
+    """Prompt token budget for *model* (env WINDSURF_INPUT_TOKEN_BUDGET overrides)."""
+    override = os.getenv("WINDSURF_INPUT_TOKEN_BUDGET")
+    if override:
+        return int(override)
+    return MODEL_INPUT_BUDGET.get(model, DEFAULT_INPUT_BUDGET)
+
+
+def chunk_priority(agent: str) -> int:
+    """Budget priority of an agent's outputs; higher survives trimming longer."""
+    if agent == HUMAN_ID:
+        return 2
+    if agent in META_AGENTS:
+        return 1
+    return 0
+
+
+_tick_indexes: dict[Path, windsurf_index.TickIndex] = {}
+
+
+def tick_index() -> windsurf_index.TickIndex:
+    """The tick index for AGENTS_DIR (one connection per process)."""
+    if AGENTS_DIR not in _tick_indexes:
+        _tick_indexes[AGENTS_DIR] = windsurf_index.TickIndex(AGENTS_DIR)
+    return _tick_indexes[AGENTS_DIR]
+
+
+_storages: dict[tuple[Path, str], windsurf_storage.TickStorage] = {}
+
+
+def storage() -> windsurf_storage.TickStorage:
+    """The storage backend for AGENTS_DIR and STORAGE_MODE (opened once)."""
+    key = (AGENTS_DIR, STORAGE_MODE)
+    if key not in _storages:
+        _storages[key] = windsurf_storage.open_storage(AGENTS_DIR, STORAGE_MODE)
+    return _storages[key]
+
+
+def close_storage() -> None:
+    while _storages:
+        _storages.popitem()[1].close()
+
+
+_recorders: dict[Path, windsurf_metrics.MetricsRecorder] = {}
+_recorders_lock = threading.Lock()
+
+
+def metrics_recorder(tick: int) -> windsurf_metrics.MetricsRecorder:
+    """The metrics recorder of *tick* (one per file, shared by all threads)."""
+    path = windsurf_metrics.metrics_path(tick, METRICS_DIR)
+    with _recorders_lock:
+        if path not in _recorders:
+            _recorders[path] = windsurf_metrics.MetricsRecorder(path)
+        return _recorders[path]
+
+
+def cheap_completion(instructions: str, content: str, purpose: str,
+                     tick: int | None = None) -> str | None:
+    """One CHEAP-tier call for housekeeping work; None when it cannot be made.
+
+    Runs in worker threads, so its console output is discarded. With *tick*
+    the call is recorded in that tick's metrics, as agent "(<purpose>)".
+    """
+    model = LLM_MODEL_MAP["CHEAP"]
+    messages = [{"role": "system", "content": instructions}, {"role": "user", "content": content}]
+    prompt_tokens = windsurf_tokens.count_message_tokens(messages, model)
+    metrics = windsurf_metrics.CallMetrics(tick or 0, stage_of(tick) if tick else 0,
+                                           f"({purpose})", model, "CHEAP",
+                                           prompt_tokens=prompt_tokens)
+    reply = None
+    try:
+        with capture_log(), windsurf_metrics.measure(metrics):
+            reply = llm_call(model, messages, prompt_tokens=prompt_tokens)
+    except windsurf_cache.CacheMiss:
+        metrics.status = "skipped"
+    except windsurf_governor.LLMCallError:
+        metrics.status = "failed"
+    else:
+        metrics.completion_tokens = windsurf_tokens.count_tokens(reply, model)
+        metrics.cost = 0.0 if metrics.status == "cached" else windsurf_metrics.estimate_cost(
+            "CHEAP", prompt_tokens, metrics.completion_tokens, TIER_COSTS)
+    if tick is not None:
+        metrics_recorder(tick).record(metrics)
+    return reply
+
+
+def summarize_memory(summary: str, sections: str, max_tokens: int, tick: int | None = None) -> str:
+    """Fold memory *sections* into *summary* with a CHEAP-tier call (recorded for *tick*)."""
+    folded = cheap_completion(
+        "You maintain an agent's long-term memory. Merge the new tick entries into the "
+        "summary. Keep decisions, commitments, open tasks, contacts and facts; drop "
+        f"repetition. Answer with the updated summary only, at most {max_tokens} tokens.",
+        f"SUMMARY:\n{summary or '(empty)'}\n\nNEW ENTRIES:\n{sections}", "memory", tick)
+    if folded is None:
+        return windsurf_memory.extractive_summary(summary, sections, max_tokens, LLM_MODEL_MAP["CHEAP"])
+    return folded
+
+
+def summarize_outputs(outputs: str, max_tokens: int, tick: int | None = None) -> str:
+    """Condense a group of agent outputs for the meta review with a CHEAP-tier call.
+
+    The call is recorded in the metrics of *tick*, if given.
+    """
+    digest = cheap_completion(
+        "Condense these agent outputs for a meta-agent review. For every agent keep its "
+        "name, the actions taken, results, open problems and anything it asks of the meta "
+        f"layer; drop boilerplate. Answer with the digest only, at most {max_tokens} tokens.",
+        outputs, "reduce", tick)
+    if digest is None:  # cache-only miss or failed call: fall back to the heads
+        return windsurf_tokens.truncate_tokens(outputs, max_tokens, LLM_MODEL_MAP["CHEAP"])
+    return digest
+
+
+@windsurf_trace.traced("reduce")
+def reduce_outputs(tick: int, chunks: list[Chunk]) -> list[Chunk]:
+    """Tree-reduce the actor outputs in *chunks* once they exceed REDUCE_TOKENS."""
+    actors = [c for c in chunks if c.source.split("/")[0] not in (HUMAN_ID, *META_AGENTS)]
+    others = [c for c in chunks if c not in actors]
+    summarize = functools.partial(summarize_outputs, tick=tick)
+    reduced, stats = windsurf_reduce.tree_reduce(actors, summarize, REDUCE_TOKENS,
+                                                 model=LLM_MODEL_MAP["CHEAP"])
+    if stats.levels:
+        print(f"[REDUCE] Tick {tick}: {len(actors)} outputs ({stats.tokens_in} tokens) → "
+              f"{len(reduced)} digest(s) ({stats.tokens_out} tokens) in {stats.levels} level(s), "
+              f"{stats.calls} {LLM_MODEL_MAP['CHEAP']} call(s)")
+    return others + reduced
+
+
+_compactors: dict[Path, windsurf_memory.MemoryCompactor] = {}
+
+
+def memory_compactor() -> windsurf_memory.MemoryCompactor:
+    """The memory compactor for AGENTS_DIR (one background pool per process)."""
+    if AGENTS_DIR not in _compactors:
+        _compactors[AGENTS_DIR] = windsurf_memory.MemoryCompactor(
+            MEMORY_CACHE_DIR, summarize_memory, cap=MEMORY_TOKENS)
+    return _compactors[AGENTS_DIR]
+
+
+def retrieved_memory(agent: str, tick: int | None, query) -> str:
+    """The MEMORY_RETRIEVAL_K chunks of *agent*'s memory closest to the *query* vector."""
+    import windsurf_retrieval
+
+    index = windsurf_retrieval.VectorIndex(VECTOR_DIR / agent, windsurf_retrieval.get_embedder())
+    added = index.update(windsurf_retrieval.agent_sources(AGENTS_DIR / agent, tick))
+    hits = index.search(query, MEMORY_RETRIEVAL_K)
+    log(f"  [MEMORY] {agent}: {len(hits)}/{len(index.chunks)} chunks retrieved "
+        f"({added} newly indexed)")
+    return windsurf_retrieval.render_hits(hits)
+
+
+def close_memory() -> None:
+    """Finish the background memory compaction (before closing the backends)."""
+    while _compactors:
+        _compactors.popitem()[1].close()
+
+
+@windsurf_trace.traced("gather_inputs")
+def gather_prev_chunks(target_tick: int) -> list[Chunk]:
+    """Collect outbox messages from tick=N as prioritised chunks."""
+    if target_tick < 1:
+        return []
+    if not isinstance(storage(), windsurf_storage.FileStorage):
+        return [
+            Chunk(f"{m.agent}/{m.name}", m.text, chunk_priority(m.agent))
+            for m in storage().messages(target_tick, "outbox")
+            if m.name.endswith(".txt")
+        ]
+    index = tick_index()
+    index.refresh(ticks=[target_tick])
+    return [
+        Chunk(f"{f.agent}/{f.name}", read_text(f.path), chunk_priority(f.agent))
+        for f in index.files(target_tick, kind="outbox")
+        if f.name.endswith(".txt")
+    ]
 
 
 def gather_prev_outputs(target_tick: int) -> str:
     """Concatenate outbox messages from tick=N into a single string."""
-    if target_tick < 1:
-        return ""
-    chunks = []
-    for agent_dir in AGENTS_DIR.iterdir():
-        out_dir = agent_dir / "outbox" / f"tik{target_tick}"
-        if out_dir.exists():
-            for f in out_dir.glob("*.txt"):
-                chunks.append(f"# {agent_dir.name}/{f.name}\n" + read_text(f))
-    return "\n\n".join(chunks)
+    return windsurf_tokens.render_chunks(gather_prev_chunks(target_tick))
+
+
+@windsurf_trace.traced("route")
+def gather_routed_chunks(tick: int, agent_list: list[str]) -> dict[str, list[Chunk]] | None:
+    """Route the meta outputs of ticks N-1 and N-2 into the actors' inboxes.
+
+    Returns each agent's input – the non-meta outputs of tick N-1 (the
+    human prompt), then its own inbox/tik<N>/ messages – or None when
+    nothing was routed, so the caller falls back to the broadcast.
+    """
+    store = storage()
+    sources = [m for prev in (tick - 1, tick - 2) if prev >= 1
+               for m in store.messages(prev, "outbox")
+               if m.agent in META_AGENTS and m.name.endswith(".txt")]
+    routed = windsurf_routing.route_stage(store, tick, sources, agent_list, ASSIGNMENTS_FILE)
+    if not routed:
+        print("[ROUTING] No routed assignments found — broadcasting the previous tick's outputs")
+        return None
+    print(f"[ROUTING] Tick {tick}: {sum(map(len, routed.values()))} inbox message(s) for "
+          f"{len(routed)}/{len(agent_list)} agents")
+    shared = [c for c in gather_prev_chunks(tick - 1) if c.source.split("/")[0] not in META_AGENTS]
+    inboxes: dict[str, list[Chunk]] = {agent: [] for agent in agent_list}
+    for m in store.messages(tick, "inbox"):
+        if m.agent in inboxes:
+            sender = m.name.removeprefix(windsurf_routing.SENDER_PREFIX).rsplit(".", 1)[0]
+            inboxes[m.agent].append(Chunk(f"inbox/{m.name}", m.text, chunk_priority(sender)))
+    return {agent: shared + inbox for agent, inbox in inboxes.items()}
 
 
 # ---------------------------------------------------------------------------
 # MAIN TICK LOGIC
 # ---------------------------------------------------------------------------
 
-def human_input(tick: int):
-    print("\n=== HUMAN INPUT REQUIRED ===")
-    prompt = input(f"Enter your prompt for tick {tick}: \n> ")
-    out_dir = AGENTS_DIR / HUMAN_ID / "outbox" / f"tik{tick}"
-    ensure_dir(out_dir)
-    file = out_dir / "kickoff.txt"
-    file.write_text(f"Tick: {tick}\nTimestamp: {datetime.now().isoformat()}\nPrompt: {prompt}\n")
-    print(f"Saved human prompt to {file}\n")
-
-
-def run_agents(tick: int, agent_list: list[str], user_content: str):
-    print(f"\n=== PROCESSING {len(agent_list)} AGENTS FOR TICK {tick} ===\n")
-    print(f"Input content: {len(user_content)} characters")
-    print(f"Agents to process: {', '.join(agent_list)}\n")
-    
-    for i, agent in enumerate(agent_list):
+def human_input(tick: int, prompt: str | None = None):
+    """Store the human prompt for *tick*, asking on the terminal unless given."""
+    if prompt is None:
+        print("\n=== HUMAN INPUT REQUIRED ===")
+        prompt = input(f"Enter your prompt for tick {tick}: \n> ")
+    storage().write_message(HUMAN_ID, tick, "outbox", "kickoff.txt",
+                            f"Tick: {tick}\nTimestamp: {datetime.now().isoformat()}\nPrompt: {prompt}\n")
+    print(f"Saved human prompt to {HUMAN_ID}/outbox/tik{tick}/kickoff.txt\n")
+
+
+@dataclass
+class AgentRequest:
+    """One agent's prepared LLM request for a stage."""
+    agent: str
+    model: str
+    messages: list[dict]
+    log_lines: list[str] = field(default_factory=list)  # console output of the preparation
+    prompt_tokens: int = 0
+    input_sha256: str = ""  # hash of (model, messages, temperature)
+    tier: str = DEFAULT_TIER
+    queued_at: float = 0.0  # time.monotonic() when the stage dispatched the request
+    metrics: windsurf_metrics.CallMetrics | None = None
+
+
+@windsurf_trace.traced("prepare_agents")
+def prepare_agents(agent_list: list[str], chunks: list[Chunk] | dict[str, list[Chunk]],
+                   tick: int | None = None) -> list[AgentRequest]:
+    """Read prompts and memory and assemble each agent's request within budget.
+
+    The stage input is fitted once per model (against the largest system
+    prompt and memory share among that model's agents), so all agents using
+    the same model still receive a byte-identical stage input. With routed
+    input (*chunks* per agent) each agent's input is fitted on its own.
+
+    Memory is the capped view of memory.md as it was before *tick*, or with
+    MEMORY_RETRIEVAL_K the chunks of it most similar to the agent's input.
+    """
+    prompts = {}
+    tiers = {}
+    queries: dict[str, object] = {}  # input text -> query vector
+    for agent in agent_list:
         agent_dir = AGENTS_DIR / agent
-        sys_prompt = read_text(agent_dir / "system_prompt.md")
-        memory = read_text(agent_dir / "memory.md")
-        model = choose_model(sys_prompt)
-        messages = [
-            {"role": "system", "content": sys_prompt},
-            {"role": "user", "content": user_content + "\n\nMEMORY:\n" + memory},
-        ]
-        print(f"\n[{i+1}/{len(agent_list)}] PROCESSING {agent} — model: {model}")
-        
-        # Make the LLM call
-        reply = llm_call(model, messages)
-        
-        # Show the response
-        print(f"\n[OUTPUT] {agent} response:")
-        print(indent(reply[:500], "    "))
-        if len(reply) > 500:
-            print(f"    ... (truncated, {len(reply)} total chars)")
-        
-        # Persist to files
-        print(f"[SAVING] Writing output to cycles/{tick}.json and outbox/tik{tick}/llm.txt")
-        cycles_dir = agent_dir / "cycles"
-        ensure_dir(cycles_dir)
-        with open(cycles_dir / f"{tick}.json", "w") as f:
-            json.dump({"thought_action_result": reply}, f, indent=2)
-        out_dir = agent_dir / "outbox" / f"tik{tick}"
-        ensure_dir(out_dir)
-        (out_dir / "llm.txt").write_text(reply)
-        print(f"[DONE] {agent} processing complete\n")
-
-
-def main():
+        with capture_log() as lines:
+            sys_prompt = read_text(agent_dir / "system_prompt.md")
+            memory = read_text(agent_dir / "memory.md")
+            if MEMORY_RETRIEVAL_K > 0:
+                import windsurf_retrieval
+
+                query = windsurf_tokens.render_chunks(
+                    chunks.get(agent, []) if isinstance(chunks, dict) else chunks)
+                if query not in queries:
+                    queries[query] = windsurf_retrieval.embed_query(
+                        windsurf_retrieval.get_embedder(), query)
+                memory = retrieved_memory(agent, tick, queries[query])
+            elif MEMORY_TOKENS > 0:
+                if tick is not None:
+                    memory = windsurf_memory.before_tick(memory, tick)
+                memory = memory_compactor().compact(
+                    memory, functools.partial(summarize_memory, tick=tick))
+            model = choose_model(sys_prompt)
+        tiers[agent] = windsurf_metrics.normalize_tier(model_tier(sys_prompt) or DEFAULT_TIER)
+        prompts[agent] = (sys_prompt, memory, model, lines)
+
+    def input_key(agent: str) -> tuple[str, str | None]:  # (model, owner of routed input)
+        return prompts[agent][2], agent if isinstance(chunks, dict) else None
+
+    stage_inputs: dict[tuple, tuple[str, int, int]] = {}  # input key -> (text, tokens, trimmed)
+    for key in {input_key(agent) for agent in agent_list}:
+        model, owner = key
+        budget = input_budget(model)
+        memory_cap = int(budget * MEMORY_BUDGET_SHARE)
+        same_input = [prompts[agent] for agent in agent_list if input_key(agent) == key]
+        reserved = max(
+            windsurf_tokens.count_tokens(sys_prompt, model)
+            + min(windsurf_tokens.count_tokens(memory, model), memory_cap)
+            for sys_prompt, memory, _, _ in same_input
+        )
+        fitted, trimmed = windsurf_tokens.fit_chunks(chunks[owner] if owner else chunks,
+                                                     budget - reserved, model)
+        text = windsurf_tokens.render_chunks(fitted)
+        stage_inputs[key] = (text, windsurf_tokens.count_tokens(text, model), trimmed)
+
+    requests = []
+    for agent in agent_list:
+        sys_prompt, memory, model, lines = prompts[agent]
+        stage_input, stage_tokens, trimmed = stage_inputs[input_key(agent)]
+        budget = input_budget(model)
+        memory_budget = min(int(budget * MEMORY_BUDGET_SHARE),
+                            budget - stage_tokens - windsurf_tokens.count_tokens(sys_prompt, model))
+        memory_tokens = windsurf_tokens.count_tokens(memory, model)
+        if memory_tokens > memory_budget:
+            memory = windsurf_tokens.truncate_tokens(memory, memory_budget, model, keep="tail")
+            trimmed += memory_tokens - windsurf_tokens.count_tokens(memory, model)
+        messages = windsurf_prompt.build_messages(sys_prompt, stage_input, memory, PROMPT_LAYOUT)
+        prompt_tokens = windsurf_tokens.count_message_tokens(messages, model)
+        lines.append(f"  [TOKENS] {agent}: {prompt_tokens} prompt tokens "
+                     f"(budget {budget}, trimmed {trimmed})")
+        input_sha256 = windsurf_cache.ResponseCache.key(model, messages, TEMPERATURE)
+        requests.append(AgentRequest(agent, model, messages, lines, prompt_tokens, input_sha256,
+                                     tiers[agent]))
+    return requests
+
+
+def show_reply(agent: str, reply: str) -> None:
+    log(f"\n[OUTPUT] {agent} response:")
+    log(indent(reply[:500], "    "))
+    if len(reply) > 500:
+        log(f"    ... (truncated, {len(reply)} total chars)")
+
+
+def process_agent(tick: int, request: AgentRequest, index: int,
+                  total: int) -> str | windsurf_governor.LLMCallError | None:
+    """Call the LLM for a prepared *request* and return the reply.
+
+    Returns the LLMCallError when the call failed, and None when the agent
+    was skipped (cache-only mode without a hit).
+    """
+    for line in request.log_lines:
+        log(line)
+    log(f"\n[{index}/{total}] PROCESSING {request.agent} — model: {request.model}")
+
+    # Make the LLM call
+    stream_to = None
+    if STREAM:
+        stream_to = AGENTS_DIR / request.agent / "outbox" / f"tik{tick}" / "llm.txt.partial"
+    metrics = request.metrics = windsurf_metrics.CallMetrics(
+        tick, stage_of(tick), request.agent, request.model, request.tier,
+        queue_wait=time.monotonic() - request.queued_at if request.queued_at else 0.0,
+        prompt_tokens=request.prompt_tokens,
+    )
+    try:
+        with windsurf_trace.span("agent", agent=request.agent, tick=tick), \
+                windsurf_metrics.measure(metrics):
+            reply = llm_call(request.model, request.messages, stream_to, request.prompt_tokens)
+    except windsurf_cache.CacheMiss:
+        log(f"[SKIPPED] {request.agent}: no cached reply (cache-only mode)")
+        metrics.status = "skipped"
+        return None
+    except windsurf_governor.LLMCallError as e:
+        metrics.status = "failed"
+        return e
+
+    # Show the response
+    metrics.completion_tokens = windsurf_tokens.count_tokens(reply, request.model)
+    if metrics.status != "cached":
+        metrics.cost = windsurf_metrics.estimate_cost(
+            price_tier(request.tier, request.model), metrics.prompt_tokens,
+            metrics.completion_tokens, TIER_COSTS)
+    else:
+        metrics.cost = 0.0
+    log(f"  [TOKENS] {request.agent}: in={request.prompt_tokens} "
+        f"out={metrics.completion_tokens}")
+    show_reply(request.agent, reply)
+    return reply
+
+
+def _process_agent_buffered(*args) -> tuple[str | windsurf_governor.LLMCallError | None, list[str]]:
+    """Run :func:`process_agent` in a worker, capturing its console lines."""
+    with capture_log() as lines:
+        reply = process_agent(*args)
+    return reply, lines
+
+
+@windsurf_trace.traced("persist")
+def persist_agent(tick: int, agent: str,
+                  reply: str | windsurf_governor.LLMCallError | None) -> None:
+    """Write *reply* to the agent's cycles/<tick>.json and outbox/tik<tick>/llm.txt.
+
+    A failed call is recorded as {"status": "failed", "error": {...}} in the
+    cycle file only, so its error text never reaches the next stage's input.
+    """
+    if reply is None:
+        return
+    store = storage()
+    if isinstance(reply, windsurf_governor.LLMCallError):
+        print(f"[FAILED] {agent}: {reply} — recording failure in cycles/{tick}.json\n")
+        store.write_cycle(agent, tick, {"status": "failed", "error": reply.as_record()})
+        store.delete_message(agent, tick, "outbox", "llm.txt")  # drop output of an earlier attempt
+        return
+    print(f"[SAVING] Writing output to cycles/{tick}.json and outbox/tik{tick}/llm.txt")
+    store.write_cycle(agent, tick, {"thought_action_result": reply})
+    # Files are finalised through llm.txt.partial, so llm.txt never holds a
+    # partial reply; with a database the streamed preview is just dropped.
+    store.write_message(agent, tick, "outbox", "llm.txt", reply)
+    (AGENTS_DIR / agent / "outbox" / f"tik{tick}" / "llm.txt.partial").unlink(missing_ok=True)
+    print(f"[DONE] {agent} processing complete\n")
+
+
+def finish_agent(tick: int, request: AgentRequest,
+                 reply: str | windsurf_governor.LLMCallError | None,
+                 journal: windsurf_journal.TickJournal,
+                 recorder: windsurf_metrics.MetricsRecorder | None = None) -> None:
+    """Persist *reply*, remember it and record the outcome in the journal and metrics."""
+    persist_agent(tick, request.agent, reply)
+    if isinstance(reply, str) and MEMORY_TOKENS > 0:
+        log_text = windsurf_memory.append_entry(AGENTS_DIR / request.agent / "memory.md", tick,
+                                                windsurf_memory.learning(reply, request.model))
+        # summarized while the stage goes on, recorded for this tick
+        memory_compactor().prefetch(log_text, functools.partial(summarize_memory, tick=tick))
+    if recorder is not None and request.metrics is not None:
+        recorder.record(request.metrics)
+    if reply is None:
+        return
+    if isinstance(reply, windsurf_governor.LLMCallError):
+        journal.record(request.agent, request.input_sha256, "failed",
+                       f"{request.agent}/cycles/{tick}.json")
+    else:
+        journal.record(request.agent, request.input_sha256, "ok",
+                       f"{request.agent}/outbox/tik{tick}/llm.txt")
+
+
+def failed_agents(tick: int, agent_list: list[str]) -> list[str]:
+    """Agents of *agent_list* whose cycles/<tick>.json records a failed call."""
+    failed = []
+    for agent in agent_list:
+        cycle = storage().read_cycle(agent, tick)
+        if cycle and cycle.get("status") == "failed":
+            failed.append(agent)
+    return failed
+
+
+def run_agents(tick: int, agent_list: list[str],
+               user_content: str | list[Chunk] | dict[str, list[Chunk]],
+               concurrency: int = DEFAULT_CONCURRENCY, batch: str | None = None) -> dict:
+    """Run every agent in *agent_list* against *user_content*.
+
+    *user_content* is either plain text, the prioritised chunks from
+    :func:`gather_prev_chunks`, which are trimmed to each model's budget, or
+    per-agent chunks from :func:`gather_routed_chunks`.
+
+    With ``concurrency > 1`` up to that many LLM calls are in flight at once.
+    Results are still printed and persisted strictly in *agent_list* order, so
+    the console log and the files on disk do not depend on which call returns
+    first. With *batch* set to a windsurf_batch backend name, all requests are
+    submitted as one bulk job instead. Stages with STAGE_DEPENDENCIES are
+    scheduled by :func:`_run_agents_dag` instead.
+
+    Returns counts of agents {"processed", "resumed", "failed"}.
+    """
+    total = len(agent_list)
+    chunks = [Chunk("", user_content)] if isinstance(user_content, str) else user_content
+    print(f"\n=== PROCESSING {total} AGENTS FOR TICK {tick} ===\n")
+    if isinstance(chunks, dict):
+        routed = [c for agent in agent_list for c in chunks.get(agent, [])]
+        print(f"Input content: {len(windsurf_tokens.render_chunks(routed))} characters "
+              f"in {len(routed)} chunk(s), routed per agent")
+    else:
+        print(f"Input content: {len(windsurf_tokens.render_chunks(chunks))} characters "
+              f"in {len(chunks)} chunk(s)")
+    print(f"Agents to process: {', '.join(agent_list)}")
+    print(f"Prompt layout: {PROMPT_LAYOUT}")
+    if batch:
+        print(f"Mode: batch via '{batch}'\n")
+    else:
+        print(f"Concurrency: {max(1, min(concurrency, total))}\n")
+    declared = STAGE_DEPENDENCIES.get(stage_of(tick), {})
+    dependents = [a for a in agent_list if declared.get(a)]
+    for agent in dependents:
+        print(f"Dependencies: {agent} ← {', '.join(declared[agent])}")
+    RESPONSE_CACHE.reset_stats()
+    # dependents are prepared once their dependencies have replied
+    requests = prepare_agents([a for a in agent_list if a not in dependents], chunks, tick)
+    journal = windsurf_journal.TickJournal(JOURNAL_DIR / f"tik{tick}.jsonl")
+    recorder = metrics_recorder(tick)
+    pending = _not_completed(tick, requests, journal)
+    if len(pending) < len(requests):
+        print(f"[RESUME] {len(pending)}/{len(requests)} agents left to process\n")
+
+    # One storage transaction per stage: database backends commit the whole
+    # stage at once (the journal re-runs agents whose output never landed).
+    with windsurf_trace.span("run_agents", tick=tick, agents=len(pending), batch=batch,
+                             concurrency=concurrency), storage().transaction():
+        if dependents:
+            prepared, ran = _run_agents_dag(tick, agent_list, pending, declared, chunks,
+                                            concurrency, batch, journal, recorder)
+            requests, pending = requests + prepared, pending + ran
+        elif batch:
+            _run_agents_batch(tick, pending, batch, journal, recorder)
+        elif concurrency <= 1 or len(pending) <= 1:
+            for i, request in enumerate(pending):
+                request.queued_at = time.monotonic()
+                try:
+                    reply = process_agent(tick, request, i + 1, len(pending))
+                except KeyboardInterrupt:
+                    _journal_interrupted(tick, [request], journal)
+                    raise
+                finish_agent(tick, request, reply, journal, recorder)
+        else:
+            _run_agents_parallel(tick, pending, concurrency, journal, recorder)
+
+    failed = failed_agents(tick, agent_list)
+    if failed:
+        print(f"[FAILED] {len(failed)}/{total} agents failed: {', '.join(failed)} — "
+              f"re-run them with --rerun-failed --tick {tick}")
+    if CACHE_MODE != "off":
+        RESPONSE_CACHE.evict()
+        print(f"[CACHE] Tick {tick}: {RESPONSE_CACHE.summary()}")
+    shared, prompt_tokens = windsurf_prompt.shared_prefix_tokens(
+        [(r.model, r.messages) for r in requests]
+    )
+    if prompt_tokens:
+        print(f"[PROMPT] Tick {tick}: {shared}/{prompt_tokens} prompt tokens in shared "
+              f"prefixes ({100 * shared / prompt_tokens:.0f}% prefix-cacheable)")
+    measured = [r.metrics.as_record() for r in pending if r.metrics is not None]
+    if measured:
+        (stats,) = windsurf_metrics.aggregate(measured, by="tick")
+        latency = (f"latency p50 {stats['latency_p50']}s / p95 {stats['latency_p95']}s, "
+                   if stats["latency_p50"] is not None else "")
+        print(f"[METRICS] Tick {tick}: {latency}{stats['prompt_tokens']} in / "
+              f"{stats['completion_tokens']} out tokens, est. ${stats['cost']:.4f} "
+              f"(details: windsurf_tick_viewer.py metrics)")
+    return {"processed": len(pending), "resumed": total - len(pending), "failed": len(failed)}
+
+
+def _journal_interrupted(tick: int, requests: list[AgentRequest],
+                         journal: windsurf_journal.TickJournal) -> None:
+    """Record *requests* as interrupted; the next run of the tick processes them again."""
+    for request in requests:
+        journal.record(request.agent, request.input_sha256, "interrupted", "")
+    print(f"\n[INTERRUPTED] Tick {tick} stopped before {', '.join(r.agent for r in requests)} "
+          f"finished — run again to resume")
+
+
+def _not_completed(tick: int, requests: list[AgentRequest],
+                   journal: windsurf_journal.TickJournal) -> list[AgentRequest]:
+    """*requests* minus those the journal shows completed with the same input (RESUME)."""
+    if not RESUME:
+        return list(requests)
+    pending = []
+    for request in requests:
+        if (journal.completed(request.agent, request.input_sha256)
+                and storage().has_message(request.agent, tick, "outbox", "llm.txt")):
+            print(f"[RESUME] {request.agent} already completed tick {tick} with this input — skipped")
+        else:
+            pending.append(request)
+    return pending
+
+
+def dependency_chunks(tick: int, agent: str, deps: list[str]) -> list[Chunk]:
+    """The tick-*tick* replies of *deps*, as extra input for *agent*."""
+    replies = {m.agent: m.text for m in storage().messages(tick, "outbox")
+               if m.agent in deps and m.name == "llm.txt"}
+    missing = [d for d in deps if d not in replies]
+    if missing:
+        print(f"[DAG] {agent}: no tick {tick} reply from {', '.join(missing)} — running without it")
+    # same-tick analyses outrank the previous tick's input when trimming
+    return [Chunk(f"{d}/llm.txt (tick {tick})", replies[d], chunk_priority(d) + 1)
+            for d in deps if d in replies]
+
+
+def _run_agents_dag(tick: int, agent_list: list[str], pending: list[AgentRequest],
+                    declared: dict[str, list[str]], chunks: list[Chunk] | dict[str, list[Chunk]],
+                    concurrency: int, batch: str | None, journal: windsurf_journal.TickJournal,
+                    recorder: windsurf_metrics.MetricsRecorder
+                    ) -> tuple[list[AgentRequest], list[AgentRequest]]:
+    """Run a stage whose agents depend on each other (see windsurf_dag.py).
+
+    *pending* are the prepared requests of the agents without dependencies.
+    Returns (dependents' requests, those of them that were run).
+    """
+    deps = windsurf_dag.restrict(agent_list, declared)
+    queued = {r.agent: r for r in pending}
+    prepared: list[AgentRequest] = []
+    ran: list[AgentRequest] = []
+
+    def request_for(agent: str) -> AgentRequest | None:
+        if not declared.get(agent):
+            return queued.get(agent)  # None: resumed
+        base = chunks.get(agent, []) if isinstance(chunks, dict) else chunks
+        (request,) = prepare_agents([agent], {agent: base + dependency_chunks(tick, agent, declared[agent])},
+                                    tick)
+        prepared.append(request)
+        if _not_completed(tick, [request], journal):
+            ran.append(request)
+            return request
+        return None
+
+    if batch:  # one bulk job per dependency level, each in its own job directory
+        for level, wave in enumerate(windsurf_dag.levels(agent_list, deps), 1):
+            requests = [r for r in map(request_for, wave) if r is not None]
+            if requests:
+                _run_agents_batch(tick, requests, batch, journal, recorder,
+                                  BATCH_DIR / f"tik{tick}" / f"level{level}")
+        return prepared, ran
+
+    running: dict[str, AgentRequest] = {}
+    numbers = iter(range(1, len(agent_list) + 1))
+
+    def start(agent: str):
+        request = request_for(agent)
+        if request is None:
+            return None
+        running[agent] = request
+        request.queued_at = time.monotonic()
+        args = (tick, request, next(numbers), len(agent_list))
+        return lambda: _process_agent_buffered(*args)
+
+    def finish(agent: str, result) -> None:
+        reply, lines = result
+        for line in lines:
+            print(line)
+        finish_agent(tick, running.pop(agent), reply, journal, recorder)
+
+    timings = windsurf_dag.run_dag(agent_list, deps, start, finish, concurrency)
+    path = windsurf_dag.critical_path(deps, timings)
+    if path:
+        wall = max(t.end for t in timings.values())
+        print(f"[DAG] Tick {tick}: critical path {windsurf_dag.describe_path(path, timings)} "
+              f"of {wall:.1f}s stage time")
+        windsurf_trace.annotate(critical_path=" → ".join(path))
+    return prepared, ran
+
+
+def _run_agents_parallel(tick: int, requests: list[AgentRequest], concurrency: int,
+                         journal: windsurf_journal.TickJournal,
+                         recorder: windsurf_metrics.MetricsRecorder | None = None) -> None:
+    total = len(requests)
+    pool = ThreadPoolExecutor(max_workers=min(concurrency, total),
+                              thread_name_prefix="windsurf-agent")
+    finished = 0
+    try:
+        futures = []
+        for i, request in enumerate(requests):
+            request.queued_at = time.monotonic()
+            futures.append(pool.submit(windsurf_trace.bind(_process_agent_buffered),
+                                       tick, request, i + 1, total))
+        # Drain in submission order: wall time is bounded by the slowest agent,
+        # while output and persistence stay deterministic.
+        for request, future in zip(requests, futures):
+            reply, lines = future.result()
+            for line in lines:
+                print(line)
+            finish_agent(tick, request, reply, journal, recorder)
+            finished += 1
+    except BaseException as exc:
+        if isinstance(exc, KeyboardInterrupt):
+            print("\n[INTERRUPTED] Cancelling pending agents...")
+            _journal_interrupted(tick, requests[finished:], journal)
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+
+def _run_agents_batch(tick: int, requests: list[AgentRequest], backend_name: str,
+                      journal: windsurf_journal.TickJournal,
+                      recorder: windsurf_metrics.MetricsRecorder | None = None,
+                      job_dir: Path | None = None) -> None:
+    """Run *requests* as one bulk job tracked in *job_dir* (default BATCH_DIR/tik<tick>).
+
+    Requests the job did not answer (failed, expired or cancelled job, or a
+    per-request error) are recorded as failed calls, like the interactive path.
+    """
+    total = len(requests)
+    replies: dict[str, str | None] = {}
+    pending: dict[str, tuple[str | None, str]] = {}  # agent -> (cache key, model)
+    lines = []
+    for i, request in enumerate(requests):
+        agent = request.agent
+        for line in request.log_lines:
+            print(line)
+        print(f"[{i+1}/{total}] QUEUED {agent} — model: {request.model}")
+        try:
+            key, cached = cache_lookup(request.model, request.messages)
+        except windsurf_cache.CacheMiss:
+            print(f"[SKIPPED] {agent}: no cached reply (cache-only mode)")
+            replies[agent] = None
+            continue
+        if cached is not None:
+            replies[agent] = cached
+            continue
+        pending[agent] = (key, request.model)
+        lines.append(windsurf_batch.request_line(agent, request.model, request.messages, TEMPERATURE))
+
+    if lines:
+        backend = windsurf_batch.BATCH_BACKENDS[backend_name](BATCH_DIR)
+        results = windsurf_batch.run_batch(job_dir or BATCH_DIR / f"tik{tick}", lines, backend)
+        for agent, (key, model) in pending.items():
+            result = results[agent]
+            if isinstance(result, Exception):
+                print(f"  [LLM ERROR] {result}")
+                replies[agent] = windsurf_governor.LLMCallError(str(result), model, 1, "batch_error")
+                continue
+            if key is not None:
+                RESPONSE_CACHE.put(key, model, result)
+            replies[agent] = result
+
+    for request in requests:
+        reply = replies[request.agent]
+        # Batch jobs have no per-request timings; only status, tokens and cost.
+        metrics = request.metrics = windsurf_metrics.CallMetrics(
+            tick, stage_of(tick), request.agent, request.model, request.tier,
+            prompt_tokens=request.prompt_tokens)
+        if reply is None:
+            metrics.status = "skipped"
+        elif isinstance(reply, windsurf_governor.LLMCallError):
+            metrics.status = "failed"
+        else:
+            metrics.status = "ok" if request.agent in pending else "cached"
+            metrics.completion_tokens = windsurf_tokens.count_tokens(reply, request.model)
+            metrics.cost = 0.0 if metrics.status == "cached" else windsurf_metrics.estimate_cost(
+                price_tier(request.tier, request.model), metrics.prompt_tokens,
+                metrics.completion_tokens, TIER_COSTS)
+        if isinstance(reply, str):
+            show_reply(request.agent, reply)
+        finish_agent(tick, request, reply, journal, recorder)
+
+
+def add_run_arguments(parser: argparse.ArgumentParser) -> None:
+    """Options shared by the tick runner and the simulation driver."""
+    parser.add_argument(
+        "-j", "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+        help="max agents processed in parallel (default: %(default)s, "
+             "env WINDSURF_CONCURRENCY)",
+    )
+    parser.add_argument(
+        "--backend", default=windsurf_llm.DEFAULT_BACKEND,
+        choices=windsurf_llm.available_backends(),
+        help="LLM backend (default: %(default)s, env WINDSURF_LLM_BACKEND)",
+    )
+    parser.add_argument(
+        "--batch", nargs="?", const=windsurf_batch.DEFAULT_BATCH_BACKEND,
+        choices=sorted(windsurf_batch.BATCH_BACKENDS), metavar="BACKEND",
+        help="submit the stage as one bulk job and wait for it "
+             f"(backends: {', '.join(sorted(windsurf_batch.BATCH_BACKENDS))}; "
+             "default: %(const)s, env WINDSURF_BATCH_BACKEND)",
+    )
+    cache = parser.add_mutually_exclusive_group()
+    cache.add_argument("--no-cache", dest="cache_mode", action="store_const", const="off",
+                       help="bypass the LLM response cache")
+    cache.add_argument("--cache-only", dest="cache_mode", action="store_const", const="only",
+                       help="replay from the response cache only; never call the LLM")
+    parser.set_defaults(cache_mode=CACHE_MODE)
+    parser.add_argument(
+        "--stream", action="store_true", default=STREAM,
+        help="stream replies into outbox/tik<N>/llm.txt.partial (env WINDSURF_STREAM=1)",
+    )
+    parser.add_argument(
+        "--prompt-layout", choices=windsurf_prompt.LAYOUTS, default=PROMPT_LAYOUT,
+        help="message layout (default: %(default)s, env WINDSURF_PROMPT_LAYOUT)",
+    )
+    parser.add_argument(
+        "--storage", default=STORAGE_MODE, metavar="fs|db|URL",
+        help="persist cycles/outboxes as files, in DATABASE_URL or in the given "
+             "database URL (default: %(default)s, env WINDSURF_STORAGE)",
+    )
+    parser.add_argument(
+        "--memory-tokens", type=int, default=MEMORY_TOKENS, metavar="N",
+        help="cap of the memory view in prompts; 0 leaves memory.md untouched "
+             "(default: %(default)s, env WINDSURF_MEMORY_TOKENS)",
+    )
+    parser.add_argument(
+        "--memory-retrieval", type=int, default=MEMORY_RETRIEVAL_K, metavar="K",
+        help="send the K most relevant memory chunks from a per-agent vector index "
+             "instead of the memory view (needs numpy; default: %(default)s = off, "
+             "env WINDSURF_MEMORY_RETRIEVAL)",
+    )
+    parser.add_argument(
+        "--reduce-tokens", type=int, default=REDUCE_TOKENS, metavar="N",
+        help="condense stage 5 actor outputs with CHEAP-tier summaries above N tokens; "
+             "0 = never (default: %(default)s, env WINDSURF_REDUCE_TOKENS)",
+    )
+    parser.add_argument(
+        "--routing", choices=("inbox", "broadcast"), default=ROUTING,
+        help="stage 4 input: each actor's routed inbox, or all outputs of the "
+             "previous tick (default: %(default)s, env WINDSURF_ROUTING)",
+    )
+    parser.add_argument(
+        "--trace", nargs="?", const="1", default=os.getenv("WINDSURF_TRACE") or None, metavar="FILE",
+        help="record timing spans and write a Chrome trace JSON "
+             "(default file: windsurf/traces/<run>.json, env WINDSURF_TRACE=1|FILE)",
+    )
+    parser.add_argument(
+        "--no-resume", dest="resume", action="store_false", default=RESUME,
+        help="ignore the tick journal and re-run agents that already completed",
+    )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the next Project Windsurf tick")
+    add_run_arguments(parser)
+    parser.add_argument(
+        "--tick", type=int,
+        help="re-run this (past) agent tick instead of advancing, ignoring the journal; "
+             "global state is left unchanged",
+    )
+    parser.add_argument(
+        "--rerun-failed", action="store_true",
+        help="re-run only the agents whose call failed in the last (or --tick) agent tick",
+    )
+    args = parser.parse_args(argv)
+    if args.tick is not None:
+        if args.tick < 1 or stage_of(args.tick) not in STAGE_AGENTS:
+            parser.error(f"--tick {args.tick} is not an agent tick (stages 2, 4 and 5); "
+                         "human input is never replayed")
+        args.resume = False  # a replay re-runs every agent, not just the missing ones
+    if args.rerun_failed:
+        tick = args.tick if args.tick is not None else load_state().get("tick", 0)
+        if tick < 1 or stage_of(tick) not in STAGE_AGENTS:
+            parser.error(f"--rerun-failed: tick {tick} is not an agent tick (stages 2, 4 and 5); "
+                         "it has no failed agents to re-run")
+    return args
+
+
+def configure(args: argparse.Namespace) -> None:
+    """Apply the shared run options and check credentials (exits if missing)."""
+    global CACHE_MODE, PROMPT_LAYOUT, STREAM, RESUME, STORAGE_MODE, ROUTING, MEMORY_TOKENS
+    global MEMORY_RETRIEVAL_K, REDUCE_TOKENS
     load_dotenv()
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        print("ERROR: OPENAI_API_KEY not set in environment or .env — aborting.")
-        sys.exit(1)
-    print(f"[SETUP] Found OpenAI API key: {api_key[:4]}...{api_key[-4:]}")
-    # No need to set global openai.api_key as we're using the client directly
+    RESUME = args.resume
+    STORAGE_MODE = args.storage
+    CACHE_MODE = args.cache_mode
+    PROMPT_LAYOUT = args.prompt_layout
+    STREAM = args.stream
+    ROUTING = args.routing
+    MEMORY_TOKENS = args.memory_tokens
+    MEMORY_RETRIEVAL_K = args.memory_retrieval
+    REDUCE_TOKENS = args.reduce_tokens
+    if MEMORY_RETRIEVAL_K > 0:
+        try:
+            import windsurf_retrieval  # noqa: F401  (needs numpy)
+        except ImportError as exc:
+            print(f"ERROR: --memory-retrieval needs NumPy ({exc}) — pip install numpy")
+            sys.exit(1)
+    if args.trace:
+        windsurf_trace.enable()
+    windsurf_llm.set_default_backend(args.backend)
+    if args.backend == "openai" and CACHE_MODE != "only":
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            print("ERROR: OPENAI_API_KEY not set in environment or .env — aborting.")
+            sys.exit(1)
+        print(f"[SETUP] Found OpenAI API key: {api_key[:4]}...{api_key[-4:]}")
+
+
+def stage_of(tick: int) -> int:
+    return (tick - 1) % 5 + 1  # 1..5
+
+
+def export_trace(args: argparse.Namespace, run_name: str) -> None:
+    """Write the spans recorded under --trace (no-op when tracing is off)."""
+    if not args.trace:
+        return
+    path = TRACE_DIR / f"{run_name}.json" if args.trace == "1" else Path(args.trace)
+    spans = windsurf_trace.export(path)
+    print(f"[TRACE] {spans} spans written to {path} (open in https://ui.perfetto.dev or chrome://tracing)")
+
+
+@windsurf_trace.traced("stage")
+def run_tick(tick: int, args: argparse.Namespace, human_prompt: str | None = None,
+             only_failed: bool = False) -> dict | None:
+    """Process one tick; return the run_agents counts (None for human stages)."""
+    stage = stage_of(tick)
+    windsurf_trace.annotate(tick=tick, stage=stage)
+    if stage in (1, 3):  # human input stages
+        human_input(tick, human_prompt)
+        return None
+    # Stage 2 reads the human prompt and stage 5 the (reduced) actor outputs
+    # from the previous tick's outboxes; stage 4 reads each actor's routed inbox.
+    agents = STAGE_AGENTS[stage]
+    if only_failed:
+        agents = failed_agents(tick, agents)
+        print(f"Re-running {len(agents)} failed agent(s): {', '.join(agents) or 'none'}")
+        if not agents:
+            return {"processed": 0, "resumed": 0, "failed": 0}
+    content = None
+    if stage == 4 and ROUTING == "inbox":
+        content = gather_routed_chunks(tick, agents)
+    if content is None:
+        content = gather_prev_chunks(tick - 1)
+    if stage == 5 and REDUCE_TOKENS > 0:
+        content = reduce_outputs(tick, content)
+    return run_agents(tick, agents, content, args.concurrency, args.batch)
+
+
+def main(argv: list[str] | None = None):
+    args = parse_args(argv)
+    configure(args)
 
     state = load_state()
-    tick = state.get("tick", 0) + 1  # advance to next tick
-    stage = (tick - 1) % 5 + 1  # 1..5
+    if args.tick:
+        tick = args.tick
+    elif args.rerun_failed:
+        tick = state.get("tick", 0)  # repair the tick that just ran
+    else:
+        tick = state.get("tick", 0) + 1  # advance to next tick
+    stage = stage_of(tick)
 
     print("""
 ==============================
    PROJECT WINDSURF TICK RUNNER
 ==============================""")
     print(f"Current tick → {tick}  (Stage {stage})\n")
+    if stage in STAGE_AGENTS and CACHE_MODE != "only":
+        print(f"[SETUP] LLM backend: {windsurf_llm.get_backend().describe()}\n")
 
     # ------------------------------------------------------------------
-    if stage in (1, 3):  # human input stages
-        human_input(tick)
+    try:
+        with windsurf_trace.span("tick", tick=tick, stage=stage):
+            run_tick(tick, args, only_failed=args.rerun_failed)
+    except KeyboardInterrupt:
+        print(f"\n[INTERRUPTED] Tick {tick} was not advanced — run the tick runner again to resume.")
+        sys.exit(130)
+    finally:
+        export_trace(args, f"tik{tick}")
+    if stage in (1, 3):
         print("Human input captured. Re-run the tick runner to continue.")
-    elif stage == 2:  # meta-agent analysis
-        kickoff = gather_prev_outputs(tick - 1)  # human prompt
-        run_agents(tick, META_AGENTS, kickoff)
-    elif stage == 4:  # actor-agent actions
-        routing = gather_prev_outputs(tick - 1)  # meta routing outputs
-        run_agents(tick, ACTOR_AGENTS, routing)
-    elif stage == 5:  # meta-agent review
-        actor_outputs = gather_prev_outputs(tick - 1)
-        run_agents(tick, META_AGENTS, actor_outputs)
-    else:
-        print("Unknown stage – nothing to do.")
 
     # ------------------------------------------------------------------
-    state["tick"] = tick
-    save_state(state)
+    if tick > state.get("tick", 0):
+        state["tick"] = tick
+        save_state(state)
+    close_memory()
+    windsurf_llm.close_backends()
+    close_storage()
     print("\n✔ Tick processing finished. You may run this script again for the next stage.")
 
 
@@ -5,17 +5,37 @@ Windsurf Tick Viewer - A tool to view the outputs from the last tick in a struct
 
 import os
 import sys
+import argparse
+import codecs
+import itertools
+import shlex
+import subprocess
+import time
 import json
 import re
 from pathlib import Path
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
 import textwrap
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Tuple
+
+import windsurf_diff
+import windsurf_metrics
+import windsurf_watch
+from windsurf_index import GROUPS, IndexedFile, TickIndex, detect_content_type, parse_tick_range
 
 # Constants
 AGENTS_DIR = Path("agents")
 GLOBAL_STATE = Path("windsurf/global_state.json")
+METRICS_DIR = Path("windsurf/metrics")
 MAX_CONTENT_PREVIEW = 500  # Maximum characters to show in content preview
+MAX_DIFF_LINES = 40  # Maximum diff lines to show per changed file
+PAGE_SIZE = 20  # Agents per page in the detailed tick view
+CYCLE_PARSE_LIMIT = 64 * 1024  # Larger cycle files are previewed without parsing them whole
+
+# Set from command-line flags in main()
+FULL_OUTPUT = False  # --full: read and pretty-print whole files (through $PAGER on a terminal)
+OUTPUT_FORMAT = "text"  # --format: text, or json/ndjson records for scripts and dashboards
 
 # ANSI colors for terminal output
 class Colors:
@@ -44,69 +64,95 @@ def get_agent_name(agent_dir: Path) -> str:
     """Get the agent name from its directory."""
     return agent_dir.name
 
+_index: Optional[TickIndex] = None
+_refreshed: set = set()
+
+def get_index(*ticks: int) -> TickIndex:
+    """Get the shared tick index, refreshed once per run for each requested tick."""
+    global _index
+    if _index is None:
+        _index = TickIndex(AGENTS_DIR)
+    missing = [t for t in ticks if t not in _refreshed]
+    if missing:
+        _index.refresh(ticks=missing)
+        _refreshed.update(missing)
+    return _index
+
 def get_tick_files(agent_dir: Path, tick: int) -> Dict[str, Path]:
     """Get all files related to a specific tick for an agent."""
-    files = {}
-    
-    # Check cycles directory
-    cycle_file = agent_dir / "cycles" / f"{tick}.json"
-    if cycle_file.exists():
-        files["cycle"] = cycle_file
-    
-    # Check outbox directory
-    outbox_dir = agent_dir / "outbox" / f"tik{tick}"
-    if outbox_dir.exists():
-        for file in outbox_dir.iterdir():
-            if file.is_file():
-                files[f"outbox/{file.name}"] = file
-    
-    # Check inbox directory
-    inbox_dir = agent_dir / "inbox" / f"tik{tick}"
-    if inbox_dir.exists():
-        for file in inbox_dir.iterdir():
-            if file.is_file():
-                files[f"inbox/{file.name}"] = file
-    
-    return files
-
-def detect_content_type(content: str, file_name: str) -> str:
-    """Detect the type of content based on file name and content."""
-    if file_name.endswith('.json'):
-        return 'json'
-    elif file_name.endswith('.yaml') or file_name.endswith('.yml'):
-        return 'yaml'
-    elif file_name.endswith('.md'):
-        return 'markdown'
-    
-    # Try to detect from content
-    if content.strip().startswith('{') and content.strip().endswith('}'):
-        try:
-            json.loads(content)
-            return 'json'
-        except json.JSONDecodeError:
-            pass
-    
-    if content.strip().startswith('```json'):
-        return 'json'
-    elif content.strip().startswith('```yaml'):
-        return 'yaml'
-    elif content.strip().startswith('```md') or content.strip().startswith('```markdown'):
-        return 'markdown'
-    elif content.strip().startswith('#'):
-        return 'markdown'
-    
-    return 'text'
+    return {f.key: f.path for f in get_index(tick).files(tick, get_agent_name(agent_dir))}
+
+def get_tick_entries(tick: int) -> Dict[str, Dict[str, IndexedFile]]:
+    """Get the index entries of a tick grouped by agent name, in agent order."""
+    agents: Dict[str, Dict[str, IndexedFile]] = {}
+    for f in get_index(tick).files(tick):
+        agents.setdefault(f.agent, {})[f.key] = f
+    return agents
+
+def get_tick_index(tick: int) -> Dict[str, Dict[str, Path]]:
+    """Get all files of a tick grouped by agent name, in agent order."""
+    return {agent: {key: f.path for key, f in files.items()}
+            for agent, files in get_tick_entries(tick).items()}
+
+def read_preview(path: Path, max_chars: int = MAX_CONTENT_PREVIEW) -> Tuple[str, bool]:
+    """Read only the bytes needed for the first *max_chars* characters of a file.
 
-def format_content(content: str, file_name: str = '', max_length: int = MAX_CONTENT_PREVIEW) -> str:
-    """Format content for display with proper indentation and truncation."""
+    Returns (text, truncated). A multi-byte character cut at the read
+    boundary is dropped rather than decoded as garbage.
+    """
+    limit = max_chars * 4  # worst case for UTF-8
+    with open(path, "rb") as f:
+        data = f.read(limit + 1)
+    truncated = len(data) > limit
+    text = codecs.getincrementaldecoder("utf-8")(errors="replace").decode(data[:limit], final=not truncated)
+    if len(text) > max_chars:
+        text, truncated = text[:max_chars], True
+    return text, truncated
+
+def _cycle_result_prefix(text: str) -> Optional[str]:
+    """Decode as much of "thought_action_result" as a cut-off cycle file holds."""
+    match = re.search(r'"thought_action_result"\s*:\s*"', text)
+    if not match:
+        return None
+    try:
+        return json.decoder.scanstring(text, match.end())[0]
+    except ValueError:  # the string runs past the end of the preview
+        raw = text[match.end():]
+        for cut in range(7):  # back off a trailing partial escape such as \u00
+            try:
+                return json.loads('"' + raw[:len(raw) - cut] + '"')
+            except json.JSONDecodeError:
+                continue
+    return None
+
+def read_cycle(entry: IndexedFile, max_chars: int = MAX_CONTENT_PREVIEW) -> Tuple[dict, bool]:
+    """Load a cycle file; big ones are only read up to the preview length.
+
+    Returns (cycle data, truncated). For a truncated read the data holds at
+    most a cut-off "thought_action_result".
+    """
+    if FULL_OUTPUT or entry.size <= CYCLE_PARSE_LIMIT:
+        return json.loads(entry.path.read_text()), False
+    text, _ = read_preview(entry.path, max_chars * 6 + 256)  # room for escapes and the key
+    result = _cycle_result_prefix(text)
+    return ({"thought_action_result": result} if result is not None else {}), True
+
+def format_content(content: str, file_name: str = '', max_length: Optional[int] = MAX_CONTENT_PREVIEW,
+                   content_type: Optional[str] = None, truncated: bool = False) -> str:
+    """Format content for display with proper indentation and truncation.
+
+    *max_length* None shows everything. *truncated* marks content that is
+    already a cut-off preview: it is shown as-is instead of being parsed.
+    """
     if not content:
         return "No content"
     
     # Detect content type
-    content_type = detect_content_type(content, file_name)
+    if content_type is None:
+        content_type = detect_content_type(content, file_name)
     
     # Process content based on type
-    if content_type == 'json':
+    if content_type == 'json' and not truncated:
         # Try to pretty-print JSON
         try:
             # If content is wrapped in ```json, extract it
@@ -122,8 +168,10 @@ def format_content(content: str, file_name: str = '', max_length: int = MAX_CONT
             pass
     
     # Truncate if too long
-    if len(content) > max_length:
-        content = content[:max_length] + "... (truncated)"
+    if max_length is not None and len(content) > max_length:
+        content, truncated = content[:max_length], True
+    if truncated:
+        content += "... (truncated, use --full to see everything)"
     
     # Add content type indicator
     formatted = f"{Colors.YELLOW}[{content_type.upper()}]{Colors.ENDC}\n"
@@ -131,7 +179,18 @@ def format_content(content: str, file_name: str = '', max_length: int = MAX_CONT
     # Indent all lines
     return formatted + textwrap.indent(content, "    ")
 
-def print_agent_tick_info(agent_name: str, tick: int, files: Dict[str, Path]):
+def print_file_preview(entry: IndexedFile):
+    """Print one outbox/inbox file: a bounded preview, or all of it with --full."""
+    try:
+        if FULL_OUTPUT:
+            print(format_content(entry.path.read_text(), entry.name, None, entry.content_type))
+        else:
+            content, truncated = read_preview(entry.path)
+            print(format_content(content, entry.name, content_type=entry.content_type, truncated=truncated))
+    except FileNotFoundError:
+        print(f"    {Colors.RED}File not found{Colors.ENDC}")
+
+def print_agent_tick_info(agent_name: str, tick: int, files: Dict[str, IndexedFile]):
     """Print information about an agent's tick files."""
     print(f"{Colors.BOLD}{Colors.BLUE}=== {agent_name} ==={Colors.ENDC}")
     
@@ -142,12 +201,13 @@ def print_agent_tick_info(agent_name: str, tick: int, files: Dict[str, Path]):
     # Process cycle file first if it exists
     if "cycle" in files:
         try:
-            cycle_data = json.loads(files["cycle"].read_text())
+            cycle_data, truncated = read_cycle(files["cycle"])
             print(f"  {Colors.CYAN}[CYCLE]{Colors.ENDC}")
             if "thought_action_result" in cycle_data:
                 content = cycle_data["thought_action_result"]
                 print(f"{Colors.GREEN}  Content:{Colors.ENDC}")
-                print(format_content(content, "cycle.json"))
+                print(format_content(content, "cycle.json", None if FULL_OUTPUT else MAX_CONTENT_PREVIEW,
+                                     truncated=truncated))
             else:
                 print(f"  {Colors.YELLOW}No thought_action_result in cycle data{Colors.ENDC}")
         except (json.JSONDecodeError, FileNotFoundError) as e:
@@ -157,52 +217,155 @@ def print_agent_tick_info(agent_name: str, tick: int, files: Dict[str, Path]):
     outbox_files = {k: v for k, v in files.items() if k.startswith("outbox/")}
     if outbox_files:
         print(f"\n  {Colors.CYAN}[OUTBOX]{Colors.ENDC}")
-        for file_key, file_path in outbox_files.items():
-            file_name = file_key.split("/")[-1]
-            print(f"  {Colors.GREEN}{file_name}:{Colors.ENDC}")
-            try:
-                content = file_path.read_text()
-                print(format_content(content, file_name))
-            except FileNotFoundError:
-                print(f"    {Colors.RED}File not found{Colors.ENDC}")
+        for entry in outbox_files.values():
+            print(f"  {Colors.GREEN}{entry.name}:{Colors.ENDC}")
+            print_file_preview(entry)
     
     # Process inbox files
     inbox_files = {k: v for k, v in files.items() if k.startswith("inbox/")}
     if inbox_files:
         print(f"\n  {Colors.CYAN}[INBOX]{Colors.ENDC}")
-        for file_key, file_path in inbox_files.items():
-            file_name = file_key.split("/")[-1]
-            print(f"  {Colors.GREEN}{file_name}:{Colors.ENDC}")
-            try:
-                content = file_path.read_text()
-                print(format_content(content, file_name))
-            except FileNotFoundError:
-                print(f"    {Colors.RED}File not found{Colors.ENDC}")
+        for entry in inbox_files.values():
+            print(f"  {Colors.GREEN}{entry.name}:{Colors.ENDC}")
+            print_file_preview(entry)
     
     print()  # Empty line between agents
 
-def view_tick(tick: Optional[int] = None):
-    """View all agent outputs for a specific tick."""
+@contextmanager
+def pager():
+    """Send stdout through $PAGER (default `less -R`) when it is a terminal."""
+    if not sys.stdout.isatty():
+        yield
+        return
+    try:
+        proc = subprocess.Popen(shlex.split(os.environ.get("PAGER", "less -R")), stdin=subprocess.PIPE,
+                                text=True, encoding="utf-8", errors="replace")
+    except (FileNotFoundError, ValueError):
+        yield
+        return
+    stdout, sys.stdout = sys.stdout, proc.stdin
+    try:
+        yield
+    except BrokenPipeError:  # the pager was quit before the end
+        pass
+    finally:
+        sys.stdout = stdout
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        proc.wait()
+
+class RecordWriter:
+    """Write records as NDJSON lines or as one JSON array, one record at a time."""
+    
+    def __init__(self, fmt: str, stream=None):
+        self.fmt = fmt
+        self.stream = stream or sys.stdout
+        self.count = 0
+    
+    def write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False)
+        if self.fmt == "ndjson":
+            self.stream.write(line + "\n")
+            self.stream.flush()  # consumers such as `watch | monitor` see each record at once
+        else:
+            self.stream.write(("[\n  " if self.count == 0 else ",\n  ") + line)
+        self.count += 1
+    
+    def close(self):
+        if self.fmt == "json":
+            self.stream.write("\n]\n" if self.count else "[]\n")
+        self.stream.flush()
+
+def emit_records(records: Iterable[dict]):
+    """Stream *records* to stdout in OUTPUT_FORMAT."""
+    writer = RecordWriter(OUTPUT_FORMAT)
+    try:
+        for record in records:
+            writer.write(record)
+        writer.close()
+    except BrokenPipeError:  # the reader (e.g. `head`) went away; stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+def file_record(entry: IndexedFile, preview: bool = True) -> dict:
+    """Machine-readable record of one tick file, with a bounded preview of its content."""
+    record = {"record": "file", "tick": entry.tick, "agent": entry.agent, "kind": entry.kind,
+              "name": entry.name, "size": entry.size, "content_type": entry.content_type or None,
+              "sha256": entry.sha256 or None, "path": str(entry.path)}
+    if not preview:
+        return record
+    text, truncated = None, False
+    try:
+        if entry.kind == "cycle":
+            cycle_data, truncated = read_cycle(entry)
+            text = cycle_data.get("thought_action_result")
+            if cycle_data.get("status"):
+                record["status"] = cycle_data["status"]
+        if not isinstance(text, str):
+            if FULL_OUTPUT:
+                text, truncated = entry.path.read_text(), False
+            else:
+                text, truncated = read_preview(entry.path)
+    except (FileNotFoundError, json.JSONDecodeError):
+        text = None
+    if text is not None and not FULL_OUTPUT and len(text) > MAX_CONTENT_PREVIEW:
+        text, truncated = text[:MAX_CONTENT_PREVIEW], True
+    record["preview"] = text
+    record["truncated"] = truncated
+    return record
+
+def tick_records(tick: int) -> Iterator[dict]:
+    """One file record per cycle, outbox and inbox file of *tick*."""
+    for files in get_tick_entries(tick).values():
+        for entry in files.values():
+            yield file_record(entry)
+
+def summary_records(tick: int) -> Iterator[dict]:
+    """One record per active agent of *tick*; no file is read."""
+    for agent_name, files in get_tick_entries(tick).items():
+        yield {"record": "agent", "tick": tick, "agent": agent_name, "cycle": "cycle" in files,
+               "outbox": sum(1 for f in files.values() if f.kind == "outbox"),
+               "inbox": sum(1 for f in files.values() if f.kind == "inbox"),
+               "size": sum(f.size for f in files.values())}
+
+def view_tick(tick: Optional[int] = None, page: int = 1, page_size: int = PAGE_SIZE):
+    """View the agent outputs for a specific tick, *page_size* agents per page (0 = all)."""
     state = load_state()
     current_tick = state.get("tick", 0)
     
     if tick is None:
         tick = current_tick
+    if OUTPUT_FORMAT != "text":
+        return emit_records(tick_records(tick))
     
     print(f"{Colors.HEADER}{Colors.BOLD}PROJECT WINDSURF - TICK {tick} VIEWER{Colors.ENDC}")
     print(f"{Colors.YELLOW}Current global tick: {current_tick}{Colors.ENDC}")
     print(f"{Colors.YELLOW}Viewing tick: {tick}{Colors.ENDC}")
     print()
     
-    agent_dirs = get_agent_dirs()
-    for agent_dir in sorted(agent_dirs):
-        agent_name = get_agent_name(agent_dir)
-        files = get_tick_files(agent_dir, tick)
-        if files:  # Only show agents with files for this tick
-            print_agent_tick_info(agent_name, tick, files)
+    agents = list(get_tick_entries(tick).items())
+    pages = max(1, -(-len(agents) // page_size)) if page_size > 0 else 1
+    page = min(max(page, 1), pages)
+    if page_size > 0:
+        agents_on_page = agents[(page - 1) * page_size:page * page_size]
+    else:
+        agents_on_page = agents
+    for agent_name, files in agents_on_page:
+        print_agent_tick_info(agent_name, tick, files)
+    
+    if pages > 1:
+        first = (page - 1) * page_size + 1
+        print(f"{Colors.YELLOW}Page {page}/{pages} (agents {first}-{first + len(agents_on_page) - 1} "
+              f"of {len(agents)}){Colors.ENDC}", end="")
+        size_flag = f" --page-size {page_size}" if page_size != PAGE_SIZE else ""
+        print(f"{Colors.YELLOW} - next: {sys.argv[0]} {tick} --page {page + 1}{size_flag}{Colors.ENDC}"
+              if page < pages else "")
 
 def view_tick_summary(tick: int):
     """View a summary of all agent outputs for a specific tick."""
+    if OUTPUT_FORMAT != "text":
+        return emit_records(summary_records(tick))
     state = load_state()
     current_tick = state.get("tick", 0)
     
@@ -211,14 +374,10 @@ def view_tick_summary(tick: int):
     print(f"{Colors.YELLOW}Viewing tick: {tick}{Colors.ENDC}")
     print()
     
-    agent_dirs = get_agent_dirs()
     agent_count = 0
     file_counts = {"cycle": 0, "outbox": 0, "inbox": 0}
     
-    for agent_dir in sorted(agent_dirs):
-        agent_name = get_agent_name(agent_dir)
-        files = get_tick_files(agent_dir, tick)
-        
+    for agent_name, files in get_tick_index(tick).items():
         if files:
             agent_count += 1
             if "cycle" in files:
@@ -247,8 +406,73 @@ def view_tick_summary(tick: int):
     print(f"  Outbox files: {file_counts['outbox']}")
     print(f"  Inbox files: {file_counts['inbox']}")
 
+def print_diff(old: IndexedFile, new: IndexedFile, max_lines: int = MAX_DIFF_LINES):
+    """Print the diff of two indexed files, capped at *max_lines* lines."""
+    try:
+        lines = windsurf_diff.diff_files(old.path, new.path, new.content_type)
+        for count, line in enumerate(lines):
+            if count == max_lines:
+                remaining = sum(1 for _ in lines) + 1
+                print(f"      {Colors.YELLOW}... {remaining} more diff lines{Colors.ENDC}")
+                break
+            color = Colors.GREEN if line[:1] == "+" else Colors.RED if line[:1] == "-" else ""
+            print(f"      {color}{line}{Colors.ENDC if color else ''}")
+    except FileNotFoundError:
+        print(f"      {Colors.RED}Error reading{Colors.ENDC}")
+
+def print_file_change(key: str, old: Optional[IndexedFile], new: Optional[IndexedFile],
+                      old_label: str, new_label: str, show_identical: bool = True):
+    """Print how one file changed; identical hashes are never read."""
+    if old is not None and new is not None:
+        if old.sha256 == new.sha256:
+            if show_identical:
+                print(f"    {key}: {Colors.GREEN}Identical{Colors.ENDC}")
+            return
+        print(f"    {key}: {Colors.YELLOW}Different{Colors.ENDC} ({old.size} → {new.size} bytes)")
+        print_diff(old, new)
+    elif old is not None:
+        print(f"    {key}: {Colors.YELLOW}Only in {old_label}{Colors.ENDC}")
+    elif new is not None:
+        print(f"    {key}: {Colors.YELLOW}Only in {new_label}{Colors.ENDC}")
+
+def change_record(old: Optional[IndexedFile], new: Optional[IndexedFile]) -> dict:
+    """Machine-readable record of how one file changed between two ticks."""
+    ref = new or old
+    if old is None:
+        status = "added"
+    elif new is None:
+        status = "removed"
+    else:
+        status = "identical" if old.sha256 == new.sha256 else "changed"
+    record = {"record": "change", "agent": ref.agent, "kind": ref.kind, "name": ref.name, "status": status}
+    for side, entry in (("old", old), ("new", new)):
+        record[f"{side}_tick"] = entry.tick if entry else None
+        record[f"{side}_size"] = entry.size if entry else None
+        record[f"{side}_sha256"] = entry.sha256 if entry else None
+    if status == "changed":
+        try:
+            lines = list(itertools.islice(windsurf_diff.diff_files(old.path, new.path, new.content_type),
+                                          MAX_DIFF_LINES + 1))
+        except FileNotFoundError:
+            lines = []
+        record["diff"] = lines[:MAX_DIFF_LINES]
+        record["diff_truncated"] = len(lines) > MAX_DIFF_LINES
+    return record
+
+def compare_records(tick1: int, tick2: int) -> Iterator[dict]:
+    """One change record per file present in either tick."""
+    entries1 = get_tick_entries(tick1)
+    entries2 = get_tick_entries(tick2)
+    for agent_name in sorted(set(entries1) | set(entries2)):
+        files1 = entries1.get(agent_name, {})
+        files2 = entries2.get(agent_name, {})
+        for key in sorted(set(files1) | set(files2)):
+            yield change_record(files1.get(key), files2.get(key))
+
 def compare_ticks(tick1: int, tick2: int):
     """Compare two ticks side by side."""
+    if OUTPUT_FORMAT != "text":
+        return emit_records(compare_records(tick1, tick2))
     state = load_state()
     current_tick = state.get("tick", 0)
     
@@ -257,68 +481,240 @@ def compare_ticks(tick1: int, tick2: int):
     print(f"{Colors.YELLOW}Comparing ticks: {tick1} vs {tick2}{Colors.ENDC}")
     print()
     
-    agent_dirs = get_agent_dirs()
-    for agent_dir in sorted(agent_dirs):
-        agent_name = get_agent_name(agent_dir)
-        files1 = get_tick_files(agent_dir, tick1)
-        files2 = get_tick_files(agent_dir, tick2)
+    entries1 = get_tick_entries(tick1)
+    entries2 = get_tick_entries(tick2)
+    for agent_name in sorted(set(entries1) | set(entries2)):
+        files1 = entries1.get(agent_name, {})
+        files2 = entries2.get(agent_name, {})
+        print(f"{Colors.BOLD}{Colors.BLUE}=== {agent_name} ==={Colors.ENDC}")
         
-        if files1 or files2:
-            print(f"{Colors.BOLD}{Colors.BLUE}=== {agent_name} ==={Colors.ENDC}")
-            
-            # Compare cycle files
-            if "cycle" in files1 or "cycle" in files2:
-                print(f"  {Colors.CYAN}[CYCLE]{Colors.ENDC}")
-                
-                if "cycle" in files1 and "cycle" in files2:
-                    try:
-                        data1 = json.loads(files1["cycle"].read_text())
-                        data2 = json.loads(files2["cycle"].read_text())
-                        
-                        if "thought_action_result" in data1 and "thought_action_result" in data2:
-                            content1 = data1["thought_action_result"]
-                            content2 = data2["thought_action_result"]
-                            
-                            # Just show if they're different or same
-                            if content1 == content2:
-                                print(f"    {Colors.GREEN}Content is identical{Colors.ENDC}")
-                            else:
-                                print(f"    {Colors.YELLOW}Content differs{Colors.ENDC}")
-                    except (json.JSONDecodeError, FileNotFoundError):
-                        print(f"    {Colors.RED}Error comparing cycle files{Colors.ENDC}")
-                else:
-                    if "cycle" in files1:
-                        print(f"    {Colors.YELLOW}Only in tick {tick1}{Colors.ENDC}")
-                    else:
-                        print(f"    {Colors.YELLOW}Only in tick {tick2}{Colors.ENDC}")
-            
-            # Compare outbox files
-            outbox1 = {k.split("/")[-1]: v for k, v in files1.items() if k.startswith("outbox/")}
-            outbox2 = {k.split("/")[-1]: v for k, v in files2.items() if k.startswith("outbox/")}
-            
-            if outbox1 or outbox2:
-                print(f"\n  {Colors.CYAN}[OUTBOX]{Colors.ENDC}")
-                all_files = sorted(set(list(outbox1.keys()) + list(outbox2.keys())))
-                
-                for file_name in all_files:
-                    if file_name in outbox1 and file_name in outbox2:
-                        try:
-                            content1 = outbox1[file_name].read_text()
-                            content2 = outbox2[file_name].read_text()
-                            
-                            if content1 == content2:
-                                print(f"    {file_name}: {Colors.GREEN}Identical{Colors.ENDC}")
-                            else:
-                                print(f"    {file_name}: {Colors.YELLOW}Different{Colors.ENDC}")
-                        except FileNotFoundError:
-                            print(f"    {file_name}: {Colors.RED}Error reading{Colors.ENDC}")
-                    else:
-                        if file_name in outbox1:
-                            print(f"    {file_name}: {Colors.YELLOW}Only in tick {tick1}{Colors.ENDC}")
-                        else:
-                            print(f"    {file_name}: {Colors.YELLOW}Only in tick {tick2}{Colors.ENDC}")
-            
-            print()  # Empty line between agents
+        for section in ("cycle", "outbox", "inbox"):
+            keys = sorted(k for k in set(files1) | set(files2) if k.split("/")[0] == section)
+            if not keys:
+                continue
+            print(f"  {Colors.CYAN}[{section.upper()}]{Colors.ENDC}")
+            for key in keys:
+                print_file_change(key, files1.get(key), files2.get(key),
+                                  f"tick {tick1}", f"tick {tick2}")
+        
+        print()  # Empty line between agents
+
+def range_changes(start: int, end: int, totals: Dict[str, int]) -> Iterator[Tuple[int, IndexedFile, IndexedFile]]:
+    """Yield (tick, previous version, new version) for every file whose hash changed.
+
+    Only the index rows of one tick are held at a time, plus the last seen
+    entry per (agent, file); *totals* counts changed, unchanged and new files.
+    """
+    last_seen: Dict[Tuple[str, str], IndexedFile] = {}
+    for tick in range(start, end + 1):
+        for f in get_index(tick).files(tick):
+            previous = last_seen.get((f.agent, f.key))
+            last_seen[(f.agent, f.key)] = f
+            if previous is None:
+                totals["new"] += 1
+            elif previous.sha256 == f.sha256:
+                totals["unchanged"] += 1
+            else:
+                totals["changed"] += 1
+                yield tick, previous, f
+
+def compare_range(start: int, end: int):
+    """Walk ticks start..end and show how each agent file changed since its previous version."""
+    totals = {"changed": 0, "unchanged": 0, "new": 0}
+    if OUTPUT_FORMAT != "text":
+        return emit_records(change_record(previous, f) for _, previous, f in range_changes(start, end, totals))
+    
+    print(f"{Colors.HEADER}{Colors.BOLD}PROJECT WINDSURF - TICK RANGE COMPARISON{Colors.ENDC}")
+    print(f"{Colors.YELLOW}Comparing ticks: {start}..{end}{Colors.ENDC}")
+    print()
+    
+    for tick, group in itertools.groupby(range_changes(start, end, totals), key=lambda change: change[0]):
+        print(f"{Colors.BOLD}{Colors.BLUE}=== Tick {tick} ==={Colors.ENDC}")
+        for _, previous, f in group:
+            print_file_change(f"{f.agent} {f.key}", previous, f,
+                              f"tick {previous.tick}", f"tick {tick}")
+            print(f"      {Colors.CYAN}(previous version: tick {previous.tick}){Colors.ENDC}")
+        print()
+    
+    print(f"{Colors.BOLD}Summary:{Colors.ENDC}")
+    print(f"  Changed files: {totals['changed']}")
+    print(f"  Unchanged (by hash): {totals['unchanged']}")
+    print(f"  First versions: {totals['new']}")
+
+def print_watched_file(path: Path, streamed: Dict[Path, int], shown: Dict[Path, Tuple[int, int]],
+                       writer: Optional[RecordWriter] = None):
+    """Render one new or updated file; *streamed* tracks how much of each .partial was printed.
+
+    With a *writer*, files become file records and streamed output becomes
+    "stream" records carrying only the newly appended text.
+    """
+    tick_path = windsurf_watch.parse_tick_path(AGENTS_DIR, path)
+    if tick_path is None:
+        return
+    try:
+        stat = path.stat()
+    except FileNotFoundError:  # e.g. a .partial that was just renamed into place
+        return
+    if shown.get(path) == (stat.st_size, stat.st_mtime_ns):
+        return
+    shown[path] = (stat.st_size, stat.st_mtime_ns)
+    stamp = datetime.now().strftime("%H:%M:%S")
+    label = (f"{Colors.BOLD}tick {tick_path.tick}{Colors.ENDC} {Colors.BLUE}{tick_path.agent}{Colors.ENDC} "
+             f"{Colors.CYAN}{tick_path.key}{Colors.ENDC}")
+    
+    if tick_path.name.endswith(windsurf_watch.PARTIAL_SUFFIX):
+        offset = streamed.get(path, 0)
+        if offset == 0 and writer is None:
+            print(f"\n{Colors.YELLOW}[{stamp}]{Colors.ENDC} {label} {Colors.YELLOW}(streaming){Colors.ENDC}")
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        streamed[path] = offset + len(data)
+        if writer is not None:
+            writer.write({"record": "stream", "tick": tick_path.tick, "agent": tick_path.agent,
+                          "kind": tick_path.kind, "name": tick_path.name, "offset": offset,
+                          "text": data.decode("utf-8", errors="replace")})
+            return
+        sys.stdout.write(data.decode("utf-8", errors="replace"))
+        sys.stdout.flush()
+        return
+    
+    finished_stream = streamed.pop(path.with_name(path.name + windsurf_watch.PARTIAL_SUFFIX), None) is not None
+    entry = IndexedFile(tick_path.tick, tick_path.agent, tick_path.kind, tick_path.name, path,
+                        stat.st_size, stat.st_mtime_ns, "",
+                        "json" if tick_path.kind == "cycle" else detect_content_type("", tick_path.name))
+    if writer is not None:
+        writer.write(file_record(entry))
+        return
+    if finished_stream:
+        print()  # finish the streamed line
+    print(f"\n{Colors.GREEN}[{stamp}]{Colors.ENDC} {label}")
+    try:
+        if tick_path.kind == "cycle":
+            try:
+                cycle_data, truncated = read_cycle(entry)
+            except json.JSONDecodeError:
+                cycle_data, truncated = {}, False
+            if cycle_data.get("status") == "failed":
+                print(f"    {Colors.RED}Failed: {cycle_data.get('error', {}).get('message', '')}{Colors.ENDC}")
+                return
+            if "thought_action_result" in cycle_data:
+                print(format_content(cycle_data["thought_action_result"], "cycle.json", truncated=truncated))
+                return
+        content, truncated = read_preview(path)
+    except FileNotFoundError:
+        return
+    print(format_content(content, tick_path.name, truncated=truncated))
+
+def watch_ticks(tick: Optional[int] = None, interval: float = windsurf_watch.POLL_INTERVAL,
+                notify: bool = True):
+    """Print files as they are written: a fixed tick, or the current and next tick."""
+    source = windsurf_watch.open_source(AGENTS_DIR, get_index(), interval, notify)
+    writer = RecordWriter(OUTPUT_FORMAT) if OUTPUT_FORMAT != "text" else None
+    if writer is None:
+        print(f"{Colors.HEADER}{Colors.BOLD}PROJECT WINDSURF - WATCH{Colors.ENDC}")
+        target = f"tick {tick}" if tick is not None else "the current and next tick"
+        print(f"{Colors.YELLOW}Watching {target} via {source.name} (Ctrl+C to stop){Colors.ENDC}")
+    
+    streamed: Dict[Path, int] = {}
+    shown: Dict[Path, Tuple[int, int]] = {}
+    try:
+        while True:
+            if tick is None:
+                current_tick = load_state().get("tick", 0)
+                ticks = [current_tick, current_tick + 1]  # the runner writes tick+1 before saving state
+            else:
+                ticks = [tick]
+            for path in source.changes(ticks):
+                print_watched_file(path, streamed, shown, writer)
+    except KeyboardInterrupt:
+        if writer is None:
+            print(f"\n{Colors.YELLOW}Stopped watching{Colors.ENDC}")
+    finally:
+        source.close()
+        if writer is not None:
+            writer.close()
+
+def search_ticks(query: str, group: Optional[str] = None, ticks: Optional[Tuple[int, int]] = None,
+                 content_type: Optional[str] = None, limit: int = 20):
+    """Full-text search over cycles, outboxes and inboxes of all ticks."""
+    if OUTPUT_FORMAT != "text":
+        index = get_index()
+        index.refresh()
+        hits = index.search(query, group, ticks, content_type, limit=limit, highlight=("", ""))
+        return emit_records(dict(file_record(hit.file, preview=False), record="hit", rank=rank,
+                                 score=hit.score, snippet=" ".join(hit.snippet.split()))
+                            for rank, hit in enumerate(hits, 1))
+    print(f"{Colors.HEADER}{Colors.BOLD}PROJECT WINDSURF - SEARCH{Colors.ENDC}")
+    filters = [f"group={group}" if group else "", f"ticks={ticks[0]}..{ticks[1]}" if ticks else "",
+               f"type={content_type}" if content_type else ""]
+    print(f"{Colors.YELLOW}Query: {' '.join([query] + [f for f in filters if f])}{Colors.ENDC}")
+    print()
+    
+    index = get_index()
+    index.refresh()
+    start = time.perf_counter()
+    hits = index.search(query, group, ticks, content_type, limit=limit,
+                        highlight=(Colors.BOLD + Colors.YELLOW, Colors.ENDC))
+    elapsed = (time.perf_counter() - start) * 1000
+    
+    for rank, hit in enumerate(hits, 1):
+        f = hit.file
+        print(f"{Colors.BOLD}{rank:>2}. tick {f.tick}{Colors.ENDC} "
+              f"{Colors.BLUE}{f.agent}{Colors.ENDC} {Colors.CYAN}{f.key}{Colors.ENDC} "
+              f"[{f.content_type}] score {hit.score:.2f}")
+        print(textwrap.indent(" ".join(hit.snippet.split()), "    "))
+    print(f"\n{len(hits)} hit(s) in {elapsed:.1f} ms")
+
+def _seconds(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.2f}s"
+
+def view_metrics(ticks: Optional[Tuple[int, int]] = None, by: str = "agent"):
+    """Show p50/p95 call timings, tokens and estimated cost per agent, model, tier, stage or tick."""
+    records = windsurf_metrics.load_metrics(METRICS_DIR, ticks)
+    if OUTPUT_FORMAT != "text":
+        return emit_records({"record": "metrics", **row} for row in windsurf_metrics.aggregate(records, by))
+    records = list(records)
+    report = windsurf_metrics.aggregate(records, by)
+    print(f"{Colors.HEADER}{Colors.BOLD}PROJECT WINDSURF - CALL METRICS{Colors.ENDC}")
+    print(f"{Colors.YELLOW}Ticks: {f'{ticks[0]}..{ticks[1]}' if ticks else 'all'}, grouped by {by}{Colors.ENDC}")
+    print()
+    if not report:
+        print(f"{Colors.YELLOW}No metrics recorded in {METRICS_DIR}{Colors.ENDC}")
+        return
+    
+    header = (f"{by:<20} {'calls':>5} {'fail':>4} {'cache':>5}  {'latency p50/p95':>17}  "
+              f"{'ttft p50/p95':>15}  {'queue p50/p95':>15}  {'tokens in/out':>15}  {'cost':>9}")
+    print(f"{Colors.BOLD}{header}{Colors.ENDC}")
+    (total,) = windsurf_metrics.aggregate([dict(r, all="total") for r in records], "all")
+    for row in report + [total]:
+        name = str(row.get(by, row.get("all")))
+        color = Colors.BOLD if row is total else Colors.BLUE
+        failed = f"{Colors.RED}{row['failed']:>4}{Colors.ENDC}" if row["failed"] else f"{0:>4}"
+        print(f"{color}{name:<20}{Colors.ENDC} {row['calls']:>5} {failed} {row['cached']:>5}  "
+              f"{_seconds(row['latency_p50']):>8}/{_seconds(row['latency_p95']):<8}  "
+              f"{_seconds(row['ttft_p50']):>7}/{_seconds(row['ttft_p95']):<7}  "
+              f"{_seconds(row['queue_wait_p50']):>7}/{_seconds(row['queue_wait_p95']):<7}  "
+              f"{row['prompt_tokens']:>7}/{row['completion_tokens']:<7}  {'$' + format(row['cost'], '.4f'):>9}")
+
+def parse_metrics_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog=f"{sys.argv[0]} metrics",
+                                     description="LLM call timings, tokens and cost across ticks")
+    parser.add_argument("ticks", nargs="?", type=parse_tick_range, metavar="A..B", help="only this tick range")
+    parser.add_argument("--by", choices=windsurf_metrics.GROUP_FIELDS, default="agent",
+                        help="group by (default: %(default)s)")
+    return parser.parse_args(argv)
+
+def parse_search_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog=f"{sys.argv[0]} search",
+                                     description="Full-text search across all tick outputs")
+    parser.add_argument("query", nargs="+", help='words, "a phrase", OR/NOT, prefix*')
+    parser.add_argument("--group", choices=sorted(GROUPS), help="only meta, actor or human agents")
+    parser.add_argument("--ticks", type=parse_tick_range, metavar="A..B", help="only this tick range")
+    parser.add_argument("--type", dest="content_type", choices=["json", "yaml", "markdown", "text"],
+                        help="only this content type")
+    parser.add_argument("--limit", type=int, default=20, help="max hits (default: %(default)s)")
+    return parser.parse_args(argv)
 
 def print_help():
     """Print help information for the tick viewer."""
@@ -329,38 +725,95 @@ def print_help():
     print(f"  {Colors.BOLD}<tick_number>{Colors.ENDC}            View detailed output for the specified tick")
     print(f"  {Colors.BOLD}summary <tick_number>{Colors.ENDC}    Show a summary of all agent outputs for the specified tick")
     print(f"  {Colors.BOLD}compare <tick1> <tick2>{Colors.ENDC}  Compare outputs between two ticks")
+    print(f"  {Colors.BOLD}compare <start>..<end>{Colors.ENDC}   Show every file change across a range of ticks")
     print(f"  {Colors.BOLD}latest{Colors.ENDC}                  View detailed output for the latest tick")
+    print(f"  {Colors.BOLD}watch [tick] [--poll]{Colors.ENDC}    Print files as agents write them (incl. streaming .partial output)")
+    print(f"  {Colors.BOLD}metrics [A..B] [--by F]{Colors.ENDC}  p50/p95 latency, TTFT, queue wait, tokens and cost (--by agent|model|tier|stage|tick)")
+    print(f"  {Colors.BOLD}search <query> [opts]{Colors.ENDC}    Ranked full-text search (--group meta|actor|human, --ticks A..B, --type T, --limit N)")
+    print(f"\nOptions:")
+    print(f"  {Colors.BOLD}--full{Colors.ENDC}                  Show whole files, pretty-printed, through $PAGER (default: bounded previews)")
+    print(f"  {Colors.BOLD}--format json|ndjson{Colors.ENDC}    Stream one record per file (tick, agent, kind, size, content type, hash, preview)")
+    print(f"  {Colors.BOLD}--page N, --page-size M{Colors.ENDC} Page through the agents of a tick, M per page (default: {PAGE_SIZE}, 0 = all)")
     print(f"\nExamples:")
     print(f"  {sys.argv[0]} 5                 # View all outputs for tick 5")
     print(f"  {sys.argv[0]} summary 3         # Show summary of tick 3")
     print(f"  {sys.argv[0]} compare 2 3       # Compare outputs between ticks 2 and 3")
+    print(f"  {sys.argv[0]} compare 2..40     # Changes of every agent file from tick 2 to 40")
     print(f"  {sys.argv[0]} latest            # View the latest tick")
+    print(f"  {sys.argv[0]} 5 --page 2 --full # Agents 21-40 of tick 5, complete outputs")
+    print(f"  {sys.argv[0]} search counsel --group meta --ticks 2..40   # Which meta agent mentioned counsel")
+
+def parse_view_options(argv: List[str]) -> Tuple[argparse.Namespace, List[str]]:
+    """Split the options shared by all commands from the command and its arguments."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--full", action="store_true")
+    parser.add_argument("--page", type=int, default=1)
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--format", choices=["text", "json", "ndjson"], default="text")
+    return parser.parse_known_args(argv)
 
 def main():
     """Main function to parse arguments and run the viewer."""
+    global FULL_OUTPUT, OUTPUT_FORMAT
+    options, rest = parse_view_options(sys.argv[1:])
+    argv = [sys.argv[0]] + rest
+    FULL_OUTPUT = options.full
+    OUTPUT_FORMAT = options.format
+    with (pager() if FULL_OUTPUT and OUTPUT_FORMAT == "text" else nullcontext()):
+        run_command(argv, options)
+
+def run_command(argv: List[str], options: argparse.Namespace):
+    """Dispatch one viewer command; *argv* has the global options removed."""
     # Load current tick from global state
     state = load_state()
     current_tick = state.get("tick", 0)
     
-    if len(sys.argv) > 1:
+    if len(argv) > 1:
         # Check for special commands
-        if sys.argv[1] == "help" or sys.argv[1] == "-h" or sys.argv[1] == "--help":
+        if argv[1] == "help" or argv[1] == "-h" or argv[1] == "--help":
             print_help()
             return
-        elif sys.argv[1] == "summary" and len(sys.argv) > 2:
-            if sys.argv[2] == "latest":
+        elif argv[1] == "watch":
+            args = [a for a in argv[2:] if a != "--poll"]
+            try:
+                tick = None if not args or args[0] == "latest" else int(args[0])
+            except ValueError:
+                print(f"{Colors.RED}Error: Tick must be an integer or 'latest'{Colors.ENDC}")
+                sys.exit(1)
+            watch_ticks(tick, notify="--poll" not in argv[2:])
+            return
+        elif argv[1] == "metrics":
+            args = parse_metrics_args(argv[2:])
+            view_metrics(args.ticks, args.by)
+            return
+        elif argv[1] == "search" and len(argv) > 2:
+            args = parse_search_args(argv[2:])
+            search_ticks(" ".join(args.query), args.group, args.ticks, args.content_type, args.limit)
+            return
+        elif argv[1] == "summary" and len(argv) > 2:
+            if argv[2] == "latest":
                 view_tick_summary(current_tick)
                 return
             try:
-                tick = int(sys.argv[2])
+                tick = int(argv[2])
                 view_tick_summary(tick)
                 return
             except ValueError:
                 print(f"{Colors.RED}Error: Tick must be an integer or 'latest'{Colors.ENDC}")
                 sys.exit(1)
-        elif sys.argv[1] == "compare" and len(sys.argv) > 3:
-            tick1 = sys.argv[2]
-            tick2 = sys.argv[3]
+        elif argv[1] == "compare" and len(argv) > 2 and ".." in argv[2]:
+            start, _, end = argv[2].partition("..")
+            try:
+                start = current_tick if start == "latest" else int(start)
+                end = current_tick if end in ("latest", "") else int(end)
+            except ValueError:
+                print(f"{Colors.RED}Error: Range must look like 2..40 or 2..latest{Colors.ENDC}")
+                sys.exit(1)
+            compare_range(start, end)
+            return
+        elif argv[1] == "compare" and len(argv) > 3:
+            tick1 = argv[2]
+            tick2 = argv[3]
             
             # Handle 'latest' keyword for first tick
             if tick1 == "latest":
@@ -384,13 +837,13 @@ def main():
             
             compare_ticks(tick1, tick2)
             return
-        elif sys.argv[1] == "latest":
-            view_tick(current_tick)
+        elif argv[1] == "latest":
+            view_tick(current_tick, options.page, options.page_size)
             return
         else:
             try:
-                tick = int(sys.argv[1])
-                view_tick(tick)
+                tick = int(argv[1])
+                view_tick(tick, options.page, options.page_size)
                 return
             except ValueError:
                 print(f"{Colors.RED}Error: Invalid command or tick number{Colors.ENDC}")
@@ -398,7 +851,7 @@ def main():
                 sys.exit(1)
     
     # Default: view current tick
-    view_tick(current_tick)
+    view_tick(current_tick, options.page, options.page_size)
 
 if __name__ == "__main__":
     main()
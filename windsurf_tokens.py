@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Project Windsurf – token counting and budgeting
+===============================================
+Thin wrapper around tiktoken. Encodings are resolved once per model; when
+tiktoken (or its encoding files) is unavailable the count falls back to a
+chars/4 estimate so reporting never breaks a tick.
+
+`fit_chunks` is the budget engine used by the tick runner: prompt input is
+gathered as prioritised `Chunk`s and the lowest-priority ones are truncated
+or omitted first until the request fits the model's input budget.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+FALLBACK_ENCODING = "o200k_base"  # gpt-4o family
+CHARS_PER_TOKEN = 4  # estimate used without tiktoken
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding(FALLBACK_ENCODING)
+    except Exception:  # encoding files could not be fetched (offline)
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Number of tokens *text* occupies for *model*."""
+    if not text:
+        return 0
+    enc = _encoding(model)
+    if enc is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: list[dict], model: str = "gpt-4o") -> int:
+    """Approximate prompt tokens of a chat request (content + per-message overhead)."""
+    return sum(count_tokens(m["content"], model) + 4 for m in messages) + 3
+
+
+# ---------------------------------------------------------------------------
+# BUDGETING
+# ---------------------------------------------------------------------------
+
+MIN_CHUNK_TOKENS = 64  # below this a truncated chunk is dropped entirely
+
+
+@dataclass
+class Chunk:
+    """A piece of prompt input; lower *priority* is trimmed first."""
+    source: str
+    text: str
+    priority: int = 0
+
+    def render(self) -> str:
+        return f"# {self.source}\n{self.text}" if self.source else self.text
+
+
+def truncate_tokens(text: str, max_tokens: int, model: str = "gpt-4o",
+                    keep: str = "head") -> str:
+    """Cut *text* to at most *max_tokens*, keeping its head or its tail."""
+    if max_tokens <= 0:
+        return ""
+    enc = _encoding(model)
+    if enc is None:
+        limit = max_tokens * CHARS_PER_TOKEN
+        return text[:limit] if keep == "head" else text[-limit:]
+    ids = enc.encode(text, disallowed_special=())
+    if len(ids) <= max_tokens:
+        return text
+    ids = ids[:max_tokens] if keep == "head" else ids[-max_tokens:]
+    return enc.decode(ids)
+
+
+def fit_chunks(chunks: list[Chunk], budget: int, model: str = "gpt-4o") -> tuple[list[Chunk], int]:
+    """Trim *chunks* so their rendered total fits *budget* tokens.
+
+    Lowest-priority chunks are handled first (largest first among equals):
+    each is truncated by the remaining excess, or replaced by a one-line
+    omission note when less than MIN_CHUNK_TOKENS of it would survive.
+    Returns (chunks in original order, tokens removed).
+    """
+    sizes = [count_tokens(c.render(), model) for c in chunks]
+    total = sum(sizes)
+    excess = total - budget
+    if excess <= 0:
+        return list(chunks), 0
+
+    fitted = list(chunks)
+    for i in sorted(range(len(chunks)), key=lambda i: (chunks[i].priority, -sizes[i])):
+        if excess <= 0:
+            break
+        c = chunks[i]
+        keep = sizes[i] - excess
+        if keep >= MIN_CHUNK_TOKENS:
+            note = f"\n[... truncated {excess} tokens to fit the {model} input budget]"
+            text = truncate_tokens(c.text, keep - count_tokens(note, model) - 8, model) + note
+        else:
+            text = f"[omitted {sizes[i]} tokens to fit the {model} input budget]"
+        fitted[i] = Chunk(c.source, text, c.priority)
+        new_size = count_tokens(fitted[i].render(), model)
+        excess -= sizes[i] - new_size
+        sizes[i] = new_size
+    return fitted, total - sum(sizes)
+
+
+def render_chunks(chunks: list[Chunk]) -> str:
+    return "\n\n".join(c.render() for c in chunks)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Project Windsurf – span tracing for the tick lifecycle
+======================================================
+`--trace` on the tick runner (or the simulation driver) records nested
+spans:
+
+  tick → stage → gather_inputs / route / prepare_agents / run_agents
+       → agent → llm_call → persist
+
+and writes them as a Chrome trace (windsurf/traces/tik<N>.json by default)
+that chrome://tracing, https://ui.perfetto.dev or speedscope open directly.
+Each span carries its attributes plus span_id/parent_id, so parentage is
+kept across the worker pool (see `bind`).
+
+Tracing is off by default: `span()` then returns a shared no-op context
+manager and `annotate()` returns immediately.
+"""
+from __future__ import annotations
+
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Iterator
+
+from windsurf.tools.atomic_io import atomic_write_text
+
+_NOOP = nullcontext()
+# (span_id, attributes) of the open spans of the current context, innermost last
+_stack: contextvars.ContextVar[tuple] = contextvars.ContextVar("windsurf_trace_stack", default=())
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.events: list[dict] = []
+        self._ids = itertools.count(1)
+        self._threads: set[int] = set()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+
+    def enable(self) -> None:
+        """Start recording (dropping spans of an earlier recording)."""
+        with self._lock:
+            self.events.clear()
+            self._threads.clear()
+            self._origin = time.perf_counter_ns()
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def span(self, name: str, cat: str = "windsurf", **attrs: Any) -> ContextManager:
+        """Time the enclosed block as a span named *name*."""
+        if not self.enabled:
+            return _NOOP
+        return self._span(name, cat, attrs)
+
+    @contextmanager
+    def _span(self, name: str, cat: str, attrs: dict) -> Iterator[None]:
+        stack = _stack.get()
+        span_id = next(self._ids)
+        attrs["span_id"] = span_id
+        attrs["parent_id"] = stack[-1][0] if stack else None
+        token = _stack.set(stack + ((span_id, attrs),))
+        start = time.perf_counter_ns()
+        try:
+            yield
+        except BaseException as exc:
+            attrs["error"] = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            end = time.perf_counter_ns()
+            _stack.reset(token)
+            self._record(name, cat, start, end, attrs)
+
+    def annotate(self, **attrs: Any) -> None:
+        """Add attributes to the innermost open span."""
+        if not self.enabled:
+            return
+        stack = _stack.get()
+        if stack:
+            stack[-1][1].update(attrs)
+
+    def _record(self, name: str, cat: str, start: int, end: int, attrs: dict) -> None:
+        tid = threading.get_ident()
+        event = {"name": name, "cat": cat, "ph": "X", "pid": os.getpid(), "tid": tid,
+                 "ts": (start - self._origin) / 1000, "dur": (end - start) / 1000, "args": attrs}
+        with self._lock:
+            if tid not in self._threads:
+                self._threads.add(tid)
+                self.events.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+                                    "args": {"name": threading.current_thread().name}})
+            self.events.append(event)
+
+    def export(self, path: Path) -> int:
+        """Write the recorded spans as Chrome trace JSON; return the span count."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            events = list(self.events)
+        atomic_write_text(path, json.dumps({"traceEvents": events, "displayTimeUnit": "ms"},
+                                           default=str))
+        return sum(1 for e in events if e["ph"] == "X")
+
+
+TRACER = Tracer()
+span = TRACER.span
+annotate = TRACER.annotate
+enable = TRACER.enable
+disable = TRACER.disable
+export = TRACER.export
+
+
+def traced(name: str, cat: str = "windsurf") -> Callable[[Callable], Callable]:
+    """Decorator: run every call of the function inside a span named *name*."""
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return fn(*args, **kwargs)
+            with TRACER.span(name, cat):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def bind(fn: Callable) -> Callable:
+    """Make *fn* run in the current span context when called from another thread.
+
+    ThreadPoolExecutor does not carry context variables over; wrap each
+    submitted callable so its spans nest under the submitting span.
+    """
+    if not TRACER.enabled:
+        return fn
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Project Windsurf – change feed for live tick watching
+=====================================================
+Backs `windsurf_tick_viewer.py watch`. A change source reports the paths of
+agent files (cycles/<tick>.json, outbox/tik<tick>/*, inbox/tik<tick>/*)
+that were written or grew since the last call:
+
+  • NotifySource    filesystem notifications via the optional `watchdog`
+                    package (inotify, FSEvents, ReadDirectoryChangesW);
+  • PollingSource   fallback that refreshes the tick index (unchanged
+                    directories cost one stat) and re-stats the
+                    `.partial` files of streaming replies, which grow
+                    without touching their directory.
+
+`open_source` prefers notifications and falls back to polling when
+watchdog is not installed or the observer cannot start.
+"""
+from __future__ import annotations
+
+import queue
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from windsurf_index import _CYCLE_FILE, _TICK_DIR, TickIndex
+
+POLL_INTERVAL = 1.0  # seconds
+COALESCE_DELAY = 0.05  # seconds to collect a burst of notifications
+PARTIAL_SUFFIX = ".partial"
+
+
+@dataclass(frozen=True)
+class TickPath:
+    agent: str
+    kind: str  # cycle | outbox | inbox
+    tick: int
+    name: str
+
+    @property
+    def key(self) -> str:
+        return "cycle" if self.kind == "cycle" else f"{self.kind}/{self.name}"
+
+
+def parse_tick_path(agents_dir: Path, path: Path) -> TickPath | None:
+    """Classify *path* as a per-tick agent file, or None for anything else."""
+    try:
+        parts = Path(path).resolve().relative_to(Path(agents_dir).resolve()).parts
+    except ValueError:
+        return None
+    if len(parts) == 3 and parts[1] == "cycles":
+        m = _CYCLE_FILE.fullmatch(parts[2])
+        return TickPath(parts[0], "cycle", int(m.group(1)), parts[2]) if m else None
+    if len(parts) == 4 and parts[1] in ("outbox", "inbox"):
+        m = _TICK_DIR.fullmatch(parts[2])
+        if m and not parts[3].startswith("."):  # skip atomic-write temp files
+            return TickPath(parts[0], parts[1], int(m.group(1)), parts[3])
+    return None
+
+
+class PollingSource:
+    """Cheap mtime polling on top of the tick index."""
+
+    name = "mtime polling"
+
+    def __init__(self, index: TickIndex, interval: float = POLL_INTERVAL):
+        self.index = index
+        self.interval = interval
+        self.since = time.time_ns()
+        self._partials: dict[Path, int] = {}  # streaming file -> size already reported
+
+    def changes(self, ticks: list[int]) -> list[Path]:
+        time.sleep(self.interval)
+        self.index.refresh(ticks=ticks)
+        changed = []
+        for f in self.index.modified_since(self.since, ticks):
+            self.since = max(self.since, f.mtime_ns)
+            changed.append(f.path)
+            if f.name.endswith(PARTIAL_SUFFIX):
+                self._partials[f.path] = f.size
+        # .partial files that already existed when the watch started
+        for tick in ticks:
+            for f in self.index.files(tick, kind="outbox"):
+                if f.name.endswith(PARTIAL_SUFFIX):
+                    self._partials.setdefault(f.path, f.size)
+        for path, size in list(self._partials.items()):
+            try:
+                current = path.stat().st_size
+            except FileNotFoundError:
+                del self._partials[path]
+                continue
+            if current != size:
+                self._partials[path] = current
+                if path not in changed:
+                    changed.append(path)
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class NotifySource:
+    """Filesystem notifications through watchdog (raises ImportError without it)."""
+
+    name = "filesystem notifications"
+
+    def __init__(self, agents_dir: Path, interval: float = POLL_INTERVAL):
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        self.agents_dir = Path(agents_dir).resolve()
+        self.interval = interval
+        self._queue: queue.Queue[Path] = queue.Queue()
+        events = self._queue
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if not event.is_directory:
+                    events.put(Path(getattr(event, "dest_path", "") or event.src_path))
+
+        self._observer = Observer()
+        self._observer.schedule(_Handler(), str(self.agents_dir), recursive=True)
+        self._observer.start()
+
+    def changes(self, ticks: list[int]) -> list[Path]:
+        try:
+            paths = [self._queue.get(timeout=self.interval)]
+        except queue.Empty:
+            return []
+        time.sleep(COALESCE_DELAY)
+        while True:
+            try:
+                paths.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        changed = []
+        for path in dict.fromkeys(paths):  # de-duplicate, keep order
+            parsed = parse_tick_path(self.agents_dir, path)
+            if parsed is not None and parsed.tick in ticks:
+                changed.append(path)
+        return changed
+
+    def close(self) -> None:
+        self._observer.stop()
+        self._observer.join()
+
+
+def open_source(agents_dir: Path, index: TickIndex, interval: float = POLL_INTERVAL,
+                notify: bool = True) -> NotifySource | PollingSource:
+    """Notification source if possible, polling otherwise."""
+    if notify:
+        try:
+            return NotifySource(agents_dir, interval)
+        except (ImportError, OSError):  # no watchdog, or e.g. inotify watch limit reached
+            pass
+    return PollingSource(index, interval)
@@ -2,6 +2,10 @@ const express = require('express');
 const cors = require('cors');
 const path = require('path');
 const fs = require('fs');
+const { execFile } = require('child_process');
+const { promisify } = require('util');
+
+const execFileAsync = promisify(execFile);
 
 const app = express();
 const PORT = process.env.PORT || 5000;
@@ -42,6 +46,45 @@ const getAgents = () => {
   return agents;
 };
 
+// Run a Python helper without blocking the event loop and parse its JSON output
+const runPythonJson = async (args) => {
+  const { stdout } = await execFileAsync(process.env.PYTHON || 'python3', args, {
+    encoding: 'utf8',
+    maxBuffer: 64 * 1024 * 1024
+  });
+  return JSON.parse(stdout);
+};
+
+// Query the SQLite tick index (windsurf_index.py) for the files of a tick.
+// The index is refreshed incrementally for that tick on every call.
+const queryTickIndex = (tickNumber, agentId) => {
+  const args = [path.join(WINDSURF_ROOT, 'windsurf_index.py'), 'files', String(tickNumber)];
+  if (agentId) {
+    args.push('--agent', agentId);
+  }
+  return runPythonJson(args);
+};
+
+// Full-text search over all indexed tick files (ranked, best first)
+const searchTickIndex = ({ q, group, ticks, type, limit }) => {
+  const args = [path.join(WINDSURF_ROOT, 'windsurf_index.py'), 'search'];
+  if (group) args.push('--group', String(group));
+  if (ticks) args.push('--ticks', String(ticks));
+  if (type) args.push('--type', String(type));
+  if (limit) args.push('--limit', String(limit));
+  // '--' ends the options, so a query starting with '-' is not read as a flag
+  args.push('--', String(q));
+  return runPythonJson(args);
+};
+
+// p50/p95 LLM call metrics (windsurf_metrics.py), grouped by agent, model, tier, stage or tick
+const queryMetrics = ({ ticks, by }) => {
+  const args = [path.join(WINDSURF_ROOT, 'windsurf_metrics.py'), 'report'];
+  if (ticks) args.push('--ticks', String(ticks));
+  if (by) args.push('--by', String(by));
+  return runPythonJson(args);
+};
+
 // Helper function to get the current global tick
 const getCurrentTick = () => {
   try {
@@ -154,22 +197,65 @@ app.post('/api/ticks/1/input', (req, res) => {
   });
 });
 
+// Get the indexed files (path, size, sha256, content type) of a tick
+app.get('/api/ticks/:tickNumber/files', async (req, res) => {
+  const { tickNumber } = req.params;
+  
+  try {
+    res.json(await queryTickIndex(parseInt(tickNumber), req.query.agent));
+  } catch (error) {
+    console.error(`Error fetching files for tick ${tickNumber}:`, error);
+    res.status(500).json({ error: `Failed to fetch files for tick ${tickNumber}` });
+  }
+});
+
+// Search tick outputs: /api/search?q=counsel&group=meta&ticks=2..40&type=json
+app.get('/api/search', async (req, res) => {
+  if (!req.query.q) {
+    return res.status(400).json({ error: 'Missing query parameter q' });
+  }
+  try {
+    res.json(await searchTickIndex(req.query));
+  } catch (error) {
+    console.error('Error searching tick index:', error);
+    res.status(500).json({ error: 'Search failed' });
+  }
+});
+
+// Call metrics: /api/metrics?ticks=2..40&by=tier
+app.get('/api/metrics', async (req, res) => {
+  try {
+    res.json(await queryMetrics(req.query));
+  } catch (error) {
+    console.error('Error reading call metrics:', error);
+    res.status(500).json({ error: 'Failed to read metrics' });
+  }
+});
+
 // Get agent outputs for a specific tick
-app.get('/api/ticks/:tickNumber/outputs', (req, res) => {
+app.get('/api/ticks/:tickNumber/outputs', async (req, res) => {
   const { tickNumber } = req.params;
   
   try {
-    // In a real implementation, we would fetch actual agent outputs
-    // This is a simplified mock response
     const outputs = {};
-    getAgents().forEach(agent => {
-      outputs[agent.id] = {
-        content: `Mock output for ${agent.name} in tick ${tickNumber}`,
-        files: ['file1.txt', 'file2.json'],
-        timestamp: new Date().toISOString(),
-        status: Math.random() > 0.3 ? 'completed' : 'in_progress'
-      };
-    });
+    const files = await queryTickIndex(parseInt(tickNumber));
+    for (const file of files) {
+      const output = outputs[file.agent] || (outputs[file.agent] = {
+        content: '',
+        files: [],
+        timestamp: null,
+        status: 'in_progress'
+      });
+      output.files.push(file.kind === 'cycle' ? 'cycle' : `${file.kind}/${file.name}`);
+      const modified = new Date(file.mtime_ns / 1e6).toISOString();
+      if (!output.timestamp || modified > output.timestamp) {
+        output.timestamp = modified;
+      }
+      if (file.kind === 'outbox' && file.name === 'llm.txt') {
+        output.content = await fs.promises.readFile(file.path, 'utf8');
+        output.status = 'completed';
+      }
+    }
     
     res.json(outputs);
   } catch (error) {